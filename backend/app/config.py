@@ -14,15 +14,128 @@ class Settings:
     # Platform Configuration
     PLATFORM_NAME: str = os.getenv("NEXT_PUBLIC_PLATFORM_NAME", "PumpFun")
     GRADUATION_THRESHOLD: int = int(os.getenv("NEXT_PUBLIC_GRADUATION_THRESHOLD", "69000"))
+    SOL_PRICE_USD: float = float(os.getenv("SOL_PRICE_USD", "150"))  # Used to value trades in USD market cap
     
     # Solana Configuration
     SOLANA_RPC_URL: str = os.getenv("SOLANA_RPC_URL", "https://api.devnet.solana.com")
     TOKEN_FACTORY_PROGRAM_ID: str = os.getenv("TOKEN_FACTORY_PROGRAM_ID", "")
     
+    # Solana RPC Client Configuration
+    SOLANA_RPC_TIMEOUT: float = float(os.getenv("SOLANA_RPC_TIMEOUT", "10"))
+    SOLANA_RPC_MAX_CONNECTIONS: int = int(os.getenv("SOLANA_RPC_MAX_CONNECTIONS", "100"))
+    SOLANA_RPC_MAX_KEEPALIVE: int = int(os.getenv("SOLANA_RPC_MAX_KEEPALIVE", "20"))
+    SOLANA_RPC_MAX_CONCURRENCY: int = int(os.getenv("SOLANA_RPC_MAX_CONCURRENCY", "16"))
+    BULK_VERIFY_CHUNK_SIZE: int = 100  # getMultipleAccounts limit
+    BULK_VERIFY_CONCURRENCY: int = int(os.getenv("BULK_VERIFY_CONCURRENCY", "4"))
+    BULK_VERIFY_MAX_ADDRESSES: int = int(os.getenv("BULK_VERIFY_MAX_ADDRESSES", "10000"))
+    BULK_VERIFY_RETRIES: int = int(os.getenv("BULK_VERIFY_RETRIES", "1"))  # per failed chunk
+    BULK_CREATE_BATCH_SIZE: int = int(os.getenv("BULK_CREATE_BATCH_SIZE", "1000"))
+    BULK_CREATE_MAX_TOKENS: int = int(os.getenv("BULK_CREATE_MAX_TOKENS", "10000"))
+    
+    # Bonding Curve Storage Configuration
+    EMBED_BONDING_CURVE: bool = os.getenv("EMBED_BONDING_CURVE", "false").lower() == "true"
+    TRADING_PAIR_SYNC: str = os.getenv("TRADING_PAIR_SYNC", "change_stream")  # change_stream or transaction
+    
+    # Chain Indexer Configuration
+    INDEXER_ENABLED: bool = os.getenv("INDEXER_ENABLED", "false").lower() == "true"
+    INDEXER_POLL_INTERVAL: float = float(os.getenv("INDEXER_POLL_INTERVAL", "2"))
+    INDEXER_BATCH_SIZE: int = int(os.getenv("INDEXER_BATCH_SIZE", "50"))
+    INDEXER_BACKFILL_LIMIT: int = int(os.getenv("INDEXER_BACKFILL_LIMIT", "1000"))
+    CANDLE_1S_RETENTION: int = int(os.getenv("CANDLE_1S_RETENTION", str(2 * 24 * 3600)))  # seconds
+    
+    # Live Event Feed Configuration
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))  # Per-client buffer before dropping
+    EVENTS_MAX_SUBSCRIBERS: int = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "10000"))
+    EVENTS_HEARTBEAT_INTERVAL: float = float(os.getenv("EVENTS_HEARTBEAT_INTERVAL", "15"))
+    EVENTS_REDIS_ENABLED: bool = os.getenv("EVENTS_REDIS_ENABLED", "false").lower() == "true"
+    
+    # Cache Configuration
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_LOCAL_MAX_ENTRIES: int = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "10000"))
+    CACHE_LOCAL_TTL: float = float(os.getenv("CACHE_LOCAL_TTL", "2"))  # Bounds cross-worker staleness
+    CACHE_TOKEN_TTL: float = float(os.getenv("CACHE_TOKEN_TTL", "10"))
+    CACHE_TOKEN_LIST_TTL: float = float(os.getenv("CACHE_TOKEN_LIST_TTL", "5"))
+    CACHE_ANALYTICS_TTL: float = float(os.getenv("CACHE_ANALYTICS_TTL", "30"))
+    CACHE_RANKING_TTL: float = float(os.getenv("CACHE_RANKING_TTL", "2"))
+    CACHE_COUNT_TTL: float = float(os.getenv("CACHE_COUNT_TTL", "30"))  # Pagination totals
+    
+    # Analytics Configuration
+    ANALYTICS_REFRESH_INTERVAL: float = float(os.getenv("ANALYTICS_REFRESH_INTERVAL", "30"))
+    ANALYTICS_RECONCILE_INTERVAL: float = float(os.getenv("ANALYTICS_RECONCILE_INTERVAL", "900"))
+    
+    # Graduation Monitor Configuration
+    GRADUATION_MONITOR_ENABLED: bool = os.getenv("GRADUATION_MONITOR_ENABLED", "true").lower() == "true"
+    GRADUATION_SWEEP_INTERVAL: float = float(os.getenv("GRADUATION_SWEEP_INTERVAL", "30"))
+    GRADUATION_QUEUE_SIZE: int = int(os.getenv("GRADUATION_QUEUE_SIZE", "1000"))
+    GRADUATION_RECORD_RETRIES: int = int(os.getenv("GRADUATION_RECORD_RETRIES", "5"))
+    GRADUATION_RECORD_BACKOFF: float = float(os.getenv("GRADUATION_RECORD_BACKOFF", "0.5"))  # seconds, doubles per retry
+    
+    # Ranking Configuration
+    RANKING_ENABLED: bool = os.getenv("RANKING_ENABLED", "true").lower() == "true"
+    RANKING_MAX_ENTRIES: int = int(os.getenv("RANKING_MAX_ENTRIES", "10000"))  # per board
+    RANKING_TRADE_WEIGHT: float = float(os.getenv("RANKING_TRADE_WEIGHT", "0.1"))  # SOL of trending score per trade
+    RANKING_REBUILD_INTERVAL: float = float(os.getenv("RANKING_REBUILD_INTERVAL", "60"))  # seconds
+    RANKING_SEED_LIMIT: int = int(os.getenv("RANKING_SEED_LIMIT", "50000"))  # recent trades replayed per rebuild
+    
+    # Token Write-behind Configuration
+    WRITE_BEHIND_ENABLED: bool = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    WRITE_BEHIND_FLUSH_INTERVAL: float = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.1"))  # seconds
+    WRITE_BEHIND_MAX_STALENESS: float = float(os.getenv("WRITE_BEHIND_MAX_STALENESS", "2"))  # seconds before updates bypass the buffer
+    WRITE_BEHIND_MAX_PENDING: int = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))  # buffered mints that force an early flush
+    
+    # Holder Snapshot Configuration
+    HOLDER_SNAPSHOTS_ENABLED: bool = os.getenv("HOLDER_SNAPSHOTS_ENABLED", "false").lower() == "true"
+    HOLDER_SNAPSHOT_SOURCE: str = os.getenv("HOLDER_SNAPSHOT_SOURCE", "program_accounts")  # program_accounts or largest_accounts
+    HOLDER_SNAPSHOT_INTERVAL: float = float(os.getenv("HOLDER_SNAPSHOT_INTERVAL", "3600"))  # seconds between passes
+    HOLDER_SNAPSHOT_CONCURRENCY: int = int(os.getenv("HOLDER_SNAPSHOT_CONCURRENCY", "32"))  # mints in flight
+    HOLDER_SNAPSHOT_BATCH_SIZE: int = int(os.getenv("HOLDER_SNAPSHOT_BATCH_SIZE", "500"))  # mints stored per write
+    HOLDER_SNAPSHOT_RPC_RATE: float = float(os.getenv("HOLDER_SNAPSHOT_RPC_RATE", "20"))  # RPC calls per second
+    HOLDER_SNAPSHOT_RPC_BURST: int = int(os.getenv("HOLDER_SNAPSHOT_RPC_BURST", "40"))
+    HOLDER_SNAPSHOT_RETENTION: int = int(os.getenv("HOLDER_SNAPSHOT_RETENTION", str(30 * 24 * 3600)))  # seconds
+    
+    # Wallet Portfolio Configuration
+    PORTFOLIO_MAX_POSITIONS: int = int(os.getenv("PORTFOLIO_MAX_POSITIONS", "500"))  # largest balances valued per request
+    
+    # Request Fan-out Configuration
+    FANOUT_TIMEOUT: float = float(os.getenv("FANOUT_TIMEOUT", "10"))  # seconds, whole fan-out
+    FANOUT_OPTIONAL_TIMEOUT: float = float(os.getenv("FANOUT_OPTIONAL_TIMEOUT", "2"))  # seconds, before optional calls fall back
+    
+    # Response Serialization Configuration
+    # Per endpoint: shape raw documents and encode with orjson, skipping response model validation
+    FAST_JSON_TOKEN_LIST: bool = os.getenv("FAST_JSON_TOKEN_LIST", "true").lower() == "true"
+    FAST_JSON_SEARCH: bool = os.getenv("FAST_JSON_SEARCH", "true").lower() == "true"
+    
+    # Search Configuration
+    SEARCH_MAX_RESULTS: int = int(os.getenv("SEARCH_MAX_RESULTS", "200"))
+    SEARCH_MAX_QUERY_LENGTH: int = 64
+    
     # File Upload Configuration
     MAX_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB
     ALLOWED_IMAGE_TYPES: list = ["image/jpeg", "image/png", "image/gif", "image/webp"]
     UPLOAD_DIR: str = "static/images"
+    UPLOAD_TMP_DIR: str = os.getenv("UPLOAD_TMP_DIR", "static/tmp")
+    
+    # Image Pipeline Configuration
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", "2"))
+    IMAGE_QUEUE_SIZE: int = int(os.getenv("IMAGE_QUEUE_SIZE", "16"))
+    IMAGE_OUTPUT_FORMAT: str = os.getenv("IMAGE_OUTPUT_FORMAT", "webp")  # webp or avif
+    IMAGE_QUALITY: int = int(os.getenv("IMAGE_QUALITY", "80"))
+    IMAGE_META_CACHE_SIZE: int = int(os.getenv("IMAGE_META_CACHE_SIZE", "10000"))
+    IMAGE_META_CACHE_TTL: int = int(os.getenv("IMAGE_META_CACHE_TTL", "3600"))
+    IMAGE_CACHE_MAX_AGE: int = int(os.getenv("IMAGE_CACHE_MAX_AGE", "31536000"))  # 1 year, images are immutable
+    
+    # Image Storage Configuration
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "filesystem")  # filesystem, s3 or memory
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "pumpfun-images")
+    S3_PREFIX: str = os.getenv("S3_PREFIX", "images/")
+    S3_ENDPOINT_URL: Optional[str] = os.getenv("S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+    S3_REGION: Optional[str] = os.getenv("S3_REGION")
+    S3_ACCESS_KEY_ID: Optional[str] = os.getenv("S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY: Optional[str] = os.getenv("S3_SECRET_ACCESS_KEY")
+    S3_PUBLIC_BASE_URL: Optional[str] = os.getenv("S3_PUBLIC_BASE_URL")  # CDN in front of the bucket
+    S3_PRESIGN_TTL: int = int(os.getenv("S3_PRESIGN_TTL", "3600"))
+    S3_MAX_CONCURRENCY: int = int(os.getenv("S3_MAX_CONCURRENCY", "16"))
+    S3_MULTIPART_PART_SIZE: int = int(os.getenv("S3_MULTIPART_PART_SIZE", str(8 * 1024 * 1024)))
     
     # API Configuration
     API_BASE_URL: str = os.getenv("API_BASE_URL", "http://localhost:3001")
@@ -38,7 +38,16 @@ async def create_indexes():
         await database.tokens.create_index([("created_at", -1)])
         await database.tokens.create_index("graduation_status")
         await database.tokens.create_index([("graduation_status", 1), ("market_cap", -1)])
-        await database.tokens.create_index([("is_active", 1), ("created_at", -1)])
+        # Token list keyset pages: equality filters, then (sort field, _id) so pages seek instead of sorting
+        for sort_field in ("created_at", "market_cap"):
+            await database.tokens.create_index([("is_active", 1), (sort_field, -1), ("_id", -1)])
+            await database.tokens.create_index([("is_active", 1), ("graduation_status", 1), (sort_field, -1), ("_id", -1)])
+            await database.tokens.create_index([("is_active", 1), ("creator_wallet", 1), (sort_field, -1), ("_id", -1)])
+        # Search: exact and prefix matches by market cap. (field, market_cap) serves equality and
+        # rare prefixes; (market_cap, field) lets common prefixes stop after SEARCH_MAX_RESULTS
+        for search_field in ("symbol_lower", "name_lower"):
+            await database.tokens.create_index([("is_active", 1), (search_field, 1), ("market_cap", -1)])
+            await database.tokens.create_index([("is_active", 1), ("market_cap", -1), (search_field, 1)])
         
         # Trading pairs collection indexes
         await database.trading_pairs.create_index("mint_address")
@@ -56,6 +65,22 @@ async def create_indexes():
         await database.transactions.create_index("user_wallet")
         await database.transactions.create_index([("timestamp", -1)])
         await database.transactions.create_index("transaction_type")
+        await database.transactions.create_index([("mint_address", 1), ("timestamp", -1), ("_id", -1)])
+        
+        # Holdings collection indexes (per-mint wallet balances)
+        await database.holdings.create_index([("mint_address", 1), ("wallet", 1)], unique=True)
+        await database.holdings.create_index([("wallet", 1), ("balance", -1)])
+        
+        # Holder snapshots collection indexes (latest per mint, expired after retention)
+        await database.holder_snapshots.create_index([("mint_address", 1), ("taken_at", -1)])
+        await database.holder_snapshots.create_index("taken_at", expireAfterSeconds=settings.HOLDER_SNAPSHOT_RETENTION)
+        
+        # Candles collection indexes (bucketed OHLCV per resolution)
+        await database.candles.create_index([("mint_address", 1), ("resolution", 1), ("bucket", -1)], unique=True)
+        await database.candles.create_index("expire_at", expireAfterSeconds=0)
+        
+        # Per-minute analytics buckets only need to outlive the 24h window
+        await database.analytics_minutes.create_index("minute", expireAfterSeconds=2 * 24 * 3600)
         
         # Images collection indexes
         await database.images.create_index("uri", unique=True)
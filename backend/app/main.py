@@ -5,8 +5,22 @@ import uvicorn
 import os
 from dotenv import load_dotenv
 
-from app.routers import images, tokens, blockchain
-from app.database import init_db
+from app.routers import images, tokens, blockchain, stream, wallets
+from app.database import init_db, close_db, get_database
+from app.services.solana_rpc import init_rpc_client, close_rpc_client, get_rpc_client
+from app.services.indexer import start_indexer, stop_indexer
+from app.services.events import init_event_bus, close_event_bus
+from app.services.cache import init_cache, close_cache
+from app.services.search import backfill_search_fields
+from app.services.trading_pairs import start_trading_pair_sync, stop_trading_pair_sync
+from app.services.analytics import start_materializer, stop_materializer
+from app.services.graduation import start_graduation_monitor, stop_graduation_monitor
+from app.services.ranking import start_rankings, stop_rankings
+from app.services.holder_distribution import start_holder_snapshots, stop_holder_snapshots
+from app.services.write_behind import start_write_buffer, stop_write_buffer
+from app.services.image_pipeline import start_image_pipeline, stop_image_pipeline
+from app.services.storage import init_storage, close_storage
+from app.services.uploads import UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
 from app.config import settings
 
 # Load environment variables
@@ -27,19 +41,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for image serving
-os.makedirs("static/images", exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Cap upload bodies before multipart parsing buffers them
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path_prefixes=("/api/v1/images/upload",),
+    max_body_size=settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+)
+
+# Image files are served from disk only with the filesystem backend; other
+# backends resolve /static/images through the storage layer
+if settings.STORAGE_BACKEND == "filesystem":
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    app.mount("/static/images", StaticFiles(directory=settings.UPLOAD_DIR), name="static")
+else:
+    app.include_router(images.static_router, prefix="/static/images", tags=["images"])
 
 # Include routers
 app.include_router(images.router, prefix="/api/v1/images", tags=["images"])
 app.include_router(tokens.router, prefix="/api/v1/tokens", tags=["tokens"])
 app.include_router(blockchain.router, prefix="/api/v1/blockchain", tags=["blockchain"])
+app.include_router(stream.router, prefix="/api/v1/stream", tags=["stream"])
+app.include_router(wallets.router, prefix="/api/v1/wallets", tags=["wallets"])
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connections and indexes on startup."""
     await init_db()
+    await backfill_search_fields(await get_database())
+    await start_trading_pair_sync(await get_database())
+    await init_rpc_client()
+    await init_event_bus()
+    await init_cache()
+    await start_indexer(await get_database(), await get_rpc_client())
+    await start_materializer(await get_database())
+    await start_graduation_monitor(await get_database())
+    await start_write_buffer(await get_database())
+    await start_rankings(await get_database())
+    await start_holder_snapshots(await get_database(), await get_rpc_client())
+    await init_storage()
+    await start_image_pipeline()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and release pooled connections on shutdown."""
+    await stop_indexer()
+    await stop_materializer()
+    await stop_write_buffer()
+    await stop_rankings()
+    await stop_holder_snapshots()
+    await stop_graduation_monitor()
+    await stop_image_pipeline()
+    await close_storage()
+    await close_event_bus()
+    await close_cache()
+    await stop_trading_pair_sync()
+    await close_rpc_client()
+    await close_db()
 
 @app.get("/api/v1/health")
 async def health_check():
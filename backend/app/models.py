@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -18,6 +18,39 @@ class PairType(str, Enum):
     BONDING_CURVE = "bonding_curve"
     RAYDIUM_POOL = "raydium_pool"
 
+class QuoteSide(str, Enum):
+    BUY = "buy"
+    SELL = "sell"
+
+class CandleResolution(str, Enum):
+    ONE_SECOND = "1s"
+    ONE_MINUTE = "1m"
+    FIVE_MINUTES = "5m"
+    ONE_HOUR = "1h"
+    ONE_DAY = "1d"
+
+class BulkItemStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+    FAILED = "failed"
+
+class ImageVariantName(str, Enum):
+    THUMBNAIL = "thumbnail"
+    MEDIUM = "medium"
+    FULL = "full"
+    ORIGINAL = "original"
+
+class RankingBoard(str, Enum):
+    TRENDING = "trending"
+    GAINERS = "gainers"
+    GRADUATING = "graduating"
+
+class RankingWindow(str, Enum):
+    FIVE_MINUTES = "5m"
+    ONE_HOUR = "1h"
+    ONE_DAY = "24h"
+
 class GraduationStatusEnum(str, Enum):
     SUCCESSFUL = "successful"
     FAILED = "failed"
@@ -33,6 +66,28 @@ class TokenCreateRequest(BaseModel):
     creator_wallet: str = Field(..., description="Creator wallet address")
     initial_purchase_amount: Optional[int] = Field(None, description="Optional SOL amount for initial purchase (in lamports)")
 
+class BulkTokenCreateRequest(BaseModel):
+    tokens: List[dict] = Field(..., min_length=1, description="Token payloads, each shaped like TokenCreateRequest")
+
+class BulkTokenResult(BaseModel):
+    index: int
+    mint_address: Optional[str] = None
+    status: BulkItemStatus
+    error: Optional[str] = None
+
+class BulkTokenCreateResponse(BaseModel):
+    created_count: int
+    duplicate_count: int
+    invalid_count: int
+    failed_count: int
+    results: List[BulkTokenResult]
+
+class BondingCurveState(BaseModel):
+    base_price: Optional[float] = None
+    current_sold: Optional[int] = None
+    available_supply: Optional[int] = None
+    price_formula: Optional[str] = None
+
 class TokenResponse(BaseModel):
     id: Optional[str] = Field(None, alias="_id")
     mint_address: str
@@ -48,6 +103,9 @@ class TokenResponse(BaseModel):
     bonding_curve_supply: int = 800_000_000_000_000_000  # 80%
     burning_reserve: int = 200_000_000_000_000_000  # 20%
     
+    # Live bonding curve state, present when EMBED_BONDING_CURVE is on
+    bonding_curve: Optional[BondingCurveState] = None
+    
     # Trading Data
     current_price: Optional[float] = None
     market_cap: Optional[float] = None
@@ -91,10 +149,17 @@ class TokenUpdateRequest(BaseModel):
 
 class TokenListResponse(BaseModel):
     tokens: List[TokenResponse]
-    total_count: int
+    total_count: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class TokenRankingResponse(BaseModel):
+    board: RankingBoard
+    window: Optional[RankingWindow] = None
+    tokens: List[TokenResponse]
+    scores: List[float]  # Parallel to tokens, highest first
 
 # Trading Pair Models
 class TradingPairResponse(BaseModel):
@@ -119,6 +184,38 @@ class TradingPairResponse(BaseModel):
     class Config:
         populate_by_name = True
 
+# Quote Models
+class QuoteResponse(BaseModel):
+    mint_address: str
+    side: QuoteSide
+    current_sold: int
+    amount_in: int = Field(..., description="Lamports for buys, raw token units for sells")
+    amount_out: int = Field(..., description="Raw token units for buys, lamports for sells")
+    price_per_token: float
+    spot_price_before: float
+    spot_price_after: float
+    price_impact: Optional[float] = None
+    sold_after: int
+
+class BatchQuoteItem(BaseModel):
+    mint_address: str
+    side: QuoteSide
+    amounts: List[int] = Field(..., min_length=1, max_length=1000, description="Lamports for buys, raw token units for sells")
+
+class BatchQuoteRequest(BaseModel):
+    items: List[BatchQuoteItem] = Field(..., min_length=1, max_length=500)
+    exact: bool = Field(False, description="Use exact integer math instead of vectorized float64")
+
+class BatchQuoteError(BaseModel):
+    mint_address: str
+    side: QuoteSide
+    amount: Optional[int] = None
+    error: str
+
+class BatchQuoteResponse(BaseModel):
+    quotes: List[QuoteResponse]
+    errors: List[BatchQuoteError] = []
+
 # Graduation Models
 class GraduationResponse(BaseModel):
     id: Optional[str] = Field(None, alias="_id")
@@ -156,25 +253,115 @@ class TransactionResponse(BaseModel):
     class Config:
         populate_by_name = True
 
+# Wallet Portfolio Models
+class PortfolioPosition(BaseModel):
+    mint_address: str
+    name: Optional[str] = None
+    symbol: Optional[str] = None
+    image_uri: Optional[str] = None
+    
+    # Holding
+    balance: int = Field(..., description="Base units")
+    balance_tokens: float
+    current_price: Optional[float] = None
+    value_sol: Optional[float] = None
+    value_usd: Optional[float] = None
+    
+    # Average-cost basis, None for holdings without recorded cost
+    average_cost: Optional[float] = Field(None, description="SOL per whole token")
+    cost_basis_sol: Optional[float] = None
+    unrealized_pnl_sol: Optional[float] = None
+    realized_pnl_sol: Optional[float] = None
+    
+    last_trade_at: Optional[datetime] = None
+
+class WalletPortfolioResponse(BaseModel):
+    wallet: str
+    positions: List[PortfolioPosition]
+    created_tokens: List[str] = Field(default_factory=list, description="Mints launched by this wallet")
+    total_value_sol: float
+    total_value_usd: float
+    total_cost_basis_sol: Optional[float] = None
+    unrealized_pnl_sol: Optional[float] = None
+    realized_pnl_sol: Optional[float] = None
+    truncated: bool = Field(False, description="More positions exist than PORTFOLIO_MAX_POSITIONS")
+
+# Holder Distribution Models
+class HolderDistributionResponse(BaseModel):
+    mint_address: str
+    taken_at: datetime
+    source: str
+    complete: bool = Field(..., description="False when only the largest accounts were seen")
+    holder_count: int
+    circulating: int = Field(..., description="Base units held, excluding platform wallets")
+    top10_share: Optional[float] = None
+    gini: Optional[float] = None
+    percentiles: Dict[str, float] = Field(default_factory=dict, description="Holder balance percentiles in base units")
+    share_buckets: List[int] = Field(
+        ..., description="Holders owning <0.01%, 0.01-0.1%, 0.1-1%, 1-10% and >=10% of circulating supply"
+    )
+
+# Candle Models
+class CandleResponse(BaseModel):
+    time: int = Field(..., description="Candle start (unix seconds)")
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    trades: int
+
+class CandleListResponse(BaseModel):
+    mint_address: str
+    resolution: CandleResolution
+    candles: List[CandleResponse]
+
 # Image Models
+class ImageVariant(BaseModel):
+    filename: str
+    url: str
+    width: int
+    height: int
+    size: int
+
 class ImageUploadResponse(BaseModel):
     uri: str
     filename: str
     size: int
     content_type: str
     url: str
+    variants: Dict[str, ImageVariant] = {}
     created_at: datetime
 
 # Blockchain Verification Models
 class BlockchainVerificationResponse(BaseModel):
     mint_address: str
-    exists: bool
+    exists: Optional[bool]  # None when the lookup failed
     verified: bool
     owner: Optional[str] = None
     supply: Optional[int] = None
     decimals: Optional[int] = None
     freeze_authority: Optional[str] = None
     mint_authority: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkVerificationRequest(BaseModel):
+    mint_addresses: List[str] = Field(..., min_length=1, description="Token mint addresses to verify")
+
+class BulkVerificationResponse(BaseModel):
+    results: List[BlockchainVerificationResponse]
+    verified_count: int
+    missing_count: int
+    failed_count: int = 0
+
+class BulkSyncResponse(BaseModel):
+    message: str
+    requested_count: int
+    verified_count: int
+    matched_count: int
+    modified_count: int
+    not_on_chain: List[str]
+    failed: List[str] = []
 
 class TransactionVerificationResponse(BaseModel):
     signature: str
@@ -1,96 +1,161 @@
 from fastapi import APIRouter, HTTPException
-from typing import Optional, Dict, Any
-import httpx
+from typing import Optional, Dict, Any, List
 from datetime import datetime
+import logging
+from pymongo import UpdateOne
 
 from app.models import (
     BlockchainVerificationResponse, 
     TransactionVerificationResponse,
-    PlatformAnalytics
+    PlatformAnalytics,
+    BulkVerificationRequest,
+    BulkVerificationResponse,
+    BulkSyncResponse
 )
 from app.database import get_database
 from app.config import settings
+from app.services import analytics
+from app.services.solana_rpc import get_rpc_client, SolanaRPCError
+from app.services.cache import cached, invalidate_token, invalidate_tokens, ANALYTICS_NAMESPACE
 
 router = APIRouter()
 
+def parse_mint_account(mint_address: str, account: Optional[Dict[str, Any]]) -> BlockchainVerificationResponse:
+    """Build a verification result from a jsonParsed mint account value."""
+    if account is None:
+        return BlockchainVerificationResponse(
+            mint_address=mint_address,
+            exists=False,
+            verified=False
+        )
+    
+    data = account.get("data")
+    if not isinstance(data, dict) or data.get("parsed", {}).get("type") != "mint":
+        # Account exists but is not an SPL token mint
+        return BlockchainVerificationResponse(
+            mint_address=mint_address,
+            exists=True,
+            verified=False
+        )
+    
+    # Parse account data
+    account_data = data["parsed"]["info"]
+    
+    return BlockchainVerificationResponse(
+        mint_address=mint_address,
+        exists=True,
+        verified=True,
+        owner=account_data.get("mintAuthority"),
+        supply=int(account_data.get("supply", 0)),
+        decimals=account_data.get("decimals", 0),
+        freeze_authority=account_data.get("freezeAuthority"),
+        mint_authority=account_data.get("mintAuthority")
+    )
+
+def build_sync_update(verification: BlockchainVerificationResponse, verified_at: datetime) -> Dict[str, Any]:
+    """Build the token $set document for a verified mint."""
+    update_doc = {
+        "contract_verified": True,
+        "last_verified": verified_at,
+    }
+    
+    if verification.supply:
+        update_doc["verified_supply"] = verification.supply
+    if verification.decimals:
+        update_doc["verified_decimals"] = verification.decimals
+    if verification.owner:
+        update_doc["verified_owner"] = verification.owner
+    
+    return update_doc
+
+async def verify_tokens_in_bulk(mint_addresses: List[str]) -> List[BlockchainVerificationResponse]:
+    """
+    Verify many mints with chunked, concurrent getMultipleAccounts calls.
+    A chunk that keeps failing marks its addresses with an error rather
+    than failing the others.
+    """
+    # Deduplicate while keeping request order
+    mint_addresses = list(dict.fromkeys(mint_addresses))
+    if len(mint_addresses) > settings.BULK_VERIFY_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many addresses. Maximum: {settings.BULK_VERIFY_MAX_ADDRESSES}"
+        )
+    
+    rpc = await get_rpc_client()
+    accounts = await rpc.get_multiple_accounts(
+        mint_addresses,
+        chunk_size=settings.BULK_VERIFY_CHUNK_SIZE,
+        max_concurrency=settings.BULK_VERIFY_CONCURRENCY,
+        retries=settings.BULK_VERIFY_RETRIES,
+        return_exceptions=True,
+    )
+    results = []
+    for address, account in zip(mint_addresses, accounts):
+        if isinstance(account, Exception):
+            results.append(BlockchainVerificationResponse(mint_address=address, exists=None, verified=False, error=str(account)))
+        else:
+            results.append(parse_mint_account(address, account))
+    return results
+
 @router.get("/verify/token/{mint_address}")
 async def verify_token_on_chain(mint_address: str):
     """Verify token exists on Solana blockchain."""
     try:
         # Make RPC call to Solana to verify token
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getAccountInfo",
-                "params": [
-                    mint_address,
-                    {"encoding": "jsonParsed"}
-                ]
-            }
-            
-            response = await client.post(settings.SOLANA_RPC_URL, json=payload)
-            result = response.json()
-            
-            if result.get("result", {}).get("value") is None:
-                return BlockchainVerificationResponse(
-                    mint_address=mint_address,
-                    exists=False,
-                    verified=False
-                )
-            
-            # Parse account data
-            account_data = result["result"]["value"]["data"]["parsed"]["info"]
-            
-            return BlockchainVerificationResponse(
-                mint_address=mint_address,
-                exists=True,
-                verified=True,
-                owner=account_data.get("mintAuthority"),
-                supply=int(account_data.get("supply", 0)),
-                decimals=account_data.get("decimals", 0),
-                freeze_authority=account_data.get("freezeAuthority"),
-                mint_authority=account_data.get("mintAuthority")
-            )
+        rpc = await get_rpc_client()
+        result = await rpc.call("getAccountInfo", [mint_address, {"encoding": "jsonParsed"}])
+        
+        return parse_mint_account(mint_address, result.get("value") if result else None)
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to verify token: {str(e)}")
 
+@router.post("/verify/tokens", response_model=BulkVerificationResponse)
+async def verify_tokens_on_chain(request: BulkVerificationRequest):
+    """Verify many tokens on Solana blockchain in batched RPC calls."""
+    try:
+        results = await verify_tokens_in_bulk(request.mint_addresses)
+        verified_count = sum(1 for result in results if result.verified)
+        failed_count = sum(1 for result in results if result.error)
+        
+        return BulkVerificationResponse(
+            results=results,
+            verified_count=verified_count,
+            missing_count=len(results) - verified_count - failed_count,
+            failed_count=failed_count
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to verify tokens: {str(e)}")
+
 @router.get("/verify/transaction/{signature}")
 async def verify_transaction(signature: str):
     """Verify transaction exists on Solana blockchain."""
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getTransaction",
-                "params": [
-                    signature,
-                    {"encoding": "json", "maxSupportedTransactionVersion": 0}
-                ]
-            }
-            
-            response = await client.post(settings.SOLANA_RPC_URL, json=payload)
-            result = response.json()
-            
-            if result.get("result") is None:
-                return TransactionVerificationResponse(
-                    signature=signature,
-                    confirmed=False,
-                    status="not_found"
-                )
-            
-            tx_data = result["result"]
-            
+        rpc = await get_rpc_client()
+        tx_data = await rpc.call(
+            "getTransaction",
+            [signature, {"encoding": "json", "maxSupportedTransactionVersion": 0}]
+        )
+        
+        if tx_data is None:
             return TransactionVerificationResponse(
                 signature=signature,
-                confirmed=True,
-                slot=tx_data.get("slot"),
-                block_time=datetime.fromtimestamp(tx_data.get("blockTime", 0)) if tx_data.get("blockTime") else None,
-                status="confirmed" if tx_data.get("meta", {}).get("err") is None else "failed",
-                fee=tx_data.get("meta", {}).get("fee")
+                confirmed=False,
+                status="not_found"
             )
+        
+        return TransactionVerificationResponse(
+            signature=signature,
+            confirmed=True,
+            slot=tx_data.get("slot"),
+            block_time=datetime.fromtimestamp(tx_data.get("blockTime", 0)) if tx_data.get("blockTime") else None,
+            status="confirmed" if tx_data.get("meta", {}).get("err") is None else "failed",
+            fee=tx_data.get("meta", {}).get("fee")
+        )
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to verify transaction: {str(e)}")
@@ -99,87 +164,47 @@ async def verify_transaction(signature: str):
 async def get_network_info():
     """Get Solana network information."""
     try:
-        async with httpx.AsyncClient() as client:
-            # Get slot
-            slot_payload = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getSlot"
-            }
-            
-            # Get epoch info
-            epoch_payload = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "getEpochInfo"
-            }
-            
-            slot_response = await client.post(settings.SOLANA_RPC_URL, json=slot_payload)
-            epoch_response = await client.post(settings.SOLANA_RPC_URL, json=epoch_payload)
-            
-            slot_result = slot_response.json()
-            epoch_result = epoch_response.json()
-            
-            return {
-                "network": "devnet" if "devnet" in settings.SOLANA_RPC_URL else "mainnet",
-                "current_slot": slot_result.get("result"),
-                "epoch_info": epoch_result.get("result"),
-                "rpc_url": settings.SOLANA_RPC_URL,
-                "timestamp": datetime.utcnow()
-            }
+        # Get slot and epoch info in a single batched POST; epoch info is
+        # best-effort, so only a failed getSlot fails the request
+        rpc = await get_rpc_client()
+        current_slot, epoch_info = await rpc.batch([
+            ("getSlot", None),
+            ("getEpochInfo", None),
+        ], return_exceptions=True)
+        if isinstance(current_slot, SolanaRPCError):
+            raise current_slot
+        if isinstance(epoch_info, SolanaRPCError):
+            logging.warning(f"getEpochInfo failed: {epoch_info}")
+            epoch_info = None
+        
+        return {
+            "network": "devnet" if "devnet" in settings.SOLANA_RPC_URL else "mainnet",
+            "current_slot": current_slot,
+            "epoch_info": epoch_info,
+            "rpc_url": settings.SOLANA_RPC_URL,
+            "timestamp": datetime.utcnow()
+        }
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get network info: {str(e)}")
 
 @router.get("/analytics/platform")
+@cached(ANALYTICS_NAMESPACE, ttl=lambda: settings.CACHE_ANALYTICS_TTL)
 async def get_platform_analytics():
     """Get platform-wide analytics and statistics."""
     try:
         db = await get_database()
         
-        # Get basic statistics
-        total_tokens = await db.tokens.count_documents({"is_active": True})
-        graduated_tokens = await db.tokens.count_documents({"graduation_status": "graduated"})
-        
-        # Get total volume (sum of all token volumes)
-        volume_pipeline = [
-            {"$match": {"is_active": True}},
-            {"$group": {"_id": None, "total_volume": {"$sum": "$total_volume"}}}
-        ]
-        volume_result = await db.tokens.aggregate(volume_pipeline).to_list(1)
-        total_volume = volume_result[0]["total_volume"] if volume_result else 0.0
-        
-        # Get active traders (unique wallets in last 24 hours)
-        from datetime import timedelta
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        
-        active_traders_pipeline = [
-            {"$match": {"timestamp": {"$gte": yesterday}}},
-            {"$group": {"_id": "$user_wallet"}},
-            {"$count": "active_traders"}
-        ]
-        traders_result = await db.transactions.aggregate(active_traders_pipeline).to_list(1)
-        active_traders = traders_result[0]["active_traders"] if traders_result else 0
-        
-        # Get daily transactions
-        daily_transactions = await db.transactions.count_documents({
-            "timestamp": {"$gte": yesterday}
-        })
-        
-        # Platform revenue (graduation fees)
-        revenue_pipeline = [
-            {"$group": {"_id": None, "total_revenue": {"$sum": "$graduation_fee_collected"}}}
-        ]
-        revenue_result = await db.graduations.aggregate(revenue_pipeline).to_list(1)
-        platform_revenue = revenue_result[0]["total_revenue"] if revenue_result else 0.0
+        # Single read of the figures maintained by app.services.analytics
+        stats = await analytics.get_platform_stats(db)
         
         return PlatformAnalytics(
-            total_tokens_created=total_tokens,
-            active_traders=active_traders,
-            graduated_tokens=graduated_tokens,
-            total_trading_volume=total_volume,
-            daily_transactions=daily_transactions,
-            platform_revenue=platform_revenue
+            total_tokens_created=stats.get("total_tokens_created", 0),
+            active_traders=stats.get("active_traders", 0),
+            graduated_tokens=stats.get("graduated_tokens", 0),
+            total_trading_volume=stats.get("total_trading_volume", 0.0),
+            daily_transactions=stats.get("daily_transactions", 0),
+            platform_revenue=stats.get("platform_revenue", 0.0)
         )
         
     except Exception as e:
@@ -197,18 +222,7 @@ async def sync_token_from_blockchain(mint_address: str):
         
         # Update database with verified data
         db = await get_database()
-        
-        update_doc = {
-            "contract_verified": True,
-            "last_verified": datetime.utcnow(),
-        }
-        
-        if verification.supply:
-            update_doc["verified_supply"] = verification.supply
-        if verification.decimals:
-            update_doc["verified_decimals"] = verification.decimals
-        if verification.owner:
-            update_doc["verified_owner"] = verification.owner
+        update_doc = build_sync_update(verification, datetime.utcnow())
         
         result = await db.tokens.update_one(
             {"mint_address": mint_address},
@@ -217,6 +231,7 @@ async def sync_token_from_blockchain(mint_address: str):
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Token not found in database")
+        await invalidate_token(mint_address)
         
         return {
             "message": "Token synced successfully",
@@ -230,6 +245,46 @@ async def sync_token_from_blockchain(mint_address: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to sync token: {str(e)}")
 
+@router.post("/sync/tokens", response_model=BulkSyncResponse)
+async def sync_tokens_from_blockchain(request: BulkVerificationRequest):
+    """Sync many tokens from blockchain to database with a single bulk write."""
+    try:
+        results = await verify_tokens_in_bulk(request.mint_addresses)
+        verified = [result for result in results if result.verified]
+        
+        matched_count = 0
+        modified_count = 0
+        if verified:
+            db = await get_database()
+            verified_at = datetime.utcnow()
+            operations = [
+                UpdateOne(
+                    {"mint_address": result.mint_address},
+                    {"$set": build_sync_update(result, verified_at)}
+                )
+                for result in verified
+            ]
+            write_result = await db.tokens.bulk_write(operations, ordered=False)
+            matched_count = write_result.matched_count
+            modified_count = write_result.modified_count
+            
+            await invalidate_tokens(result.mint_address for result in verified)
+        
+        return BulkSyncResponse(
+            message="Tokens synced successfully",
+            requested_count=len(results),
+            verified_count=len(verified),
+            matched_count=matched_count,
+            modified_count=modified_count,
+            not_on_chain=[result.mint_address for result in results if not result.verified and not result.error],
+            failed=[result.mint_address for result in results if result.error]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to sync tokens: {str(e)}")
+
 @router.get("/explorer/{address}")
 async def get_explorer_links(address: str):
     """Get explorer links for an address."""
@@ -1,112 +1,118 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
-from fastapi.responses import FileResponse
-import os
-import uuid
-import aiofiles
-import io
-from PIL import Image
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query, Header
+from fastapi.responses import RedirectResponse, StreamingResponse
+import asyncio
 from datetime import datetime
+from typing import Optional
 import hashlib
+from pymongo.errors import DuplicateKeyError
 
-from app.models import ImageUploadResponse
+from app.models import ImageUploadResponse, ImageVariantName
 from app.database import get_database
 from app.config import settings
+from app.services.image_pipeline import (
+    image_pipeline,
+    output_formats,
+    ImageProcessingError,
+    ImagePipelineBusyError,
+)
+from app.services.uploads import (
+    spool_upload,
+    discard_upload,
+    UploadTooLargeError,
+    UnsupportedImageTypeError,
+)
+from app.services.image_serving import image_metadata, negotiate, image_response
+from app.services.storage import get_storage, guess_content_type, immutable_cache_control
 
 router = APIRouter()
+# Serves /static/images when the storage backend has no local directory to mount
+static_router = APIRouter()
 
 @router.post("/upload", response_model=ImageUploadResponse)
 async def upload_image(file: UploadFile = File(...)):
     """Upload image and generate URI for token creation."""
     try:
-        # Validate file type
-        if file.content_type not in settings.ALLOWED_IMAGE_TYPES:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid file type. Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
-            )
-        
-        # Read file content
-        content = await file.read()
-        
-        # Validate file size
-        if len(content) > settings.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / 1024 / 1024}MB"
-            )
-        
-        # Generate unique filename
-        file_hash = hashlib.md5(content).hexdigest()
-        file_extension = file.filename.split('.')[-1].lower()
-        unique_filename = f"{file_hash}.{file_extension}"
-        
-        # Create upload directory if it doesn't exist
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
+        # Stream to a temp file, hashing and enforcing the size cap chunk by chunk
+        try:
+            spool_path, file_hash, original_type, original_size = await spool_upload(file, settings.MAX_FILE_SIZE)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except UnsupportedImageTypeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Check if file already exists
-        if os.path.exists(file_path):
-            # File already exists, return existing URI
+        try:
+            # Content address: identical uploads map to one URI before any decoding
+            uri = f"img_{file_hash}"
+            
             db = await get_database()
-            existing_image = await db.images.find_one({"filename": unique_filename})
+            existing_image = await db.images.find_one({"uri": uri})
             if existing_image:
-                existing_image["_id"] = str(existing_image["_id"])
                 return ImageUploadResponse(**existing_image)
-        
-        # Process and save image
-        try:
-            # Open and process image with PIL
-            image = Image.open(io.BytesIO(content))
             
-            # Convert to RGB if necessary
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
+            # Decode once and encode every variant in the worker pool
+            try:
+                rendered = await image_pipeline.render(spool_path)
+            except ImagePipelineBusyError:
+                raise HTTPException(status_code=503, detail="Image processing is busy, please retry shortly")
+            except ImageProcessingError as e:
+                raise HTTPException(status_code=400, detail=str(e))
             
-            # Resize if too large (max 1024x1024)
-            max_size = (1024, 1024)
-            if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-                image.thumbnail(max_size, Image.Resampling.LANCZOS)
+            storage = await get_storage()
             
-            # Save optimized image
-            image.save(file_path, optimize=True, quality=85)
+            # Keep the original upload for clients that accept neither output format
+            original_key = f"{file_hash}_original.{original_type.split('/')[-1]}"
+            await storage.put_file(original_key, spool_path, original_type)
+        finally:
+            await discard_upload(spool_path)
+        
+        formats = output_formats()
+        variants = {}
+        files = {ImageVariantName.ORIGINAL.value: [
+            {"key": original_key, "content_type": original_type, "size": original_size}
+        ]}
+        writes = []
+        for name, variant in rendered.items():
+            files[name] = []
+            for pil_format, content_type, extension in formats:
+                key = f"{file_hash}_{name}.{extension}"
+                data = variant["data"][pil_format]
+                files[name].append({"key": key, "content_type": content_type, "size": len(data)})
+                writes.append(storage.put(key, data, content_type))
             
-        except Exception as e:
-            # If PIL processing fails, save original file
-            async with aiofiles.open(file_path, 'wb') as f:
-                await f.write(content)
-        
-        # Generate URI and URL
-        uri = f"img_{file_hash}"
-        file_url = f"{settings.API_BASE_URL}/static/images/{unique_filename}"
-        
-        # Get file stats
-        file_stats = os.stat(file_path)
-        
-        # Store image metadata in database
-        db = await get_database()
+            # Response variants describe the preferred format
+            preferred = files[name][0]
+            variants[name] = {
+                "filename": preferred["key"],
+                "url": storage.public_url(preferred["key"]),
+                "width": variant["width"],
+                "height": variant["height"],
+                "size": preferred["size"],
+            }
+        # Transfers are bounded by the backend's own concurrency limit
+        await asyncio.gather(*writes)
+        
+        # Store image metadata in database; top-level fields describe the full variant
+        full = variants["full"]
         image_doc = {
             "uri": uri,
-            "filename": unique_filename,
+            "filename": full["filename"],
             "original_filename": file.filename,
-            "size": file_stats.st_size,
-            "content_type": file.content_type,
-            "url": file_url,
-            "file_path": file_path,
+            "size": full["size"],
+            "content_type": formats[0][1],
+            "url": full["url"],
             "hash": file_hash,
+            "variants": variants,
+            "files": files,
             "created_at": datetime.utcnow(),
         }
         
-        result = await db.images.insert_one(image_doc)
-        image_doc["_id"] = str(result.inserted_id)
+        try:
+            await db.images.insert_one(image_doc)
+        except DuplicateKeyError:
+            # A concurrent upload of the same bytes won the insert
+            image_doc = await db.images.find_one({"uri": uri})
         
-        return ImageUploadResponse(
-            uri=uri,
-            filename=unique_filename,
-            size=file_stats.st_size,
-            content_type=file.content_type,
-            url=file_url,
-            created_at=image_doc["created_at"]
-        )
+        return ImageUploadResponse(**image_doc)
         
     except HTTPException:
         raise
@@ -114,30 +120,57 @@ async def upload_image(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
 @router.get("/{uri}")
-async def get_image(uri: str):
+async def get_image(
+    uri: str,
+    variant: ImageVariantName = Query(ImageVariantName.FULL, description="Size variant to serve"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="range"),
+    if_range: Optional[str] = Header(None),
+):
     """Retrieve image by URI."""
     try:
-        db = await get_database()
-        
-        # Find image by URI
-        image_doc = await db.images.find_one({"uri": uri})
-        if not image_doc:
+        # Metadata comes from the per-worker cache; the database is only hit on a miss
+        meta = await image_metadata.get(await get_database(), uri)
+        if not meta:
             raise HTTPException(status_code=404, detail="Image not found")
         
-        file_path = image_doc["file_path"]
+        image_file = negotiate(meta, variant.value, accept)
+        if not image_file:
+            raise HTTPException(status_code=404, detail="Image file not found")
         
-        # Check if file exists
-        if not os.path.exists(file_path):
+        return await image_response(image_file, if_none_match=if_none_match, range_header=range_header, if_range=if_range)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve image: {str(e)}")
+
+@static_router.get("/{key}")
+async def get_stored_file(key: str):
+    """Redirect to or stream a stored image file by key."""
+    try:
+        storage = await get_storage()
+        
+        size = await storage.size(key)
+        if size is None:
             raise HTTPException(status_code=404, detail="Image file not found")
         
-        # Return file
-        return FileResponse(
-            path=file_path,
-            media_type=image_doc["content_type"],
-            filename=image_doc["original_filename"]
+        direct_url = await storage.presigned_url(key)
+        if direct_url:
+            return RedirectResponse(
+                direct_url,
+                status_code=307,
+                headers={"Cache-Control": f"private, max-age={settings.S3_PRESIGN_TTL // 2}"}
+            )
+        
+        return StreamingResponse(
+            storage.stream(key, 0, size - 1),
+            media_type=guess_content_type(key),
+            headers={"Cache-Control": immutable_cache_control(), "Content-Length": str(size)}
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve image: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve image: {str(e)}")
@@ -0,0 +1,112 @@
+from fastapi import APIRouter, HTTPException, Query, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List
+import asyncio
+import json
+
+from app.config import settings
+from app.services.events import event_bus, is_valid_channel, SubscriberLimitError
+
+router = APIRouter()
+
+def parse_channels(channels: str) -> List[str]:
+    """Split a comma-separated channel list and reject unknown channels."""
+    requested = [channel.strip() for channel in channels.split(",") if channel.strip()]
+    invalid = [channel for channel in requested if not is_valid_channel(channel)]
+    if invalid:
+        raise ValueError(f"Invalid channels: {', '.join(invalid)}")
+    return requested
+
+@router.websocket("/ws")
+async def websocket_feed(websocket: WebSocket, channels: str = ""):
+    """
+    Live event feed over WebSocket.
+    Subscribe with ?channels=a,b or by sending
+    {"action": "subscribe" | "unsubscribe", "channels": [...]}.
+    """
+    try:
+        initial_channels = parse_channels(channels)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    try:
+        subscriber = event_bus.subscribe(initial_channels)
+    except SubscriberLimitError as e:
+        await websocket.close(code=1013, reason=str(e))
+        return
+
+    await websocket.accept()
+
+    async def send_events():
+        while True:
+            message = await subscriber.get()
+            if message is None:
+                await websocket.close(code=1008, reason="Slow consumer")
+                return
+            await websocket.send_text(message)
+
+    async def receive_commands():
+        while True:
+            try:
+                command = json.loads(await websocket.receive_text())
+                requested = parse_channels(",".join(command.get("channels", [])))
+            except (ValueError, AttributeError, TypeError) as e:
+                await websocket.send_json({"error": str(e) or "Invalid command"})
+                continue
+
+            if command.get("action") == "subscribe":
+                event_bus.add_channels(subscriber, requested)
+            elif command.get("action") == "unsubscribe":
+                event_bus.remove_channels(subscriber, requested)
+            await websocket.send_json({"subscribed": sorted(subscriber.channels)})
+
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_commands())]
+    try:
+        # Either side finishing (disconnect, slow consumer) ends the session
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        event_bus.unsubscribe(subscriber)
+
+@router.get("/sse")
+async def sse_feed(channels: str = Query(..., description="Comma-separated channels")):
+    """Live event feed over Server-Sent Events."""
+    try:
+        requested = parse_channels(channels)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not requested:
+        raise HTTPException(status_code=400, detail="At least one channel is required")
+
+    try:
+        subscriber = event_bus.subscribe(requested)
+    except SubscriberLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def event_stream():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.get(), timeout=settings.EVENTS_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is None:
+                    yield "event: dropped\ndata: {\"reason\": \"slow consumer\"}\n\n"
+                    return
+                yield f"data: {message}\n\n"
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # The generator's finally never runs if the client leaves before the first chunk
+        background=BackgroundTask(event_bus.unsubscribe, subscriber),
+    )
@@ -1,17 +1,45 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 import math
+import numpy as np
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from app.models import (
     TokenCreateRequest, TokenResponse, TokenUpdateRequest, 
-    TokenListResponse, GraduationStatus, ErrorResponse
+    TokenListResponse, GraduationStatus, ErrorResponse,
+    QuoteSide, QuoteResponse, BatchQuoteRequest, BatchQuoteResponse, BatchQuoteError,
+    CandleResolution, CandleResponse, CandleListResponse,
+    BulkTokenCreateRequest, BulkTokenCreateResponse, BulkItemStatus,
+    RankingBoard, RankingWindow, TokenRankingResponse, HolderDistributionResponse
 )
 from app.database import get_database
 from app.config import settings
+from app.services import (
+    analytics, bonding_curve, candles, concurrency, events, fieldsets, graduation, pagination, ranking, search,
+    token_registry, trading_pairs, write_behind
+)
+from app.services.cache import (
+    cached, cache, invalidate_token, TOKEN_NAMESPACE, TOKEN_LIST_NAMESPACE, ANALYTICS_NAMESPACE, RANKING_NAMESPACE
+)
 
 router = APIRouter()
 
+# Sort fields with an index that keyset (cursor) pagination can seek on
+KEYSET_SORT_FIELDS = {"created_at", "market_cap"}
+
+# Read from update_token's refetch whatever fields the caller selected
+PRICE_EVENT_PROJECTION = {
+    "mint_address": 1, "current_price": 1, "market_cap": 1, "total_volume": 1, "graduation_status": 1,
+}
+
+def resolve_fieldset(fields: Optional[str]) -> fieldsets.TokenFieldset:
+    try:
+        return fieldsets.resolve_fieldset(fields)
+    except fieldsets.InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/create", response_model=TokenResponse)
 async def create_token(token_data: TokenCreateRequest):
     """
@@ -21,100 +49,71 @@ async def create_token(token_data: TokenCreateRequest):
     try:
         db = await get_database()
         
-        # Check if token already exists
-        existing_token = await db.tokens.find_one({"mint_address": token_data.mint_address})
-        if existing_token:
+        # The unique mint_address index rejects duplicates atomically
+        try:
+            token_doc = await token_registry.insert_token(db, token_data)
+        except DuplicateKeyError:
             raise HTTPException(status_code=400, detail="Token already exists")
+        token_doc["_id"] = str(token_doc["_id"])
+        await analytics.record_token_created(db)
         
-        # Generate explorer URLs
-        solana_explorer_url = f"https://explorer.solana.com/address/{token_data.mint_address}"
-        solscan_url = f"https://solscan.io/token/{token_data.mint_address}"
-        
-        # Create token document
-        token_doc = {
-            "mint_address": token_data.mint_address,
-            "creator_wallet": token_data.creator_wallet,
-            "name": token_data.name,
-            "symbol": token_data.symbol,
-            "description": token_data.description,
-            "image_uri": token_data.image_uri,
-            
-            # Token Configuration (from proposal)
-            "total_supply": 1_000_000_000_000_000_000,  # 1B with 9 decimals
-            "decimals": 9,
-            "bonding_curve_supply": 800_000_000_000_000_000,  # 80%
-            "burning_reserve": 200_000_000_000_000_000,  # 20%
-            
-            # Trading Data (initial values)
-            "current_price": None,
-            "market_cap": None,
-            "total_volume": 0.0,
-            "holder_count": 1,  # Creator is initial holder
-            "transactions_count": 1,  # Creation transaction
-            
-            # Graduation Status
-            "graduation_status": GraduationStatus.PENDING,
-            "graduation_threshold": float(settings.GRADUATION_THRESHOLD),
-            "graduation_date": None,
-            "raydium_pool_id": None,
-            
-            # Explorer Integration
-            "solana_explorer_url": solana_explorer_url,
-            "solscan_url": solscan_url,
-            
-            # Blockchain Verification
-            "contract_verified": False,
-            "last_verified": None,
-            "block_height_created": None,
-            "creation_signature": None,
-            
-            # Metadata
-            "created_at": datetime.utcnow(),
-            "updated_at": None,
-            "is_active": True,
-            "tags": [],
-            
-            # Initial purchase data
-            "initial_purchase_amount": token_data.initial_purchase_amount,
-        }
+        token = TokenResponse(**token_doc)
+        await cache.invalidate_namespace(TOKEN_LIST_NAMESPACE)
+        await cache.invalidate_namespace(ANALYTICS_NAMESPACE)
+        await events.publish(events.NEW_TOKENS_CHANNEL, "token_created", token)
+        return token
         
-        # Insert token into database
-        result = await db.tokens.insert_one(token_doc)
-        token_doc["_id"] = str(result.inserted_id)
-        
-        # Create initial trading pair record
-        trading_pair_doc = {
-            "mint_address": token_data.mint_address,
-            "pair_type": "bonding_curve",
-            "base_price": 0.000004,  # Initial price from proposal
-            "current_sold": 0,
-            "available_supply": 800_000_000_000_000_000,  # 80% for bonding curve
-            "price_formula": "Price = Base_Price × (Total_Supply_Sold / Available_Supply)^2",
-            "pool_id": None,
-            "liquidity_sol": None,
-            "liquidity_token": None,
-            "created_at": datetime.utcnow(),
-            "updated_at": None,
-        }
-        await db.trading_pairs.insert_one(trading_pair_doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create token: {str(e)}")
+
+@router.post("/bulk", response_model=BulkTokenCreateResponse)
+async def bulk_create_tokens(request: BulkTokenCreateRequest):
+    """Register many tokens at once for migrations and backfills."""
+    try:
+        if len(request.tokens) > settings.BULK_CREATE_MAX_TOKENS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.BULK_CREATE_MAX_TOKENS} tokens per request"
+            )
         
-        return TokenResponse(**token_doc)
+        db = await get_database()
+        results = await token_registry.register_tokens(db, request.tokens)
+        
+        counts = {status: 0 for status in BulkItemStatus}
+        for result in results:
+            counts[result["status"]] += 1
+        
+        return BulkTokenCreateResponse(
+            created_count=counts[BulkItemStatus.CREATED],
+            duplicate_count=counts[BulkItemStatus.DUPLICATE],
+            invalid_count=counts[BulkItemStatus.INVALID],
+            failed_count=counts[BulkItemStatus.FAILED],
+            results=results,
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create token: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to bulk create tokens: {str(e)}")
 
-@router.get("", response_model=TokenListResponse)
-async def get_tokens(
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(20, ge=1, le=100, description="Items per page"),
-    status: Optional[GraduationStatus] = Query(None, description="Filter by graduation status"),
-    creator: Optional[str] = Query(None, description="Filter by creator wallet"),
-    sort_by: Optional[str] = Query("created_at", description="Sort field"),
-    sort_order: Optional[str] = Query("desc", description="Sort order (asc/desc)"),
-):
-    """Get all tokens with pagination and filtering."""
+@cached(TOKEN_LIST_NAMESPACE, ttl=lambda: settings.CACHE_TOKEN_LIST_TTL)
+async def load_token_page(
+    page: int,
+    page_size: int,
+    status: Optional[GraduationStatus],
+    creator: Optional[str],
+    sort_by: str,
+    sort_order: str,
+    cursor: Optional[str],
+    include_total: bool,
+    fields: str,
+) -> dict:
+    """One page of the token list, shaped to TokenListResponse with the given fieldset."""
     try:
         db = await get_database()
+        fieldset = fieldsets.resolve_fieldset(fields)
         
         # Build filter query
         filter_query = {"is_active": True}
@@ -125,63 +124,231 @@ async def get_tokens(
         
         # Build sort query
         sort_direction = -1 if sort_order == "desc" else 1
-        sort_query = [(sort_by, sort_direction)]
+        if cursor and sort_by not in KEYSET_SORT_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cursor pagination supports sort_by: {', '.join(sorted(KEYSET_SORT_FIELDS))}"
+            )
+        
+        # Get tokens and the total count concurrently; a slow or failed count only drops the total
+        calls = {
+            # Only the requested fields, plus the sort key and _id the cursor encodes
+            "page": pagination.fetch_page(
+                db.tokens, filter_query, sort_by, sort_direction, page_size,
+                cursor=cursor, skip=(page - 1) * page_size,
+                projection={**fieldset.projection, sort_by: 1, "_id": 1}
+            ),
+        }
+        if include_total:
+            calls["total_count"] = pagination.cached_count(db.tokens, filter_query)
+        try:
+            results = await concurrency.fan_out(calls, optional={"total_count": None})
+        except pagination.InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except concurrency.FanOutTimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        token_docs, next_cursor = results["page"]
+        total_count = results.get("total_count")
+        if sort_by not in KEYSET_SORT_FIELDS:
+            next_cursor = None
+        
+        return {
+            "tokens": fieldset.shaper.shape_many(token_docs),
+            "total_count": total_count,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": math.ceil(total_count / page_size) if total_count is not None else None,
+            "next_cursor": next_cursor,
+        }
         
-        # Get total count
-        total_count = await db.tokens.count_documents(filter_query)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get tokens: {str(e)}")
+
+@router.get("", response_model=TokenListResponse)
+async def get_tokens(
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    status: Optional[GraduationStatus] = Query(None, description="Filter by graduation status"),
+    creator: Optional[str] = Query(None, description="Filter by creator wallet"),
+    sort_by: Optional[str] = Query("created_at", description="Sort field"),
+    sort_order: Optional[str] = Query("desc", description="Sort order (asc/desc)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination)"),
+    include_total: bool = Query(True, description="Include total_count and total_pages (cached, may lag writes)"),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+):
+    """Get all tokens with pagination and filtering."""
+    fieldset = resolve_fieldset(fields)
+    token_page = await load_token_page(
+        page=page, page_size=page_size, status=status, creator=creator,
+        sort_by=sort_by, sort_order=sort_order, cursor=cursor, include_total=include_total,
+        fields=fieldset.name
+    )
+    token_page = {**token_page, "tokens": write_behind.overlay_many(token_page["tokens"])}
+    return fieldset.respond(token_page, fast=settings.FAST_JSON_TOKEN_LIST, container=TokenListResponse)
+
+@cached(RANKING_NAMESPACE, ttl=lambda: settings.CACHE_RANKING_TTL)
+async def load_ranking(board: RankingBoard, window: Optional[RankingWindow], limit: int, fields: str) -> dict:
+    """A leaderboard's top tokens, shaped to TokenRankingResponse with the given fieldset."""
+    try:
+        ranked = ranking.top(board, window, limit)
+        if ranked is None:
+            raise HTTPException(status_code=503, detail="Ranking is disabled")
         
-        # Calculate pagination
-        skip = (page - 1) * page_size
-        total_pages = math.ceil(total_count / page_size)
+        db = await get_database()
+        fieldset = fieldsets.resolve_fieldset(fields)
+        filter_query = {"mint_address": {"$in": [mint_address for mint_address, _ in ranked]}, "is_active": True}
+        if board == RankingBoard.GRADUATING:
+            filter_query["graduation_status"] = {"$ne": GraduationStatus.GRADUATED}
+        token_docs = {
+            token_doc["mint_address"]: token_doc
+            async for token_doc in db.tokens.find(filter_query, fieldset.projection)
+        }
         
-        # Get tokens
-        cursor = db.tokens.find(filter_query).sort(sort_query).skip(skip).limit(page_size)
-        tokens = []
+        # Keep rank order; tokens deactivated since they were scored drop out
+        ranked = [(mint_address, score) for mint_address, score in ranked if mint_address in token_docs]
+        return {
+            "board": board,
+            "window": window,
+            "tokens": [fieldset.shaper.shape(token_docs[mint_address]) for mint_address, _ in ranked],
+            "scores": [score for _, score in ranked],
+        }
         
-        async for token_doc in cursor:
-            token_doc["_id"] = str(token_doc["_id"])
-            tokens.append(TokenResponse(**token_doc))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get {board.value} tokens: {str(e)}")
+
+async def ranking_response(board: RankingBoard, window: Optional[RankingWindow], limit: int, fields: Optional[str]):
+    fieldset = resolve_fieldset(fields)
+    token_ranking = await load_ranking(board=board, window=window, limit=limit, fields=fieldset.name)
+    token_ranking = {**token_ranking, "tokens": write_behind.overlay_many(token_ranking["tokens"])}
+    return fieldset.respond(token_ranking, fast=settings.FAST_JSON_TOKEN_LIST, container=TokenRankingResponse)
+
+@router.get("/trending", response_model=TokenRankingResponse)
+async def get_trending_tokens(
+    window: RankingWindow = Query(RankingWindow.ONE_HOUR, description="Half-life of the decayed score"),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+):
+    """Tokens ranked by time-decayed SOL volume and trade count."""
+    return await ranking_response(RankingBoard.TRENDING, window, limit, fields)
+
+@router.get("/gainers", response_model=TokenRankingResponse)
+async def get_top_gainers(
+    window: RankingWindow = Query(RankingWindow.ONE_HOUR, description="Baseline and decay window"),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+):
+    """Tokens ranked by price change over the window."""
+    return await ranking_response(RankingBoard.GAINERS, window, limit, fields)
+
+@router.get("/graduating", response_model=TokenRankingResponse)
+async def get_graduating_tokens(
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+):
+    """Tokens closest to the graduation threshold; scores are the fraction reached."""
+    return await ranking_response(RankingBoard.GRADUATING, None, limit, fields)
+
+@router.post("/quotes/batch", response_model=BatchQuoteResponse)
+async def get_batch_quotes(request: BatchQuoteRequest):
+    """Quote many trade sizes across many tokens against their bonding curves."""
+    try:
+        db = await get_database()
         
-        return TokenListResponse(
-            tokens=tokens,
-            total_count=total_count,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
+        # Load every curve position in one query
+        mint_addresses = list({item.mint_address for item in request.items})
+        current_sold = await trading_pairs.load_current_sold(db, mint_addresses)
+        
+        quotes = []
+        errors = []
+        rows = []  # (mint_address, side, current_sold, amount)
+        for item in request.items:
+            if item.mint_address not in current_sold:
+                errors.append(BatchQuoteError(mint_address=item.mint_address, side=item.side, error="Trading pair not found"))
+                continue
+            rows.extend((item.mint_address, item.side, current_sold[item.mint_address], amount) for amount in item.amounts)
+        
+        if request.exact:
+            for mint_address, side, sold, amount in rows:
+                try:
+                    quotes.append(QuoteResponse(mint_address=mint_address, **bonding_curve.quote(side.value, sold, amount)))
+                except bonding_curve.QuoteError as e:
+                    errors.append(BatchQuoteError(mint_address=mint_address, side=side, amount=amount, error=str(e)))
+        elif rows:
+            results = bonding_curve.quote_many(
+                np.array([side == QuoteSide.BUY for _, side, _, _ in rows]),
+                np.array([sold for _, _, sold, _ in rows], dtype=np.float64),
+                np.array([amount for _, _, _, amount in rows], dtype=np.float64),
+            )
+            columns = {key: values.tolist() for key, values in results.items()}
+            for index, (mint_address, side, sold, amount) in enumerate(rows):
+                if not columns["valid"][index]:
+                    errors.append(BatchQuoteError(mint_address=mint_address, side=side, amount=amount, error="Amount outside the bonding curve"))
+                    continue
+                price_impact = columns["price_impact"][index]
+                quotes.append(QuoteResponse(
+                    mint_address=mint_address,
+                    side=side,
+                    current_sold=sold,
+                    amount_in=int(columns["amount_in"][index]),
+                    amount_out=int(columns["amount_out"][index]),
+                    price_per_token=columns["price_per_token"][index],
+                    spot_price_before=columns["spot_price_before"][index],
+                    spot_price_after=columns["spot_price_after"][index],
+                    price_impact=None if math.isnan(price_impact) else price_impact,
+                    sold_after=int(columns["sold_after"][index]),
+                ))
+        
+        return BatchQuoteResponse(quotes=quotes, errors=errors)
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get tokens: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to quote trades: {str(e)}")
 
-@router.get("/{mint_address}", response_model=TokenResponse)
-async def get_token(mint_address: str):
-    """Get specific token details by mint address."""
+@cached(TOKEN_NAMESPACE, ttl=lambda: settings.CACHE_TOKEN_TTL, key_builder=lambda mint_address: mint_address)
+async def load_token(mint_address: str) -> dict:
+    """
+    Full token, shaped to TokenResponse. Cached whole under the mint
+    address so invalidate_token drops it; sparse reads are cut from it.
+    """
     try:
         db = await get_database()
         
-        token_doc = await db.tokens.find_one({"mint_address": mint_address})
+        full = fieldsets.resolve_fieldset("full")
+        token_doc = await db.tokens.find_one({"mint_address": mint_address}, full.projection)
         if not token_doc:
             raise HTTPException(status_code=404, detail="Token not found")
         
-        token_doc["_id"] = str(token_doc["_id"])
-        return TokenResponse(**token_doc)
+        return full.shaper.shape(token_doc)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get token: {str(e)}")
 
+@router.get("/{mint_address}", response_model=TokenResponse)
+async def get_token(
+    mint_address: str,
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+):
+    """Get specific token details by mint address."""
+    fieldset = resolve_fieldset(fields)
+    token = write_behind.overlay(await load_token(mint_address=mint_address))
+    return fieldset.respond(fieldset.shaper.shape(token))
+
 @router.put("/{mint_address}", response_model=TokenResponse)
-async def update_token(mint_address: str, update_data: TokenUpdateRequest):
+async def update_token(
+    mint_address: str,
+    update_data: TokenUpdateRequest,
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
+):
     """Update token trading data and metrics."""
     try:
+        fieldset = resolve_fieldset(fields)
         db = await get_database()
         
-        # Check if token exists
-        token_doc = await db.tokens.find_one({"mint_address": mint_address})
-        if not token_doc:
-            raise HTTPException(status_code=404, detail="Token not found")
-        
         # Build update document
         update_doc = {"updated_at": datetime.utcnow()}
         
@@ -205,71 +372,97 @@ async def update_token(mint_address: str, update_data: TokenUpdateRequest):
         if update_data.graduation_status is not None:
             update_doc["graduation_status"] = update_data.graduation_status
         
-        # Update token
-        await db.tokens.update_one(
-            {"mint_address": mint_address},
-            {"$set": update_doc}
-        )
-        
-        # Get updated token
-        updated_token = await db.tokens.find_one({"mint_address": mint_address})
-        updated_token["_id"] = str(updated_token["_id"])
-        
-        return TokenResponse(**updated_token)
+        buffer = write_behind.buffer
+        # load_token 404s unknown mints, so only known mints are buffered
+        current_token = await load_token(mint_address=mint_address) if buffer is not None else None
+        if (
+            current_token is not None
+            and current_token.get("graduation_status") != GraduationStatus.PENDING
+            and update_doc.get("graduation_status") == GraduationStatus.ELIGIBLE
+        ):
+            # Only pending tokens become eligible; the flush guards this again
+            del update_doc["graduation_status"]
+        if current_token is not None and buffer.add(mint_address, update_doc):
+            # Buffered for the next flush; answer with the unflushed writes merged in
+            updated_token = buffer.overlay(current_token)
+        else:
+            if buffer is not None:
+                # The buffer is behind; older buffered values must not overwrite this write
+                buffer.discard(mint_address, update_doc)
+            # Update and fetch the token in a single round-trip, with the fields
+            # the response, the price event and the graduation monitor read
+            updated_token = await db.tokens.find_one_and_update(
+                {"mint_address": mint_address},
+                graduation.guarded_set(update_doc),
+                projection={**fieldset.projection, **PRICE_EVENT_PROJECTION},
+                return_document=ReturnDocument.AFTER
+            )
+            if not updated_token:
+                raise HTTPException(status_code=404, detail="Token not found")
+            await invalidate_token(mint_address)
+        
+        graduation.observe_tokens([updated_token])
+        ranking.observe_tokens([updated_token])
+        
+        if update_data.current_price is not None or update_data.market_cap is not None:
+            await events.publish(events.price_channel(mint_address), "price", {
+                "mint_address": mint_address,
+                "current_price": updated_token.get("current_price"),
+                "market_cap": updated_token.get("market_cap"),
+                "total_volume": updated_token.get("total_volume"),
+                "graduation_status": updated_token.get("graduation_status"),
+            })
+        return fieldset.respond(fieldset.shaper.shape(updated_token))
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update token: {str(e)}")
 
-@router.get("/search/{query}")
+@router.get("/search/{query}", response_model=TokenListResponse)
 async def search_tokens(
     query: str,
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Include total_count and total_pages"),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_DESCRIPTION),
 ):
     """Search tokens by name, symbol, or contract address."""
     try:
-        db = await get_database()
+        fieldset = resolve_fieldset(fields)
+        query = query.strip()
+        if not query or len(query) > settings.SEARCH_MAX_QUERY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Query must be 1-{settings.SEARCH_MAX_QUERY_LENGTH} characters"
+            )
+        
+        try:
+            offset = pagination.decode_offset_cursor(cursor) if cursor else (page - 1) * page_size
+        except pagination.InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Build search query
-        search_query = {
-            "$and": [
-                {"is_active": True},
-                {
-                    "$or": [
-                        {"name": {"$regex": query, "$options": "i"}},
-                        {"symbol": {"$regex": query, "$options": "i"}},
-                        {"mint_address": {"$regex": query, "$options": "i"}},
-                        {"description": {"$regex": query, "$options": "i"}},
-                    ]
-                }
-            ]
-        }
-        
-        # Get total count
-        total_count = await db.tokens.count_documents(search_query)
-        
-        # Calculate pagination
-        skip = (page - 1) * page_size
-        total_pages = math.ceil(total_count / page_size)
+        db = await get_database()
         
-        # Get tokens
-        cursor = db.tokens.find(search_query).sort([("created_at", -1)]).skip(skip).limit(page_size)
-        tokens = []
+        # Ranked matches are bounded by SEARCH_MAX_RESULTS, so paging is in memory
+        matches = await search.search_tokens(db, query, projection=fieldset.projection)
+        token_docs = matches[offset:offset + page_size]
+        next_cursor = pagination.encode_offset_cursor(offset + page_size) if offset + page_size < len(matches) else None
         
-        async for token_doc in cursor:
-            token_doc["_id"] = str(token_doc["_id"])
-            tokens.append(TokenResponse(**token_doc))
+        total_count = len(matches) if include_total else None
         
-        return TokenListResponse(
-            tokens=tokens,
-            total_count=total_count,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages
-        )
+        return fieldset.respond({
+            "tokens": write_behind.overlay_many(fieldset.shaper.shape_many(token_docs)),
+            "total_count": total_count,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": math.ceil(total_count / page_size) if total_count is not None else None,
+            "next_cursor": next_cursor,
+        }, fast=settings.FAST_JSON_SEARCH, container=TokenListResponse)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to search tokens: {str(e)}")
 
@@ -277,35 +470,51 @@ async def search_tokens(
 async def get_token_transactions(
     mint_address: str,
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100)
+    page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Include total_count and total_pages (cached)")
 ):
     """Get token transaction history."""
     try:
         db = await get_database()
         
+        # Existence check, page and count are independent, so they run concurrently
+        filter_query = {"mint_address": mint_address}
+        calls = {
+            "token": db.tokens.find_one({"mint_address": mint_address}, {"_id": 1}),
+            "page": pagination.fetch_page(
+                db.transactions, filter_query, "timestamp", -1, page_size,
+                cursor=cursor, skip=(page - 1) * page_size
+            ),
+        }
+        if include_total:
+            calls["total_count"] = pagination.cached_count(db.transactions, filter_query)
+        try:
+            results = await concurrency.fan_out(calls, optional={"total_count": None})
+        except pagination.InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except concurrency.FanOutTimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        
         # Check if token exists
-        token_exists = await db.tokens.find_one({"mint_address": mint_address})
-        if not token_exists:
+        if not results["token"]:
             raise HTTPException(status_code=404, detail="Token not found")
         
-        # Get transactions
-        skip = (page - 1) * page_size
-        cursor = db.transactions.find({"mint_address": mint_address}).sort([("timestamp", -1)]).skip(skip).limit(page_size)
-        
+        tx_docs, next_cursor = results["page"]
         transactions = []
-        async for tx_doc in cursor:
+        for tx_doc in tx_docs:
             tx_doc["_id"] = str(tx_doc["_id"])
             transactions.append(tx_doc)
         
-        total_count = await db.transactions.count_documents({"mint_address": mint_address})
-        total_pages = math.ceil(total_count / page_size)
+        total_count = results.get("total_count")
         
         return {
             "transactions": transactions,
             "total_count": total_count,
             "page": page,
             "page_size": page_size,
-            "total_pages": total_pages
+            "total_pages": math.ceil(total_count / page_size) if total_count is not None else None,
+            "next_cursor": next_cursor
         }
         
     except HTTPException:
@@ -313,53 +522,107 @@ async def get_token_transactions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get transactions: {str(e)}")
 
-@router.post("/{mint_address}/graduate")
-async def graduate_token(mint_address: str, raydium_pool_id: str, graduation_fee: float = 0.0):
-    """Mark token for Raydium graduation."""
+@router.get("/{mint_address}/quote", response_model=QuoteResponse)
+async def get_token_quote(
+    mint_address: str,
+    side: QuoteSide = Query(..., description="buy or sell"),
+    amount: int = Query(..., ge=0, description="Lamports for buys, raw token units for sells"),
+):
+    """Exact bonding curve quote for a single trade."""
     try:
         db = await get_database()
         
-        # Check if token exists and is eligible
-        token_doc = await db.tokens.find_one({"mint_address": mint_address})
-        if not token_doc:
-            raise HTTPException(status_code=404, detail="Token not found")
+        # Same curve position source as /quotes/batch, embedded or in trading_pairs
+        positions = await trading_pairs.load_current_sold(db, [mint_address])
+        if mint_address not in positions:
+            raise HTTPException(status_code=404, detail="Trading pair not found")
         
-        if token_doc.get("graduation_status") != GraduationStatus.ELIGIBLE:
-            raise HTTPException(status_code=400, detail="Token not eligible for graduation")
+        current_sold = positions[mint_address]
+        try:
+            result = bonding_curve.quote(side.value, current_sold, amount)
+        except bonding_curve.QuoteError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return QuoteResponse(mint_address=mint_address, **result)
         
-        if token_doc.get("graduated", False):
-            raise HTTPException(status_code=400, detail="Token already graduated")
-        
-        # Update token status
-        graduation_date = datetime.utcnow()
-        await db.tokens.update_one(
-            {"mint_address": mint_address},
-            {
-                "$set": {
-                    "graduation_status": GraduationStatus.GRADUATED,
-                    "graduation_date": graduation_date,
-                    "raydium_pool_id": raydium_pool_id,
-                    "updated_at": graduation_date,
-                }
-            }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to quote trade: {str(e)}")
+
+@router.get("/{mint_address}/holders", response_model=HolderDistributionResponse)
+async def get_token_holders(mint_address: str):
+    """Latest holder distribution snapshot for a token."""
+    try:
+        db = await get_database()
+        snapshot = await db.holder_snapshots.find_one(
+            {"mint_address": mint_address}, {"_id": 0}, sort=[("taken_at", -1)]
         )
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="No holder snapshot for token")
+        return snapshot
         
-        # Create graduation record
-        graduation_doc = {
-            "mint_address": mint_address,
-            "graduation_date": graduation_date,
-            "market_cap_at_graduation": token_doc.get("market_cap", 0),
-            "total_volume_at_graduation": token_doc.get("total_volume", 0),
-            "raydium_pool_data": {
-                "pool_id": raydium_pool_id,
-                "initial_sol_liquidity": 0,  # To be updated
-                "initial_token_liquidity": 0,  # To be updated
-                "pool_creation_signature": "",  # To be updated
-            },
-            "graduation_fee_collected": graduation_fee,
-            "status": "successful",
-        }
-        await db.graduations.insert_one(graduation_doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get holder distribution: {str(e)}")
+
+@router.get("/{mint_address}/candles", response_model=CandleListResponse)
+async def get_token_candles(
+    mint_address: str,
+    resolution: CandleResolution = Query(CandleResolution.ONE_MINUTE, description="Candle width"),
+    from_time: Optional[int] = Query(None, alias="from", description="Range start (unix seconds)"),
+    to_time: Optional[int] = Query(None, alias="to", description="Range end (unix seconds)"),
+    limit: int = Query(500, ge=1, le=1500, description="Maximum candles, newest kept"),
+):
+    """Get OHLCV candles for the token chart."""
+    try:
+        db = await get_database()
+        
+        end = datetime.utcfromtimestamp(to_time) if to_time is not None else datetime.utcnow()
+        if from_time is not None:
+            start = datetime.utcfromtimestamp(from_time)
+        else:
+            start = end - timedelta(seconds=candles.RESOLUTION_SECONDS[resolution] * limit)
+        if start > end:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+        
+        candle_docs = await candles.get_candles(db, mint_address, resolution, start, end, limit)
+        
+        return CandleListResponse(
+            mint_address=mint_address,
+            resolution=resolution,
+            candles=[
+                CandleResponse(time=int((doc["bucket"] - candles.EPOCH).total_seconds()), **{
+                    field: doc[field] for field in ("open", "high", "low", "close", "volume", "trades")
+                })
+                for doc in candle_docs
+            ]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get candles: {str(e)}")
+
+@router.post("/{mint_address}/graduate")
+async def graduate_token(mint_address: str, raydium_pool_id: str, graduation_fee: float = 0.0):
+    """Mark token for Raydium graduation."""
+    try:
+        db = await get_database()
+        
+        # Atomic transition; a token the monitor already graduated gets its pool attached
+        graduation_doc = await graduation.graduate(db, mint_address, raydium_pool_id, graduation_fee)
+        if graduation_doc is None:
+            graduation_doc = await graduation.attach_pool(db, mint_address, raydium_pool_id, graduation_fee)
+        
+        if graduation_doc is None:
+            token_doc = await db.tokens.find_one({"mint_address": mint_address}, {"graduation_status": 1})
+            if not token_doc:
+                raise HTTPException(status_code=404, detail="Token not found")
+            if token_doc.get("graduation_status") == GraduationStatus.GRADUATED:
+                raise HTTPException(status_code=400, detail="Token already graduated")
+            raise HTTPException(status_code=400, detail="Token not eligible for graduation")
         
         return {"message": "Token graduated successfully", "raydium_pool_id": raydium_pool_id}
         
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException
+
+from app.models import WalletPortfolioResponse
+from app.database import get_database
+from app.config import settings
+from app.services import concurrency, holdings, write_behind
+
+router = APIRouter()
+
+HOLDING_PROJECTION = {
+    "_id": 0, "mint_address": 1, "balance": 1, "bought_tokens": 1, "bought_sol": 1,
+    "sold_tokens": 1, "sold_sol": 1, "last_trade_at": 1,
+}
+POSITION_TOKEN_PROJECTION = {
+    "_id": 0, "mint_address": 1, "name": 1, "symbol": 1, "image_uri": 1, "decimals": 1, "current_price": 1,
+}
+
+@router.get("/{address}/portfolio", response_model=WalletPortfolioResponse)
+async def get_wallet_portfolio(address: str):
+    """Open positions of a wallet valued at current token prices."""
+    try:
+        db = await get_database()
+        limit = settings.PORTFOLIO_MAX_POSITIONS
+
+        # One (wallet, balance) index scan for positions, largest first; one extra to detect truncation
+        results = await concurrency.fan_out(
+            {
+                "holdings": db.holdings.find(
+                    {"wallet": address, "balance": {"$gt": 0}}, HOLDING_PROJECTION
+                ).sort("balance", -1).limit(limit + 1).to_list(limit + 1),
+                "created": db.tokens.find(
+                    {"creator_wallet": address}, {"_id": 0, "mint_address": 1}
+                ).to_list(None),
+            },
+            optional={"created": []},
+        )
+        wallet_holdings = results["holdings"][:limit]
+
+        # Then every held token's price in a single $in lookup
+        token_docs = {}
+        if wallet_holdings:
+            cursor = db.tokens.find(
+                {"mint_address": {"$in": [holding["mint_address"] for holding in wallet_holdings]}},
+                POSITION_TOKEN_PROJECTION,
+            )
+            token_docs = {token_doc["mint_address"]: token_doc async for token_doc in cursor}
+        token_docs = {mint_address: write_behind.overlay(token_doc) for mint_address, token_doc in token_docs.items()}
+
+        positions = [
+            holdings.value_position(holding, token_docs.get(holding["mint_address"]))
+            for holding in wallet_holdings
+        ]
+        positions.sort(key=lambda position: position["value_sol"] or 0.0, reverse=True)
+
+        return {
+            "wallet": address,
+            "positions": positions,
+            "created_tokens": [token_doc["mint_address"] for token_doc in results["created"]],
+            **holdings.summarize(positions),
+            "truncated": len(results["holdings"]) > limit,
+        }
+
+    except HTTPException:
+        raise
+    except concurrency.FanOutTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"Failed to get wallet portfolio: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get wallet portfolio: {str(e)}")
@@ -0,0 +1 @@
+# Service layer shared by the API routers and background workers
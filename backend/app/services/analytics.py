@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.config import settings
+from app.services import concurrency, replay_guard
+from app.services.leases import Lease
+
+PLATFORM_STATS_ID = "platform"
+WINDOW = timedelta(days=1)
+# Running totals that writers $inc; reconcile corrects them by a delta
+COUNTER_FIELDS = ("total_tokens_created", "graduated_tokens", "total_trading_volume", "platform_revenue")
+
+def minute_bucket(timestamp: datetime) -> datetime:
+    return timestamp.replace(second=0, microsecond=0)
+
+async def increment_counters(db, **deltas: float):
+    """Atomically bump running platform counters (tokens, graduations, volume, revenue)."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    await db.platform_stats.update_one(
+        {"_id": PLATFORM_STATS_ID},
+        {"$inc": deltas, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+async def record_token_created(db):
+    await increment_counters(db, total_tokens_created=1)
+
+async def record_graduation(db, graduation_fee: float):
+    await increment_counters(db, graduated_tokens=1, platform_revenue=graduation_fee)
+
+async def record_trades(db, trades: List[Dict[str, Any]]):
+    """
+    Add trades to the running volume and to per-minute buckets of
+    transaction counts and trader wallets that back the 24h window. A
+    retried batch is not counted twice.
+    """
+    if not trades:
+        return
+
+    buckets: Dict[datetime, Dict[str, Any]] = {}
+    for trade in trades:
+        bucket = buckets.setdefault(minute_bucket(trade["timestamp"]), {"count": 0, "wallets": set(), "signatures": []})
+        bucket["count"] += 1
+        bucket["wallets"].add(trade["user_wallet"])
+        bucket["signatures"].append(trade["transaction_signature"])
+
+    try:
+        await db.analytics_minutes.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": minute, **replay_guard.unapplied(bucket["signatures"])},
+                    {
+                        "$inc": {"transactions": bucket["count"]},
+                        "$addToSet": {"wallets": {"$each": sorted(bucket["wallets"])}},
+                        "$setOnInsert": {"minute": minute},
+                        **replay_guard.record(bucket["signatures"]),
+                    },
+                    upsert=True,
+                )
+                for minute, bucket in buckets.items()
+            ],
+            ordered=False,
+        )
+    except BulkWriteError as e:
+        replay_guard.raise_unless_replayed(e)
+
+    signatures = [trade["transaction_signature"] for trade in trades]
+    try:
+        await db.platform_stats.update_one(
+            {"_id": PLATFORM_STATS_ID, **replay_guard.unapplied(signatures)},
+            {
+                "$inc": {"total_trading_volume": sum(trade["sol_amount"] for trade in trades)},
+                "$set": {"updated_at": datetime.utcnow()},
+                **replay_guard.record(signatures),
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        pass
+
+async def refresh_window(db):
+    """Recompute the sliding 24h figures from at most 1440 minute buckets."""
+    since = minute_bucket(datetime.utcnow() - WINDOW)
+    pipeline = [
+        {"$match": {"_id": {"$gte": since}}},
+        {"$facet": {
+            "transactions": [{"$group": {"_id": None, "total": {"$sum": "$transactions"}}}],
+            "traders": [{"$unwind": "$wallets"}, {"$group": {"_id": "$wallets"}}, {"$count": "total"}],
+        }},
+    ]
+    result = (await db.analytics_minutes.aggregate(pipeline).to_list(1))[0]
+    daily_transactions = result["transactions"][0]["total"] if result["transactions"] else 0
+    active_traders = result["traders"][0]["total"] if result["traders"] else 0
+
+    await db.platform_stats.update_one(
+        {"_id": PLATFORM_STATS_ID},
+        {"$set": {
+            "daily_transactions": daily_transactions,
+            "active_traders": active_traders,
+            "window_updated_at": datetime.utcnow(),
+        }},
+        upsert=True,
+    )
+
+async def reconcile(db):
+    """
+    Rebuild every figure from source collections to correct any counter
+    drift. Counters are corrected by a delta, so increments that land
+    meanwhile are kept.
+    """
+    yesterday = datetime.utcnow() - WINDOW
+
+    async def first(cursor, field: str, default: Any) -> Any:
+        result = await cursor.to_list(1)
+        return result[0][field] if result else default
+
+    # Counters keep taking $inc while the figures are computed, so they are moved by the
+    # difference to what they held beforehand instead of overwriting those increments
+    counters = await db.platform_stats.find_one({"_id": PLATFORM_STATS_ID}, {field: 1 for field in COUNTER_FIELDS}) or {}
+
+    # Every figure is required, so a failure or overrun aborts the rebuild and cancels the rest
+    figures = await concurrency.fan_out(
+        {
+            "total_tokens_created": db.tokens.count_documents({"is_active": True}),
+            "graduated_tokens": db.tokens.count_documents({"graduation_status": "graduated"}),
+            "total_trading_volume": first(db.tokens.aggregate([
+                {"$match": {"is_active": True}},
+                {"$group": {"_id": None, "total_volume": {"$sum": "$total_volume"}}}
+            ]), "total_volume", 0.0),
+            "active_traders": first(db.transactions.aggregate([
+                {"$match": {"timestamp": {"$gte": yesterday}}},
+                {"$group": {"_id": "$user_wallet"}},
+                {"$count": "active_traders"}
+            ]), "active_traders", 0),
+            "daily_transactions": db.transactions.count_documents({"timestamp": {"$gte": yesterday}}),
+            "platform_revenue": first(db.graduations.aggregate([
+                {"$group": {"_id": None, "total_revenue": {"$sum": "$graduation_fee_collected"}}}
+            ]), "total_revenue", 0.0),
+        },
+        timeout=settings.ANALYTICS_RECONCILE_INTERVAL,
+    )
+
+    now = datetime.utcnow()
+    return await db.platform_stats.find_one_and_update(
+        {"_id": PLATFORM_STATS_ID},
+        {
+            "$inc": {field: figures[field] - counters.get(field, 0) for field in COUNTER_FIELDS},
+            "$set": {
+                "active_traders": figures["active_traders"],
+                "daily_transactions": figures["daily_transactions"],
+                "window_updated_at": now,
+                "reconciled_at": now,
+                "updated_at": now,
+            },
+        },
+        projection={replay_guard.FIELD: 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+async def get_platform_stats(db) -> Dict[str, Any]:
+    """Materialized platform figures; reconciles once if none exist yet."""
+    stats = await db.platform_stats.find_one({"_id": PLATFORM_STATS_ID}, {replay_guard.FIELD: 0})
+    if stats is None or "reconciled_at" not in stats:
+        stats = await reconcile(db)
+    return stats
+
+
+class AnalyticsMaterializer:
+    """
+    Background refresh of the 24h window plus periodic full reconciliation.
+    With a lease, only the worker holding it does either.
+    """
+
+    def __init__(self, db, refresh_interval: float, reconcile_interval: float, lease: Optional[Lease] = None):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.reconcile_interval = reconcile_interval
+        self.lease = lease
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_forever(self):
+        last_reconciled = 0.0
+        while True:
+            try:
+                if self.lease is None or await self.lease.acquire():
+                    if time.monotonic() - last_reconciled >= self.reconcile_interval:
+                        await reconcile(self.db)
+                        last_reconciled = time.monotonic()
+                    else:
+                        await refresh_window(self.db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Analytics refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lease is not None:
+            await self.lease.release()
+
+
+# Global materializer
+materializer: Optional[AnalyticsMaterializer] = None
+
+async def start_materializer(db):
+    """Start the materializer in every worker; a lease lets one of them run it."""
+    global materializer
+
+    materializer = AnalyticsMaterializer(
+        db,
+        refresh_interval=settings.ANALYTICS_REFRESH_INTERVAL,
+        reconcile_interval=settings.ANALYTICS_RECONCILE_INTERVAL,
+        # Taken over after a few missed refreshes
+        lease=Lease(db, "analytics_materializer", ttl=3 * settings.ANALYTICS_REFRESH_INTERVAL),
+    )
+    materializer.start()
+
+async def stop_materializer():
+    global materializer
+
+    if materializer:
+        await materializer.stop()
+        materializer = None
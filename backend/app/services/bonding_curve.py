@@ -0,0 +1,189 @@
+"""
+Bonding curve pricing: Price = Base_Price × (Total_Supply_Sold / Available_Supply)^2
+
+Prices are SOL per whole token. The cost of moving supply from s0 to s1
+(raw units, 9 decimals) is the integral of the curve:
+
+    cost = Base_Price × (s1³ - s0³) / (3 × Available_Supply² × 10^9)
+
+Single quotes use exact integer lamport math (buys round cost up, sells
+round proceeds down). Batch quotes evaluate the same closed forms over
+NumPy float64 arrays.
+
+The token-factory program does not implement this curve yet. Its only
+pricing is the creator's optional initial purchase in create_token, at a
+flat 1M whole tokens per lamport, so 800 lamports take the whole curve
+allocation and larger purchases fail the instruction.
+calculate_initial_purchase_tokens mirrors it. Curve quotes follow the
+proposal, which the program's trading instructions are to implement.
+"""
+from typing import Optional
+
+import numpy as np
+
+LAMPORTS_PER_SOL = 1_000_000_000
+TOKEN_DECIMALS = 9
+TOKEN_UNIT = 10 ** TOKEN_DECIMALS
+U64_MAX = 2 ** 64 - 1
+
+BASE_PRICE = 0.000004  # SOL per whole token, from the proposal
+BASE_PRICE_LAMPORTS = 4_000
+AVAILABLE_SUPPLY = 800_000_000_000_000_000  # 80% bonding curve allocation, raw units
+
+# Shared denominator of the integral, in raw units
+_CURVE_DENOMINATOR = 3 * AVAILABLE_SUPPLY ** 2 * TOKEN_UNIT
+
+
+class QuoteError(ValueError):
+    """Raised when a trade cannot be quoted against the curve."""
+
+
+def calculate_initial_purchase_tokens(sol_amount: int) -> int:
+    """
+    Mirror of the Anchor program's calculate_initial_purchase_tokens
+    (1 lamport buys 1M tokens), including its checked u64 overflow.
+    """
+    tokens = sol_amount * 1_000_000_000_000_000
+    if tokens > U64_MAX:
+        raise QuoteError("Initial purchase overflows u64 on-chain")
+    return tokens
+
+def _icbrt(value: int) -> int:
+    """Floor of the integer cube root."""
+    if value < 2:
+        return value
+    root = 1 << ((value.bit_length() + 2) // 3)
+    while True:
+        next_root = (2 * root + value // (root * root)) // 3
+        if next_root >= root:
+            break
+        root = next_root
+    while root ** 3 > value:
+        root -= 1
+    while (root + 1) ** 3 <= value:
+        root += 1
+    return root
+
+def _check_sold(current_sold: int):
+    if not 0 <= current_sold <= AVAILABLE_SUPPLY:
+        raise QuoteError("current_sold is outside the bonding curve supply")
+
+def spot_price(current_sold: int) -> float:
+    """Marginal price in SOL per whole token at a supply point."""
+    return BASE_PRICE * (current_sold / AVAILABLE_SUPPLY) ** 2
+
+def cost_between(s0: int, s1: int, round_up: bool) -> int:
+    """Lamports to move the curve from s0 to s1 (s0 <= s1)."""
+    numerator = BASE_PRICE_LAMPORTS * (s1 ** 3 - s0 ** 3)
+    if round_up:
+        return -(-numerator // _CURVE_DENOMINATOR)
+    return numerator // _CURVE_DENOMINATOR
+
+def buy_cost(current_sold: int, token_amount: int) -> int:
+    """Lamports needed to buy token_amount raw units."""
+    _check_sold(current_sold)
+    if token_amount < 0 or current_sold + token_amount > AVAILABLE_SUPPLY:
+        raise QuoteError("Not enough supply left on the bonding curve")
+    return cost_between(current_sold, current_sold + token_amount, round_up=True)
+
+def buy_tokens_for_sol(current_sold: int, lamports: int) -> int:
+    """Raw token units bought for lamports, capped at the remaining supply."""
+    _check_sold(current_sold)
+    if lamports < 0:
+        raise QuoteError("Amount must be positive")
+    target = current_sold ** 3 + lamports * _CURVE_DENOMINATOR // BASE_PRICE_LAMPORTS
+    s1 = min(_icbrt(target), AVAILABLE_SUPPLY)
+    return s1 - current_sold
+
+def sell_proceeds(current_sold: int, token_amount: int) -> int:
+    """Lamports received for selling token_amount raw units back to the curve."""
+    _check_sold(current_sold)
+    if token_amount < 0 or token_amount > current_sold:
+        raise QuoteError("Cannot sell more than the curve has sold")
+    return cost_between(current_sold - token_amount, current_sold, round_up=False)
+
+def quote(side: str, current_sold: int, amount: int) -> dict:
+    """
+    Exact quote. For buys amount is lamports in; for sells it is raw token
+    units in.
+    """
+    if side == "buy":
+        tokens = buy_tokens_for_sol(current_sold, amount)
+        # Charge the exact cost of the tokens delivered, never more than offered
+        lamports = buy_cost(current_sold, tokens)
+        sold_after = current_sold + tokens
+        amount_in, amount_out = lamports, tokens
+    else:
+        lamports = sell_proceeds(current_sold, amount)
+        tokens = amount
+        sold_after = current_sold - amount
+        amount_in, amount_out = amount, lamports
+
+    price_before = spot_price(current_sold)
+    price_after = spot_price(sold_after)
+    return {
+        "side": side,
+        "current_sold": current_sold,
+        "amount_in": amount_in,
+        "amount_out": amount_out,
+        "price_per_token": (lamports / LAMPORTS_PER_SOL) / (tokens / TOKEN_UNIT) if tokens else 0.0,
+        "spot_price_before": price_before,
+        "spot_price_after": price_after,
+        "price_impact": (price_after - price_before) / price_before if price_before else None,
+        "sold_after": sold_after,
+    }
+
+def quote_many(sides: np.ndarray, current_sold: np.ndarray, amounts: np.ndarray) -> dict:
+    """
+    Vectorized quotes over parallel arrays. sides holds True for buys;
+    amounts are lamports for buys and raw token units for sells. Returns
+    arrays keyed like quote(); invalid sells are reported in "valid".
+    """
+    available_tokens = AVAILABLE_SUPPLY / TOKEN_UNIT
+    scale = BASE_PRICE * available_tokens / 3  # SOL for x: 0 -> 1
+    current_sold = current_sold.astype(np.float64)
+    amounts = amounts.astype(np.float64)
+    x0 = current_sold / AVAILABLE_SUPPLY
+
+    # Buys: solve x1³ - x0³ = offer / scale, taking x1 - x0 as the offer over the
+    # factored difference of cubes to avoid cancellation, then floor to whole
+    # raw units like the exact path
+    offer = amounts / LAMPORTS_PER_SOL / scale
+    x1_estimate = np.cbrt(x0 ** 3 + offer)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step = offer / (x1_estimate ** 2 + x1_estimate * x0 + x0 ** 2)
+    step = np.where(offer > 0, step, 0.0)
+    bought = np.floor(np.clip(np.minimum(step * AVAILABLE_SUPPLY, AVAILABLE_SUPPLY - current_sold), 0.0, None))
+
+    valid = (x0 >= 0) & (x0 <= 1) & (amounts >= 0) & (sides | (amounts <= current_sold))
+    tokens = np.where(sides, bought, amounts)
+    sold_after = np.where(sides, current_sold + tokens, np.clip(current_sold - tokens, 0.0, None))
+    x1 = sold_after / AVAILABLE_SUPPLY
+
+    # Price the floored amount: |x1³ - x0³| = |x1 - x0| (x1² + x1 x0 + x0²)
+    lamports = tokens / AVAILABLE_SUPPLY * (x1 ** 2 + x1 * x0 + x0 ** 2) * scale * LAMPORTS_PER_SOL
+    # Buys round cost up but never charge more than offered; sells round proceeds down
+    lamports = np.where(sides, np.minimum(np.ceil(lamports), amounts), np.floor(lamports))
+
+    price_before = BASE_PRICE * x0 ** 2
+    price_after = BASE_PRICE * x1 ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_per_token = np.where(tokens > 0, (lamports / LAMPORTS_PER_SOL) / (tokens / TOKEN_UNIT), 0.0)
+        price_impact = np.where(price_before > 0, (price_after - price_before) / price_before, np.nan)
+
+    return {
+        "amount_in": np.where(sides, lamports, amounts),
+        "amount_out": np.where(sides, tokens, lamports),
+        "price_per_token": price_per_token,
+        "spot_price_before": price_before,
+        "spot_price_after": price_after,
+        "price_impact": price_impact,
+        "sold_after": sold_after,
+        "valid": valid,
+    }
+
+def current_sold_from_pair(pair_doc: Optional[dict]) -> int:
+    """Curve position stored on a trading_pairs document."""
+    if not pair_doc:
+        return 0
+    return int(pair_doc.get("current_sold") or 0)
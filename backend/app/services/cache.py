@@ -0,0 +1,223 @@
+import asyncio
+import functools
+import json
+import logging
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+# Namespaces
+TOKEN_NAMESPACE = "token"
+TOKEN_LIST_NAMESPACE = "tokens:list"
+ANALYTICS_NAMESPACE = "analytics"
+RANKING_NAMESPACE = "rankings"
+
+VERSION_KEY_PREFIX = "cache:version:"
+VERSION_LOCAL_TTL = 1.0  # seconds a worker trusts its copy of a namespace version
+
+
+class LocalLRU:
+    """Small in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class Cache:
+    """
+    Two-tier read-through cache: a per-worker LRU in front of Redis.
+
+    Values are stored JSON-encoded in Redis and decoded in the LRU. Misses
+    are single-flight per key, so a burst on a cold key runs the loader
+    once. Whole namespaces are invalidated by bumping a version that is part
+    of every key. Other workers pick up the new version within
+    VERSION_LOCAL_TTL, and their LRU entries live at most CACHE_LOCAL_TTL.
+    """
+
+    def __init__(self, local_max_entries: int = 10000, local_ttl: float = 2.0):
+        self.local = LocalLRU(local_max_entries)
+        self.local_ttl = local_ttl
+        self._redis = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._versions: Dict[str, Tuple[float, int]] = {}
+
+    async def connect(self, redis_url: str):
+        import redis.asyncio as redis
+
+        client = redis.from_url(redis_url, decode_responses=True)
+        await client.ping()
+        self._redis = client
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _version(self, namespace: str) -> int:
+        cached = self._versions.get(namespace)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        version = cached[1] if cached else 0
+        if self._redis is not None:
+            try:
+                version = int(await self._redis.get(f"{VERSION_KEY_PREFIX}{namespace}") or 0)
+            except Exception as e:
+                logging.warning(f"Cache version lookup failed for {namespace}: {e}")
+        self._versions[namespace] = (time.monotonic() + VERSION_LOCAL_TTL, version)
+        return version
+
+    async def _full_key(self, namespace: str, key: str) -> str:
+        return f"cache:{namespace}:v{await self._version(namespace)}:{key}"
+
+    async def get_or_load(self, namespace: str, key: str, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, calling loader once on a miss."""
+        full_key = await self._full_key(namespace, key)
+
+        is_hit, value = self.local.get(full_key)
+        if is_hit:
+            return value
+
+        future = self._inflight.get(full_key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(full_key, ttl, loader))
+            self._inflight[full_key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(full_key, None))
+        return await asyncio.shield(future)
+
+    async def _load(self, full_key: str, ttl: float, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if self._redis is not None:
+            try:
+                encoded = await self._redis.get(full_key)
+                if encoded is not None:
+                    value = json.loads(encoded)
+                    self.local.set(full_key, value, min(ttl, self.local_ttl))
+                    return value
+            except Exception as e:
+                logging.warning(f"Cache read failed for {full_key}: {e}")
+
+        value = jsonable_encoder(await loader(), custom_encoder={ObjectId: str})
+        self.local.set(full_key, value, min(ttl, self.local_ttl))
+        if self._redis is not None:
+            try:
+                await self._redis.set(full_key, json.dumps(value), ex=max(1, int(ttl)))
+            except Exception as e:
+                logging.warning(f"Cache write failed for {full_key}: {e}")
+        return value
+
+    async def invalidate(self, namespace: str, key: str):
+        """Drop one key from both tiers."""
+        full_key = await self._full_key(namespace, key)
+        self.local.delete(full_key)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(full_key)
+            except Exception as e:
+                logging.warning(f"Cache invalidation failed for {full_key}: {e}")
+
+    async def invalidate_many(self, namespace: str, keys: Iterable[str]):
+        """Drop several keys from both tiers with one Redis DEL."""
+        prefix = await self._full_key(namespace, "")
+        full_keys = [f"{prefix}{key}" for key in keys]
+        if not full_keys:
+            return
+        for full_key in full_keys:
+            self.local.delete(full_key)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(*full_keys)
+            except Exception as e:
+                logging.warning(f"Cache invalidation failed for {len(full_keys)} keys in {namespace}: {e}")
+
+    async def invalidate_namespace(self, namespace: str):
+        """Orphan every key in a namespace by bumping its version."""
+        version = (self._versions.get(namespace) or (0, 0))[1] + 1
+        if self._redis is not None:
+            try:
+                version = int(await self._redis.incr(f"{VERSION_KEY_PREFIX}{namespace}"))
+            except Exception as e:
+                logging.warning(f"Cache namespace bump failed for {namespace}: {e}")
+        self._versions[namespace] = (time.monotonic() + VERSION_LOCAL_TTL, version)
+
+
+def default_key(**kwargs) -> str:
+    """Stable key from handler keyword arguments."""
+    parts = []
+    for name in sorted(kwargs):
+        value = kwargs[name]
+        parts.append(f"{name}={value.value if isinstance(value, Enum) else value}")
+    return "&".join(parts) or "_"
+
+def cached(namespace: str, ttl: Callable[[], float], key_builder: Optional[Callable[..., str]] = None):
+    """
+    Read-through cache decorator for async route handlers called with
+    keyword arguments. ttl is read from settings at call time.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return await func(*args, **kwargs)
+            key = (key_builder or default_key)(**kwargs)
+            return await cache.get_or_load(namespace, key, ttl(), lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+# Global cache
+cache = Cache(
+    local_max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    local_ttl=settings.CACHE_LOCAL_TTL,
+)
+
+async def init_cache():
+    """Connect the Redis tier; the in-process tier works without it."""
+    if not settings.CACHE_ENABLED:
+        return
+    try:
+        await cache.connect(settings.REDIS_URL)
+        logging.info("Cache connected to Redis")
+    except Exception as e:
+        logging.error(f"Failed to connect cache to Redis, using in-process tier only: {e}")
+
+async def close_cache():
+    await cache.close()
+
+async def invalidate_token(mint_address: str):
+    """Drop a token's detail entry and every cached token list page."""
+    await cache.invalidate(TOKEN_NAMESPACE, mint_address)
+    await cache.invalidate_namespace(TOKEN_LIST_NAMESPACE)
+
+async def invalidate_tokens(mint_addresses: Iterable[str]):
+    """Drop many tokens' detail entries in one round trip, and every cached token list page."""
+    await cache.invalidate_many(TOKEN_NAMESPACE, mint_addresses)
+    await cache.invalidate_namespace(TOKEN_LIST_NAMESPACE)
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.models import CandleResolution
+from app.services import replay_guard
+
+RESOLUTION_SECONDS = {
+    CandleResolution.ONE_SECOND: 1,
+    CandleResolution.ONE_MINUTE: 60,
+    CandleResolution.FIVE_MINUTES: 300,
+    CandleResolution.ONE_HOUR: 3600,
+    CandleResolution.ONE_DAY: 86400,
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+def bucket_start(timestamp: datetime, resolution: CandleResolution) -> datetime:
+    """Start of the candle that contains timestamp."""
+    seconds = int((timestamp - EPOCH).total_seconds())
+    width = RESOLUTION_SECONDS[resolution]
+    return EPOCH + timedelta(seconds=seconds - seconds % width)
+
+def _missing(field: str) -> Dict[str, Any]:
+    return {"$eq": [{"$ifNull": [f"${field}", None]}, None]}
+
+def _merge_pipeline(delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Update pipeline folding a pre-aggregated delta into a stored candle.
+    open/close follow the earliest/latest trade time, so batches may arrive
+    out of order.
+    """
+    return [{
+        "$set": {
+            "open": {"$cond": [{"$or": [_missing("open_ts"), {"$lt": [delta["open_ts"], "$open_ts"]}]}, delta["open"], "$open"]},
+            "close": {"$cond": [{"$or": [_missing("close_ts"), {"$gte": [delta["close_ts"], "$close_ts"]}]}, delta["close"], "$close"]},
+            "open_ts": {"$min": ["$open_ts", delta["open_ts"]]},
+            "close_ts": {"$max": ["$close_ts", delta["close_ts"]]},
+            "high": {"$max": ["$high", delta["high"]]},
+            "low": {"$min": ["$low", delta["low"]]},
+            "volume": {"$add": [{"$ifNull": ["$volume", 0]}, delta["volume"]]},
+            "trades": {"$add": [{"$ifNull": ["$trades", 0]}, delta["trades"]]},
+            replay_guard.FIELD: replay_guard.record_expression(delta["signatures"]),
+            **({"expire_at": delta["expire_at"]} if "expire_at" in delta else {}),
+        }
+    }]
+
+def aggregate_trades(trades: List[Dict[str, Any]]) -> Dict[Tuple[str, CandleResolution, datetime], Dict[str, Any]]:
+    """Collapse a batch of trades into one OHLCV delta per candle."""
+    deltas: Dict[Tuple[str, CandleResolution, datetime], Dict[str, Any]] = {}
+    for trade in sorted(trades, key=lambda trade: trade["timestamp"]):
+        price = trade["price_per_token"]
+        if not price:
+            continue
+        timestamp = trade["timestamp"]
+        for resolution in RESOLUTION_SECONDS:
+            key = (trade["mint_address"], resolution, bucket_start(timestamp, resolution))
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = {
+                    "open": price, "open_ts": timestamp,
+                    "high": price, "low": price,
+                    "close": price, "close_ts": timestamp,
+                    "volume": 0.0, "trades": 0, "signatures": [],
+                }
+                if resolution == CandleResolution.ONE_SECOND:
+                    # 1s candles only back the live chart; let a TTL index expire them
+                    delta["expire_at"] = key[2] + timedelta(seconds=settings.CANDLE_1S_RETENTION)
+            delta["high"] = max(delta["high"], price)
+            delta["low"] = min(delta["low"], price)
+            delta["close"], delta["close_ts"] = price, timestamp
+            delta["volume"] += trade["sol_amount"]
+            delta["trades"] += 1
+            delta["signatures"].append(trade["transaction_signature"])
+    return deltas
+
+async def apply_trades(db, trades: List[Dict[str, Any]]) -> int:
+    """
+    Roll ingested trades into every candle resolution with one bulk upsert.
+    Candles that already hold a retried batch's trades are left as they are.
+    """
+    deltas = aggregate_trades(trades)
+    if not deltas:
+        return 0
+
+    operations = [
+        UpdateOne(
+            {
+                "mint_address": mint_address, "resolution": resolution.value, "bucket": bucket,
+                **replay_guard.unapplied(delta["signatures"]),
+            },
+            _merge_pipeline(delta),
+            upsert=True,
+        )
+        for (mint_address, resolution, bucket), delta in deltas.items()
+    ]
+    try:
+        await db.candles.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        replay_guard.raise_unless_replayed(e)
+    return len(operations)
+
+async def get_candles(
+    db,
+    mint_address: str,
+    resolution: CandleResolution,
+    start: datetime,
+    end: datetime,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Stored candles in [start, end], oldest first."""
+    cursor = db.candles.find(
+        {
+            "mint_address": mint_address,
+            "resolution": resolution.value,
+            "bucket": {"$gte": bucket_start(start, resolution), "$lte": end},
+        },
+        {"_id": 0, "bucket": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1, "trades": 1},
+    ).sort("bucket", -1).limit(limit)
+    candles = await cursor.to_list(limit)
+    candles.reverse()
+    return candles
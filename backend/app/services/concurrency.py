@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Mapping, Optional
+
+from app.config import settings
+
+
+class FanOutTimeoutError(asyncio.TimeoutError):
+    def __init__(self, names):
+        self.names = sorted(names)
+        super().__init__(f"Timed out waiting for {', '.join(self.names)}")
+
+
+async def fan_out(
+    calls: Mapping[str, Awaitable[Any]],
+    optional: Optional[Mapping[str, Any]] = None,
+    timeout: Optional[float] = None,
+    optional_timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Run independent calls concurrently and return their results by name.
+
+    Calls named in optional are allowed to fail: on an error, or when they
+    outlive optional_timeout (FANOUT_OPTIONAL_TIMEOUT), they resolve to the
+    default given in optional, so a slow count or secondary query cannot
+    hold up the response. Any other call failing raises its error, and
+    running past timeout (FANOUT_TIMEOUT) raises FanOutTimeoutError.
+
+    Nothing outlives the call: unfinished tasks are cancelled and awaited
+    before fan_out returns or raises, including when the caller itself is
+    cancelled.
+    """
+    optional = optional or {}
+    timeout = settings.FANOUT_TIMEOUT if timeout is None else timeout
+    optional_timeout = settings.FANOUT_OPTIONAL_TIMEOUT if optional_timeout is None else optional_timeout
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    tasks = {name: asyncio.ensure_future(call) for name, call in calls.items()}
+    names = {task: name for name, task in tasks.items()}
+    deadlines = {
+        task: started + (min(timeout, optional_timeout) if name in optional else timeout)
+        for name, task in tasks.items()
+    }
+    results: Dict[str, Any] = {}
+
+    def fall_back(name: str, reason: str):
+        logging.warning(f"Optional call {name} dropped from fan-out: {reason}")
+        results[name] = optional[name]
+
+    try:
+        pending = set(tasks.values())
+        while pending:
+            now = loop.time()
+            expired = {task for task in pending if deadlines[task] <= now}
+            if expired:
+                required = [names[task] for task in expired if names[task] not in optional]
+                if required:
+                    raise FanOutTimeoutError(required)
+                for task in expired:
+                    task.cancel()
+                    fall_back(names[task], "timed out")
+                pending -= expired
+                if not pending:
+                    break
+
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=min(deadlines[task] for task in pending) - now,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                name = names[task]
+                if task.exception() is None:
+                    results[name] = task.result()
+                elif name in optional:
+                    fall_back(name, repr(task.exception()))
+                else:
+                    raise task.exception()
+        return {name: results[name] for name in tasks}
+    finally:
+        unfinished = [task for task in tasks.values() if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        for task in tasks.values():
+            # Mark errors as retrieved once one has been raised or replaced
+            if task.done() and not task.cancelled():
+                task.exception()
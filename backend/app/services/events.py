@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+# Channel names; per-mint channels are "<prefix><mint_address>"
+NEW_TOKENS_CHANNEL = "tokens:new"
+GRADUATIONS_CHANNEL = "tokens:graduations"
+TRADES_CHANNEL_PREFIX = "trades:"
+PRICE_CHANNEL_PREFIX = "price:"
+
+REDIS_CHANNEL_PREFIX = "events:"
+REDIS_RECONNECT_MIN_DELAY = 0.5
+REDIS_RECONNECT_MAX_DELAY = 30.0
+
+def trades_channel(mint_address: str) -> str:
+    return f"{TRADES_CHANNEL_PREFIX}{mint_address}"
+
+def price_channel(mint_address: str) -> str:
+    return f"{PRICE_CHANNEL_PREFIX}{mint_address}"
+
+def is_valid_channel(channel: str) -> bool:
+    if channel in (NEW_TOKENS_CHANNEL, GRADUATIONS_CHANNEL):
+        return True
+    for prefix in (TRADES_CHANNEL_PREFIX, PRICE_CHANNEL_PREFIX):
+        if channel.startswith(prefix) and len(channel) > len(prefix):
+            return True
+    return False
+
+
+class SubscriberLimitError(Exception):
+    """Raised when the process already serves EVENTS_MAX_SUBSCRIBERS clients."""
+
+
+class Subscriber:
+    """One connected client: its channels and a bounded queue of encoded events."""
+
+    def __init__(self, queue_size: int):
+        self.channels: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+        self.closed = False
+
+    async def get(self) -> Optional[str]:
+        """Next encoded event, or None once dropped as a slow consumer."""
+        return await self.queue.get()
+
+    def offer(self, message: str) -> bool:
+        """Queue without blocking; a full queue drops the subscriber."""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Free the backlog and leave a sentinel so the consumer disconnects
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+
+class EventBus:
+    """
+    In-process pub/sub fan-out for live token events.
+
+    Events are encoded once per publish and pushed to every subscriber's
+    bounded queue without awaiting, so one slow client never delays the
+    others; it is dropped instead. With Redis enabled, publishes go through
+    a Redis channel and every worker delivers to its own subscribers.
+    """
+
+    def __init__(self, queue_size: int = 100, max_subscribers: int = 10000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._channels: Dict[str, Set[Subscriber]] = {}
+        self._subscriber_count = 0
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscriber_count
+
+    def subscribe(self, channels: Iterable[str]) -> Subscriber:
+        if self._subscriber_count >= self.max_subscribers:
+            raise SubscriberLimitError("Too many subscribers")
+        subscriber = Subscriber(self.queue_size)
+        self._subscriber_count += 1
+        self.add_channels(subscriber, channels)
+        return subscriber
+
+    def add_channels(self, subscriber: Subscriber, channels: Iterable[str]):
+        for channel in channels:
+            subscriber.channels.add(channel)
+            self._channels.setdefault(channel, set()).add(subscriber)
+
+    def remove_channels(self, subscriber: Subscriber, channels: Iterable[str]):
+        for channel in channels:
+            subscriber.channels.discard(channel)
+            channel_subscribers = self._channels.get(channel)
+            if channel_subscribers is not None:
+                channel_subscribers.discard(subscriber)
+                if not channel_subscribers:
+                    del self._channels[channel]
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Release a subscriber; repeated calls are no-ops."""
+        if subscriber.closed:
+            return
+        subscriber.closed = True
+        self.remove_channels(subscriber, list(subscriber.channels))
+        self._subscriber_count -= 1
+
+    async def publish(self, channel: str, event: str, data: Any):
+        """Publish an event to a channel (across workers when Redis is enabled)."""
+        message = json.dumps({
+            "channel": channel,
+            "event": event,
+            "data": jsonable_encoder(data, custom_encoder={ObjectId: str}),
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+        if self._redis is not None:
+            try:
+                await self._redis.publish(f"{REDIS_CHANNEL_PREFIX}{channel}", message)
+                return
+            except Exception as e:
+                logging.error(f"Redis event publish failed, delivering locally: {e}")
+        self.deliver(channel, message)
+
+    def deliver(self, channel: str, message: str):
+        """Fan an encoded event out to this process's subscribers."""
+        for subscriber in list(self._channels.get(channel, ())):
+            subscriber.offer(message)
+
+    async def start_redis(self, redis_url: str):
+        """Bridge publishes through Redis so every worker sees every event."""
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(redis_url, decode_responses=True)
+        self._listener = asyncio.create_task(self._listen(await self._subscribe()))
+
+    async def _subscribe(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(f"{REDIS_CHANNEL_PREFIX}*")
+        return pubsub
+
+    async def _listen(self, pubsub):
+        """
+        Deliver bridged events. When the subscription drops, subscribe again
+        with exponential backoff; publishes fall back to local delivery
+        until it is back.
+        """
+        prefix_length = len(REDIS_CHANNEL_PREFIX)
+        delay = REDIS_RECONNECT_MIN_DELAY
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await self._subscribe()
+                    logging.info("Event bus re-subscribed to Redis")
+                    delay = REDIS_RECONNECT_MIN_DELAY
+                async for item in pubsub.listen():
+                    if item["type"] == "pmessage":
+                        self.deliver(item["channel"][prefix_length:], item["data"])
+                raise ConnectionError("subscription ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Redis event subscription failed, retrying in {delay:.1f}s: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+                    pubsub = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, REDIS_RECONNECT_MAX_DELAY)
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+
+# Global event bus
+event_bus = EventBus(
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+    max_subscribers=settings.EVENTS_MAX_SUBSCRIBERS,
+)
+
+async def init_event_bus():
+    """Connect the Redis bridge when enabled; local fan-out works without it."""
+    if not settings.EVENTS_REDIS_ENABLED:
+        return
+    try:
+        await event_bus.start_redis(settings.REDIS_URL)
+        logging.info("Event bus bridged through Redis")
+    except Exception as e:
+        logging.error(f"Failed to connect event bus to Redis, using local fan-out: {e}")
+        await event_bus.close()
+
+async def close_event_bus():
+    await event_bus.close()
+
+async def publish(channel: str, event: str, data: Any):
+    """Publish without letting a fan-out failure break the calling write path."""
+    try:
+        await event_bus.publish(channel, event, data)
+    except Exception as e:
+        logging.error(f"Failed to publish {event} on {channel}: {e}")
@@ -0,0 +1,121 @@
+import functools
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, ConfigDict, create_model
+
+from app.models import TokenResponse
+from app.services.serialization import DocumentShaper, model_projection
+
+# Every token field by its JSON (alias) name, in TokenResponse order
+TOKEN_FIELDS: Tuple[str, ...] = tuple(field.alias or name for name, field in TokenResponse.model_fields.items())
+
+FIELD_PRESETS: Dict[str, Tuple[str, ...]] = {
+    # Token grid cards (presets list fields in TokenResponse order)
+    "card": (
+        "_id", "mint_address", "name", "symbol", "image_uri",
+        "current_price", "market_cap", "graduation_status", "created_at",
+    ),
+    # Token page: everything but supply constants and chain verification internals
+    "detail": tuple(
+        key for key in TOKEN_FIELDS
+        if key not in {
+            "total_supply", "decimals", "bonding_curve_supply", "burning_reserve",
+            "last_verified", "block_height_created", "creation_signature", "is_active",
+        }
+    ),
+    "full": TOKEN_FIELDS,
+}
+DEFAULT_PRESET = "full"
+
+FIELDS_DESCRIPTION = (
+    f"Preset ({', '.join(FIELD_PRESETS)}) or comma-separated field names; "
+    "mint_address is always included"
+)
+
+
+class InvalidFieldsError(ValueError):
+    pass
+
+
+class TokenFieldset:
+    """
+    A sparse selection of token fields: the Mongo projection that loads
+    them, the shaper that emits them, and response models generated to
+    match.
+    """
+
+    def __init__(self, name: str, keys: Tuple[str, ...]):
+        self.name = name
+        self.keys = keys
+        self.full = keys == TOKEN_FIELDS
+        self.model: Type[BaseModel] = TokenResponse if self.full else self._token_model(name, keys)
+        self._containers: Dict[Type[BaseModel], Type[BaseModel]] = {}
+        self.projection = model_projection(self.model)
+        self.shaper = DocumentShaper(self.model)
+
+    @staticmethod
+    def _token_model(name: str, keys: Tuple[str, ...]) -> Type[BaseModel]:
+        model_name = f"Token{name.title()}Response" if name in FIELD_PRESETS else "TokenFieldsResponse"
+        definitions = {
+            field_name: (field.annotation, field)
+            for field_name, field in TokenResponse.model_fields.items()
+            if (field.alias or field_name) in keys
+        }
+        return create_model(model_name, __config__=ConfigDict(populate_by_name=True), **definitions)
+
+    def container_model(self, container: Type[BaseModel]) -> Type[BaseModel]:
+        """container (e.g. TokenListResponse) with its tokens list narrowed to this fieldset."""
+        if self.full:
+            return container
+        if container not in self._containers:
+            self._containers[container] = create_model(
+                f"{self.model.__name__[:-len('Response')]}{container.__name__[len('Token'):]}",
+                __base__=container,
+                tokens=(List[self.model], ...),
+            )
+        return self._containers[container]
+
+    def respond(self, payload: Dict[str, Any], fast: bool = False, container: Optional[Type[BaseModel]] = None) -> Any:
+        """
+        Response for a payload shaped by this fieldset: ORJSONResponse when
+        fast, the payload itself for the full fieldset so the route's
+        response_model validates it, or the payload validated against the
+        generated model (wrapped in container for token collections).
+        """
+        if fast:
+            return ORJSONResponse(payload)
+        if self.full:
+            return payload
+        model = self.container_model(container) if container else self.model
+        return JSONResponse(model.model_validate(payload).model_dump(mode="json", by_alias=True))
+
+
+@functools.lru_cache(maxsize=256)
+def _fieldset(name: str, keys: Tuple[str, ...]) -> TokenFieldset:
+    return TokenFieldset(name, keys)
+
+def resolve_fieldset(fields: Optional[str]) -> TokenFieldset:
+    """
+    Fieldset for a fields= value: one preset name, or comma-separated
+    presets and field names. Raises InvalidFieldsError for unknown names.
+    """
+    names = [name.strip() for name in (fields or DEFAULT_PRESET).split(",") if name.strip()]
+    if len(names) == 1 and names[0] in FIELD_PRESETS:
+        return _fieldset(names[0], FIELD_PRESETS[names[0]])
+
+    selected = {"mint_address"}
+    unknown = []
+    for name in names:
+        if name in FIELD_PRESETS:
+            selected.update(FIELD_PRESETS[name])
+        elif name in TOKEN_FIELDS:
+            selected.add(name)
+        else:
+            unknown.append(name)
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(unknown)}")
+
+    keys = tuple(key for key in TOKEN_FIELDS if key in selected)
+    name = next((preset for preset, preset_keys in FIELD_PRESETS.items() if preset_keys == keys), ",".join(keys))
+    return _fieldset(name, keys)
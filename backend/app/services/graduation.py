@@ -0,0 +1,345 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.models import GraduationStatus, GraduationStatusEnum
+from app.services import analytics, events
+from app.services.cache import cache, invalidate_token, ANALYTICS_NAMESPACE
+
+SEED_LIMIT = 1000
+
+
+def eligible_filter() -> Dict[str, Any]:
+    """
+    Tokens that may graduate: flagged eligible, or pending with the
+    threshold already crossed. A graduated token keeps its graduation_date,
+    so it never matches again even if its status is later overwritten.
+    """
+    return {
+        "graduation_status": {"$ne": GraduationStatus.GRADUATED},
+        "graduation_date": None,
+        "$or": [
+            {"graduation_status": GraduationStatus.ELIGIBLE},
+            {"graduation_status": GraduationStatus.PENDING, "market_cap": {"$gte": settings.GRADUATION_THRESHOLD}},
+        ],
+    }
+
+def guarded_set(fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Update pipeline that sets fields, except that graduation_status only
+    moves to ELIGIBLE from PENDING, so a metric update racing a graduation
+    can never pull a graduated token back into the monitor.
+    """
+    stage = {field: {"$literal": value} for field, value in fields.items()}
+    if fields.get("graduation_status") == GraduationStatus.ELIGIBLE:
+        stage["graduation_status"] = {"$cond": [
+            {"$eq": ["$graduation_status", GraduationStatus.PENDING.value]},
+            GraduationStatus.ELIGIBLE.value,
+            "$graduation_status",
+        ]}
+    return [{"$set": stage}]
+
+def pool_data(raydium_pool_id: Optional[str]) -> Dict[str, Any]:
+    return {
+        "pool_id": raydium_pool_id,
+        "initial_sol_liquidity": 0,  # To be updated
+        "initial_token_liquidity": 0,  # To be updated
+        "pool_creation_signature": "",  # To be updated
+    }
+
+async def write_record(db, mint_address: str, update: Dict[str, Any]):
+    """Upsert a graduation record on mint_address, retrying transient failures with backoff."""
+    delay = settings.GRADUATION_RECORD_BACKOFF
+    for attempt in range(1, settings.GRADUATION_RECORD_RETRIES + 1):
+        try:
+            await db.graduations.update_one({"mint_address": mint_address}, update, upsert=True)
+            return
+        except Exception as e:
+            if attempt == settings.GRADUATION_RECORD_RETRIES:
+                logging.error(f"Giving up on graduation record for {mint_address}: {e}")
+                raise
+            logging.warning(f"Graduation record write for {mint_address} failed (attempt {attempt}): {e}")
+            await asyncio.sleep(delay)
+            delay *= 2
+
+async def record(db, mint_address: str, update: Dict[str, Any]):
+    """Hand a record write to the monitor's worker queue, or write it inline without one."""
+    if monitor is not None and monitor.enqueue_record(mint_address, update):
+        return
+    await write_record(db, mint_address, update)
+
+async def graduate(
+    db,
+    mint_address: str,
+    raydium_pool_id: Optional[str] = None,
+    graduation_fee: float = 0.0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Atomically move an eligible token to graduated and return its graduation
+    record, or None if it is not eligible or another caller got there first.
+
+    The status condition in find_one_and_update makes this the single point
+    that decides a graduation, so concurrent callers and API workers cannot
+    double-graduate. Without a pool id the record stays pending until one is
+    attached.
+    """
+    graduation_date = datetime.utcnow()
+    token_doc = await db.tokens.find_one_and_update(
+        {"mint_address": mint_address, **eligible_filter()},
+        {
+            "$set": {
+                "graduation_status": GraduationStatus.GRADUATED,
+                "graduation_date": graduation_date,
+                "raydium_pool_id": raydium_pool_id,
+                "updated_at": graduation_date,
+            }
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    if token_doc is None:
+        return None
+
+    graduation_doc = {
+        "mint_address": mint_address,
+        "graduation_date": graduation_date,
+        "market_cap_at_graduation": token_doc.get("market_cap", 0),
+        "total_volume_at_graduation": token_doc.get("total_volume", 0),
+        "raydium_pool_data": pool_data(raydium_pool_id),
+        "graduation_fee_collected": graduation_fee,
+        "status": GraduationStatusEnum.SUCCESSFUL if raydium_pool_id else GraduationStatusEnum.PENDING,
+    }
+    # A pool attached meanwhile has already written the fields it owns
+    await record(db, mint_address, {"$setOnInsert": graduation_doc})
+
+    await analytics.record_graduation(db, graduation_fee)
+    await invalidate_token(mint_address)
+    await cache.invalidate_namespace(ANALYTICS_NAMESPACE)
+    await events.publish(events.GRADUATIONS_CHANNEL, "token_graduated", graduation_doc)
+    return graduation_doc
+
+async def attach_pool(
+    db,
+    mint_address: str,
+    raydium_pool_id: str,
+    graduation_fee: float = 0.0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Record the Raydium pool for a token graduated without one. Conditional
+    on the pool id still being unset, so it applies at most once.
+    """
+    token_doc = await db.tokens.find_one_and_update(
+        {"mint_address": mint_address, "graduation_status": GraduationStatus.GRADUATED, "raydium_pool_id": None},
+        {"$set": {"raydium_pool_id": raydium_pool_id, "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if token_doc is None:
+        return None
+
+    completed = {
+        "raydium_pool_data": pool_data(raydium_pool_id),
+        "graduation_fee_collected": graduation_fee,
+        "status": GraduationStatusEnum.SUCCESSFUL,
+    }
+    snapshot = {
+        "mint_address": mint_address,
+        "graduation_date": token_doc.get("graduation_date") or datetime.utcnow(),
+        "market_cap_at_graduation": token_doc.get("market_cap", 0),
+        "total_volume_at_graduation": token_doc.get("total_volume", 0),
+    }
+    await record(db, mint_address, {"$set": completed, "$setOnInsert": snapshot})
+
+    await analytics.increment_counters(db, platform_revenue=graduation_fee)
+    await invalidate_token(mint_address)
+    await cache.invalidate_namespace(ANALYTICS_NAMESPACE)
+    graduation_doc = {**snapshot, **completed}
+    await events.publish(events.GRADUATIONS_CHANNEL, "graduation_updated", graduation_doc)
+    return graduation_doc
+
+
+class GraduationMonitor:
+    """
+    Detects threshold crossings from the trade stream and graduates tokens
+    off the request path.
+
+    Tokens sit in a min-heap keyed by distance to GRADUATION_THRESHOLD, so a
+    crossing is just the heap top reaching zero. observe() wakes the
+    graduation loop immediately, and a periodic sweep of the database
+    catches anything updated elsewhere. Graduation records are written by a
+    separate worker through a bounded queue with retries.
+    """
+
+    def __init__(self, db, threshold: float, sweep_interval: float, queue_size: int):
+        self.db = db
+        self.threshold = threshold
+        self.sweep_interval = sweep_interval
+        # (distance to threshold, mint); stale entries are skipped lazily
+        self._heap: List[Tuple[float, str]] = []
+        self._market_caps: Dict[str, float] = {}
+        self._wake = asyncio.Event()
+        self._records: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: List[asyncio.Task] = []
+
+    def observe(self, mint_address: str, market_cap: Optional[float], status: Optional[str]):
+        if status == GraduationStatus.GRADUATED:
+            self._market_caps.pop(mint_address, None)
+            return
+        market_cap = market_cap or 0.0
+        if self._market_caps.get(mint_address) == market_cap:
+            return
+        self._market_caps[mint_address] = market_cap
+        heapq.heappush(self._heap, (self.threshold - market_cap, mint_address))
+        if market_cap >= self.threshold:
+            self._wake.set()
+
+        # Drop stale entries once they dominate the heap
+        if len(self._heap) > 2 * len(self._market_caps) + 1024:
+            self._heap = [(self.threshold - cap, mint) for mint, cap in self._market_caps.items()]
+            heapq.heapify(self._heap)
+
+    def crossed(self) -> List[str]:
+        """
+        Pop every tracked token at or past the threshold. They stay tracked
+        until resolve(); requeue() puts back one whose graduation failed.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= 0:
+            distance, mint_address = heapq.heappop(self._heap)
+            if self._market_caps.get(mint_address) == self.threshold - distance:
+                due.append(mint_address)
+        return due
+
+    def resolve(self, mint_address: str):
+        """Stop tracking a token once graduate() has decided it."""
+        self._market_caps.pop(mint_address, None)
+
+    def requeue(self, mint_address: str):
+        market_cap = self._market_caps.get(mint_address)
+        if market_cap is not None:
+            heapq.heappush(self._heap, (self.threshold - market_cap, mint_address))
+
+    def nearest(self, limit: int) -> List[Tuple[str, float]]:
+        """Tracked tokens closest to graduating, as (mint, distance)."""
+        current = [(distance, mint) for distance, mint in self._heap if self._market_caps.get(mint) == self.threshold - distance]
+        return [(mint, distance) for distance, mint in heapq.nsmallest(limit, current)]
+
+    def enqueue_record(self, mint_address: str, update: Dict[str, Any]) -> bool:
+        try:
+            self._records.put_nowait((mint_address, update))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def sweep(self):
+        """Track pending and eligible tokens nearest the threshold, using the (graduation_status, market_cap) index."""
+        cursor = self.db.tokens.find(
+            {"graduation_status": {"$in": [GraduationStatus.PENDING, GraduationStatus.ELIGIBLE]}, "graduation_date": None},
+            {"mint_address": 1, "market_cap": 1, "graduation_status": 1}
+        ).sort("market_cap", -1).limit(SEED_LIMIT)
+        async for token_doc in cursor:
+            market_cap = token_doc.get("market_cap") or 0.0
+            if token_doc["graduation_status"] == GraduationStatus.ELIGIBLE:
+                # Eligible tokens graduate regardless of later price moves
+                market_cap = max(market_cap, self.threshold)
+            self.observe(token_doc["mint_address"], market_cap, token_doc["graduation_status"])
+
+    async def run_graduations(self):
+        last_sweep = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if loop.time() - last_sweep >= self.sweep_interval:
+                    await self.sweep()
+                    last_sweep = loop.time()
+                for mint_address in self.crossed():
+                    try:
+                        graduation_doc = await graduate(self.db, mint_address)
+                    except asyncio.CancelledError:
+                        self.requeue(mint_address)
+                        raise
+                    except Exception as e:
+                        # Retried on the next wake or sweep interval
+                        logging.error(f"Graduation of {mint_address} failed: {e}")
+                        self.requeue(mint_address)
+                        continue
+                    # Graduated now, or no longer eligible (graduated elsewhere): either way decided
+                    self.resolve(mint_address)
+                    if graduation_doc:
+                        logging.info(f"Graduated {mint_address} at market cap {graduation_doc['market_cap_at_graduation']}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Graduation monitor failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.sweep_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def run_records(self):
+        while True:
+            mint_address, update = await self._records.get()
+            try:
+                await write_record(self.db, mint_address, update)
+            except Exception:
+                # write_record has already logged the final failure
+                pass
+            finally:
+                self._records.task_done()
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self.run_graduations()),
+            asyncio.create_task(self.run_records()),
+        ]
+
+    async def stop(self):
+        # Let queued records land before shutting down
+        try:
+            await asyncio.wait_for(self._records.join(), timeout=5)
+        except asyncio.TimeoutError:
+            logging.warning(f"Dropping {self._records.qsize()} unwritten graduation records on shutdown")
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+
+# Global monitor
+monitor: Optional[GraduationMonitor] = None
+
+def observe_tokens(token_docs: List[Dict[str, Any]]):
+    """Feed updated token documents to the monitor, if it is running."""
+    if monitor is None:
+        return
+    for token_doc in token_docs:
+        monitor.observe(token_doc["mint_address"], token_doc.get("market_cap"), token_doc.get("graduation_status"))
+
+async def start_graduation_monitor(db):
+    global monitor
+
+    if not settings.GRADUATION_MONITOR_ENABLED:
+        return
+    monitor = GraduationMonitor(
+        db,
+        threshold=settings.GRADUATION_THRESHOLD,
+        sweep_interval=settings.GRADUATION_SWEEP_INTERVAL,
+        queue_size=settings.GRADUATION_QUEUE_SIZE,
+    )
+    monitor.start()
+
+async def stop_graduation_monitor():
+    global monitor
+
+    if monitor:
+        await monitor.stop()
+        monitor = None
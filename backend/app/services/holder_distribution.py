@@ -0,0 +1,308 @@
+import asyncio
+import base64
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services.cache import invalidate_tokens
+from app.services.indexer import b58decode
+from app.services.leases import Lease
+from app.services.solana_rpc import SolanaRPCClient
+
+SPL_TOKEN_PROGRAM_ID = "TokenkegQfeYyiNwAJbNbLVi8i6VWMDzsuFG4oZ9S8Hz"
+TOKEN_ACCOUNT_SIZE = 165
+# SPL token account layout: mint (32) | owner (32) | amount (u64 LE) | ...
+MINT_OFFSET = 0
+OWNER_OFFSET = 32
+ACCOUNT_SLICE = np.dtype([("owner", "S32"), ("amount", "<u8")])
+
+SOURCES = ("program_accounts", "largest_accounts")
+TOP_HOLDERS = 10
+PERCENTILES = (50, 90, 99)
+# Holder buckets by share of circulating supply: <0.01%, 0.01-0.1%, 0.1-1%, 1-10%, >=10%
+SHARE_BUCKET_EDGES = np.array([0.0001, 0.001, 0.01, 0.1])
+
+
+class RateBudget:
+    """
+    Token bucket shared by concurrent callers: acquire() returns once a
+    call fits within rate per second, allowing bursts of up to burst calls.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._updated is not None:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                # Holding the lock while waiting keeps callers in arrival order
+                await asyncio.sleep(-self._tokens / self.rate)
+
+
+def owner_balances(raw: bytes, excluded_owners: Iterable[bytes] = ()) -> np.ndarray:
+    """
+    Per-owner balances from concatenated (owner, amount) token account
+    slices. A wallet's several accounts for one mint are summed; empty
+    accounts and excluded owners are dropped.
+    """
+    records = np.frombuffer(raw, dtype=ACCOUNT_SLICE)
+    records = records[records["amount"] > 0]
+    owners, inverse = np.unique(records["owner"], return_inverse=True)
+    balances = np.zeros(owners.size, dtype=np.uint64)
+    np.add.at(balances, inverse, records["amount"])
+    excluded = np.array(list(excluded_owners), dtype="S32")
+    if excluded.size:
+        balances = balances[~np.isin(owners, excluded)]
+    return balances
+
+def distribution_stats(balances: np.ndarray) -> Dict[str, Any]:
+    """
+    Holder count, top-10 concentration, Gini coefficient, balance
+    percentiles and share-of-supply buckets for per-holder balances in
+    base units, all computed over the sorted array in a few vectorized
+    passes.
+    """
+    held = np.sort(balances[balances > 0])
+    count = int(held.size)
+    circulating = int(held.sum(dtype=np.uint64)) if count else 0
+    buckets = np.zeros(SHARE_BUCKET_EDGES.size + 1, dtype=np.int64)
+    if not count:
+        return {
+            "holder_count": 0,
+            "circulating": 0,
+            "top10_share": None,
+            "gini": None,
+            "percentiles": {},
+            "share_buckets": buckets.tolist(),
+        }
+
+    values = held.astype(np.float64)
+    total = values.sum()
+    shares = values / total
+    # Gini over ascending values: 2 * sum(rank * x) / (n * sum(x)) - (n + 1) / n
+    gini = 2.0 * np.dot(np.arange(1, count + 1), values) / (count * total) - (count + 1) / count
+    buckets += np.bincount(np.searchsorted(SHARE_BUCKET_EDGES, shares, side="right"), minlength=buckets.size)
+    return {
+        "holder_count": count,
+        "circulating": circulating,
+        "top10_share": float(shares[-TOP_HOLDERS:].sum()),
+        "gini": float(max(gini, 0.0)),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        "share_buckets": buckets.tolist(),
+    }
+
+
+class HolderSnapshotJob:
+    """
+    Periodic holder-distribution snapshots from chain data.
+
+    Every active token's SPL accounts are fetched with getProgramAccounts
+    (a dataSlice keeps only owner and amount), or, on nodes that disable
+    it, with getTokenLargestAccounts, which only sees the 20 largest
+    accounts and so yields incomplete snapshots. Mints are processed up to
+    concurrency at a time and every RPC call draws on one RateBudget.
+    Complete snapshots also correct tokens.holder_count.
+
+    With a lease, periodic passes only run in the worker holding it.
+    """
+
+    def __init__(
+        self,
+        db,
+        rpc: SolanaRPCClient,
+        source: str = "program_accounts",
+        interval: float = 3600,
+        concurrency: int = 32,
+        batch_size: int = 500,
+        rate: float = 20,
+        burst: int = 40,
+        excluded_owners: Iterable[str] = (),
+        lease: Optional[Lease] = None,
+    ):
+        if source not in SOURCES:
+            raise ValueError(f"Unknown holder snapshot source: {source}")
+        self.db = db
+        self.rpc = rpc
+        self.source = source
+        self.interval = interval
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.budget = RateBudget(rate, burst)
+        # Platform wallets hold the curve and burn allocations, not holders' tokens
+        self.excluded_owners = {owner for owner in excluded_owners if owner}
+        self._excluded_bytes = [b58decode(owner) for owner in self.excluded_owners]
+        self.lease = lease
+        self._task: Optional[asyncio.Task] = None
+
+    async def fetch_program_accounts(self, mint_address: str) -> np.ndarray:
+        await self.budget.acquire()
+        accounts = await self.rpc.call("getProgramAccounts", [
+            SPL_TOKEN_PROGRAM_ID,
+            {
+                "encoding": "base64",
+                "dataSlice": {"offset": OWNER_OFFSET, "length": ACCOUNT_SLICE.itemsize},
+                "filters": [
+                    {"dataSize": TOKEN_ACCOUNT_SIZE},
+                    {"memcmp": {"offset": MINT_OFFSET, "bytes": mint_address}},
+                ],
+            },
+        ])
+        raw = b"".join(base64.b64decode(account["account"]["data"][0]) for account in accounts)
+        return owner_balances(raw, self._excluded_bytes)
+
+    async def fetch_largest_accounts(self, mint_address: str) -> np.ndarray:
+        await self.budget.acquire()
+        result = await self.rpc.call("getTokenLargestAccounts", [mint_address])
+        addresses = [account["address"] for account in result["value"]]
+        if not addresses:
+            return np.zeros(0, dtype=np.uint64)
+
+        # Resolve owners so a wallet's accounts are summed and platform wallets excluded
+        await self.budget.acquire()
+        accounts = await self.rpc.get_multiple_accounts(addresses, chunk_size=len(addresses))
+        balances: Dict[str, int] = {}
+        for account in accounts:
+            if account is None:
+                continue
+            info = account["data"]["parsed"]["info"]
+            if info["owner"] not in self.excluded_owners:
+                balances[info["owner"]] = balances.get(info["owner"], 0) + int(info["tokenAmount"]["amount"])
+        return np.fromiter(balances.values(), dtype=np.uint64, count=len(balances))
+
+    async def snapshot(self, mint_address: str) -> Dict[str, Any]:
+        """One holder-distribution snapshot for mint_address."""
+        if self.source == "program_accounts":
+            balances = await self.fetch_program_accounts(mint_address)
+        else:
+            balances = await self.fetch_largest_accounts(mint_address)
+        return {
+            "mint_address": mint_address,
+            "taken_at": datetime.utcnow(),
+            "source": self.source,
+            "complete": self.source == "program_accounts",
+            **distribution_stats(balances),
+        }
+
+    async def snapshot_many(self, mint_addresses: List[str]) -> List[Dict[str, Any]]:
+        """Snapshot mints concurrently; failures are logged and left out."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def take(mint_address: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self.snapshot(mint_address)
+                except Exception as e:
+                    logging.warning(f"Holder snapshot failed for {mint_address}: {e}")
+                    return None
+
+        results = await asyncio.gather(*(take(mint_address) for mint_address in mint_addresses))
+        return [snapshot for snapshot in results if snapshot]
+
+    async def store(self, snapshots: List[Dict[str, Any]]):
+        if not snapshots:
+            return
+        await self.db.holder_snapshots.insert_many([dict(snapshot) for snapshot in snapshots], ordered=False)
+        complete = [snapshot for snapshot in snapshots if snapshot["complete"]]
+        if complete:
+            await self.db.tokens.bulk_write(
+                [
+                    UpdateOne({"mint_address": snapshot["mint_address"]}, {"$set": {"holder_count": snapshot["holder_count"]}})
+                    for snapshot in complete
+                ],
+                ordered=False,
+            )
+            await invalidate_tokens(snapshot["mint_address"] for snapshot in complete)
+
+    async def run_once(self, mint_addresses: Optional[List[str]] = None) -> int:
+        """Snapshot the given mints, or every active token, batch by batch; returns snapshots stored."""
+        if mint_addresses is None:
+            cursor = self.db.tokens.find({"is_active": True}, {"_id": 0, "mint_address": 1})
+            mint_addresses = [token_doc["mint_address"] async for token_doc in cursor]
+
+        stored = 0
+        for start in range(0, len(mint_addresses), self.batch_size):
+            snapshots = await self.snapshot_many(mint_addresses[start:start + self.batch_size])
+            await self.store(snapshots)
+            stored += len(snapshots)
+        return stored
+
+    async def run_forever(self):
+        while True:
+            try:
+                if self.lease is None or await self.lease.acquire():
+                    stored = await self.run_once()
+                    logging.info(f"Stored {stored} holder snapshots")
+                    if self.lease is not None:
+                        # Renew so the lease outlasts the wait for the next pass
+                        await self.lease.acquire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Holder snapshot pass failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lease is not None:
+            await self.lease.release()
+
+
+# Global snapshot job
+job: Optional[HolderSnapshotJob] = None
+
+def create_job(db, rpc: SolanaRPCClient, **overrides) -> HolderSnapshotJob:
+    """A HolderSnapshotJob configured from settings, with keyword overrides."""
+    options = {
+        "source": settings.HOLDER_SNAPSHOT_SOURCE,
+        "interval": settings.HOLDER_SNAPSHOT_INTERVAL,
+        "concurrency": settings.HOLDER_SNAPSHOT_CONCURRENCY,
+        "batch_size": settings.HOLDER_SNAPSHOT_BATCH_SIZE,
+        "rate": settings.HOLDER_SNAPSHOT_RPC_RATE,
+        "burst": settings.HOLDER_SNAPSHOT_RPC_BURST,
+        "excluded_owners": [settings.ADMIN_WALLET_ADDRESS, settings.ADMIN_BURNING_WALLET_ADDRESS],
+    }
+    options.update(overrides)
+    return HolderSnapshotJob(db, rpc, **options)
+
+async def start_holder_snapshots(db, rpc: SolanaRPCClient):
+    """
+    Start periodic holder snapshots when enabled in settings. Every worker
+    starts the job, but a lease lets only one of them take snapshots.
+    """
+    global job
+
+    if not settings.HOLDER_SNAPSHOTS_ENABLED:
+        return
+    # Covers a pass plus the wait for the next one, renewed at both ends
+    lease = Lease(db, "holder_snapshots", ttl=2 * settings.HOLDER_SNAPSHOT_INTERVAL)
+    job = create_job(db, rpc, lease=lease)
+    job.start()
+
+async def stop_holder_snapshots():
+    global job
+
+    if job:
+        await job.stop()
+        job = None
@@ -0,0 +1,158 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.models import TransactionType
+from app.services import replay_guard
+
+def trade_update(trade: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Atomic update folding one trade into a (mint, wallet) holding.
+
+    Only $inc'd totals are stored: the average cost basis and realized PnL
+    are derived from bought/sold amounts on read, so concurrent trades for
+    the same wallet never need a read-modify-write.
+    """
+    token_amount = trade["token_amount"]
+    sol_amount = trade.get("sol_amount") or 0.0
+    if trade["transaction_type"] == TransactionType.SELL:
+        increments = {"balance": -token_amount, "sold_tokens": token_amount, "sold_sol": sol_amount}
+    else:
+        # The creator's initial purchase counts as a buy
+        increments = {"balance": token_amount, "bought_tokens": token_amount, "bought_sol": sol_amount}
+    increments["trade_count"] = 1
+    return {
+        "$inc": increments,
+        "$min": {"first_trade_at": trade["timestamp"]},
+        "$max": {"last_trade_at": trade["timestamp"]},
+        "$set": {"updated_at": datetime.utcnow()},
+    }
+
+async def apply_trade(db, trade: Dict[str, Any]) -> int:
+    """
+    Apply a trade to the trader's holding and return the change in holder
+    count (+1 on a first buy, -1 when a wallet sells out, otherwise 0).
+
+    A trade the holding already recorded is not applied again, and its
+    delta is read back from the stored balance. That is only needed when
+    the token update for the trade failed, and then the trade is still the
+    holding's latest: a mint's trades are applied in order and stop at the
+    first failure.
+    """
+    update = trade_update(trade)
+    token_delta = update["$inc"]["balance"]
+    key = {"mint_address": trade["mint_address"], "wallet": trade["user_wallet"]}
+    signatures = [trade["transaction_signature"]]
+    try:
+        holding = await db.holdings.find_one_and_update(
+            {**key, **replay_guard.unapplied(signatures)},
+            {**update, **replay_guard.record(signatures)},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        holding = await db.holdings.find_one(key)
+    balance_after = holding["balance"]
+    balance_before = balance_after - token_delta
+    if balance_before <= 0 < balance_after:
+        return 1
+    if balance_after <= 0 < balance_before:
+        return -1
+    return 0
+
+def value_position(holding: Dict[str, Any], token_doc: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Value one holding at the token's current price, with average-cost
+    basis. Cost fields are None for holdings recorded before cost
+    tracking, until rebuild_holdings is run.
+    """
+    token_doc = token_doc or {}
+    unit = 10 ** token_doc.get("decimals", 9)
+    balance_tokens = holding["balance"] / unit
+    current_price = token_doc.get("current_price")
+    value_sol = balance_tokens * current_price if current_price is not None else None
+
+    cost_basis_sol = average_cost = unrealized_pnl_sol = realized_pnl_sol = None
+    bought_tokens = holding.get("bought_tokens")
+    if bought_tokens:
+        average_cost = holding.get("bought_sol", 0.0) / (bought_tokens / unit)
+        cost_basis_sol = balance_tokens * average_cost
+        realized_pnl_sol = holding.get("sold_sol", 0.0) - holding.get("sold_tokens", 0) / unit * average_cost
+        if value_sol is not None:
+            unrealized_pnl_sol = value_sol - cost_basis_sol
+
+    return {
+        "mint_address": holding["mint_address"],
+        "name": token_doc.get("name"),
+        "symbol": token_doc.get("symbol"),
+        "image_uri": token_doc.get("image_uri"),
+        "balance": holding["balance"],
+        "balance_tokens": balance_tokens,
+        "current_price": current_price,
+        "value_sol": value_sol,
+        "value_usd": value_sol * settings.SOL_PRICE_USD if value_sol is not None else None,
+        "average_cost": average_cost,
+        "cost_basis_sol": cost_basis_sol,
+        "unrealized_pnl_sol": unrealized_pnl_sol,
+        "realized_pnl_sol": realized_pnl_sol,
+        "last_trade_at": holding.get("last_trade_at"),
+    }
+
+def _sum(values: List[Optional[float]]) -> Optional[float]:
+    known = [value for value in values if value is not None]
+    return sum(known) if known else None
+
+def summarize(positions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Portfolio totals; positions without a price or cost basis are left out of the matching sums."""
+    return {
+        "total_value_sol": _sum([position["value_sol"] for position in positions]) or 0.0,
+        "total_value_usd": _sum([position["value_usd"] for position in positions]) or 0.0,
+        "total_cost_basis_sol": _sum([position["cost_basis_sol"] for position in positions]),
+        "unrealized_pnl_sol": _sum([position["unrealized_pnl_sol"] for position in positions]),
+        "realized_pnl_sol": _sum([position["realized_pnl_sol"] for position in positions]),
+    }
+
+async def rebuild_holdings(db):
+    """
+    Recompute every holding from db.transactions in one server-side
+    aggregation merged into db.holdings. Backfills cost tracking for
+    holdings that predate it; run with the indexer stopped so no trade is
+    applied twice.
+    """
+    is_sell = {"$eq": ["$transaction_type", TransactionType.SELL.value]}
+    pipeline = [
+        {"$group": {
+            "_id": {"mint_address": "$mint_address", "wallet": "$user_wallet"},
+            "bought_tokens": {"$sum": {"$cond": [is_sell, 0, "$token_amount"]}},
+            "bought_sol": {"$sum": {"$cond": [is_sell, 0, "$sol_amount"]}},
+            "sold_tokens": {"$sum": {"$cond": [is_sell, "$token_amount", 0]}},
+            "sold_sol": {"$sum": {"$cond": [is_sell, "$sol_amount", 0]}},
+            "trade_count": {"$sum": 1},
+            "first_trade_at": {"$min": "$timestamp"},
+            "last_trade_at": {"$max": "$timestamp"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "mint_address": "$_id.mint_address",
+            "wallet": "$_id.wallet",
+            "balance": {"$subtract": ["$bought_tokens", "$sold_tokens"]},
+            "bought_tokens": 1,
+            "bought_sol": 1,
+            "sold_tokens": 1,
+            "sold_sol": 1,
+            "trade_count": 1,
+            "first_trade_at": 1,
+            "last_trade_at": 1,
+            "updated_at": "$$NOW",
+        }},
+        {"$merge": {
+            "into": "holdings",
+            "on": ["mint_address", "wallet"],
+            "whenMatched": "merge",
+            "whenNotMatched": "insert",
+        }},
+    ]
+    await db.transactions.aggregate(pipeline).to_list(None)
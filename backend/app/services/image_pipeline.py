@@ -0,0 +1,133 @@
+import asyncio
+import io
+import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from app.config import settings
+
+# Longest edge per variant: token grid thumbnail, detail page, full size
+VARIANT_SIZES = {
+    "thumbnail": 256,
+    "medium": 512,
+    "full": 1024,
+}
+
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "avif": ("AVIF", "image/avif", "avif"),
+}
+
+
+class ImageProcessingError(Exception):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+class ImagePipelineBusyError(Exception):
+    """Raised when the processing queue is full; callers should retry later."""
+
+
+def avif_supported() -> bool:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            return bool(features.check("avif"))
+        except Exception:
+            return False
+
+def output_formats() -> List[Tuple[str, str, str]]:
+    """
+    (PIL format, content type, extension) for every encoding to produce,
+    preferred first. AVIF is only produced when Pillow supports it, and
+    always alongside WebP for clients that do not accept it.
+    """
+    if settings.IMAGE_OUTPUT_FORMAT == "avif" and avif_supported():
+        return [OUTPUT_FORMATS["avif"], OUTPUT_FORMATS["webp"]]
+    return [OUTPUT_FORMATS["webp"]]
+
+def render_variants(path: str, pil_formats: List[str], quality: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Decode the spooled upload at path once and encode every size variant
+    in every format; encoded bytes are keyed by PIL format name.
+    Runs in a worker process, so it must stay a picklable top-level function.
+    """
+    try:
+        image = Image.open(path)
+        image.load()
+    except Exception as e:
+        raise ImageProcessingError(f"Invalid image: {e}")
+
+    image = ImageOps.exif_transpose(image)
+    # WebP/AVIF keep alpha, so only palette/odd modes need converting
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+
+    variants = {}
+    # Largest first so each smaller variant resamples an already reduced image
+    for name, edge in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+        if image.width > edge or image.height > edge:
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        encodings = {}
+        for pil_format in pil_formats:
+            buffer = io.BytesIO()
+            image.save(buffer, format=pil_format, quality=quality)
+            encodings[pil_format] = buffer.getvalue()
+        variants[name] = {"data": encodings, "width": image.width, "height": image.height}
+    return variants
+
+
+class ImagePipeline:
+    """
+    Bounded front door to a process pool for image decoding and encoding.
+
+    At most queue_size images are accepted at once (in the pool or waiting
+    for it). Past that, submit fails fast with ImagePipelineBusyError, so
+    bursts turn into 503s and do not pile up memory in the API worker.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, path: str) -> Dict[str, Dict[str, Any]]:
+        if self._pending >= self.queue_size:
+            raise ImagePipelineBusyError("Image processing queue is full")
+        if self._executor is None:
+            self.start()
+
+        pil_formats = [pil_format for pil_format, _, _ in output_formats()]
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, render_variants, path, pil_formats, settings.IMAGE_QUALITY
+            )
+        finally:
+            self._pending -= 1
+
+
+# Global pipeline
+image_pipeline = ImagePipeline(
+    workers=settings.IMAGE_WORKERS,
+    queue_size=settings.IMAGE_QUEUE_SIZE,
+)
+
+async def start_image_pipeline():
+    image_pipeline.start()
+    logging.info(f"Image pipeline started with {settings.IMAGE_WORKERS} workers")
+
+async def stop_image_pipeline():
+    image_pipeline.shutdown()
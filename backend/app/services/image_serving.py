@@ -0,0 +1,249 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+
+from app.config import settings
+from app.services.cache import LocalLRU
+from app.services.storage import get_storage, immutable_cache_control
+
+ORIGINAL_VARIANT = "original"
+# Formats only served when the client names them; "image/*" is not enough
+# because older browsers send it without being able to decode them
+EXPLICIT_ONLY_TYPES = {"image/avif", "image/webp"}
+NOT_FOUND_TTL = 30.0
+
+
+class RangeNotSatisfiableError(Exception):
+    """Raised for a byte range that lies outside the file."""
+
+
+def image_files(image_doc: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Variant name to candidate files, preferred first. Images uploaded before
+    variants existed have a single original file. Files written before the
+    storage backend existed carry a file_path under UPLOAD_DIR; its basename
+    is their key.
+    """
+    files = image_doc.get("files") or {
+        ORIGINAL_VARIANT: [{
+            "content_type": image_doc["content_type"],
+            "file_path": image_doc["file_path"],
+            "size": image_doc["size"],
+        }]
+    }
+    return {
+        variant: [
+            {
+                "key": candidate.get("key") or os.path.basename(candidate["file_path"]),
+                "content_type": candidate["content_type"],
+                "size": candidate["size"],
+            }
+            for candidate in candidates
+        ]
+        for variant, candidates in files.items()
+    }
+
+def etag_for(image_hash: str, variant: str, content_type: str) -> str:
+    """Strong validator: the bytes behind a content address never change."""
+    return f'"{image_hash}-{variant}-{content_type.split("/")[-1]}"'
+
+
+class ImageMetadataCache:
+    """
+    Per-worker LRU of uri -> servable files. Images are content-addressed
+    and never rewritten, so entries need no invalidation and steady-state
+    requests never reach the database.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.local = LocalLRU(max_entries)
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, db, uri: str) -> Optional[Dict[str, Any]]:
+        is_hit, meta = self.local.get(uri)
+        if is_hit:
+            return meta
+
+        future = self._inflight.get(uri)
+        if future is None:
+            future = asyncio.ensure_future(self._load(db, uri))
+            self._inflight[uri] = future
+            future.add_done_callback(lambda _: self._inflight.pop(uri, None))
+        return await asyncio.shield(future)
+
+    async def _load(self, db, uri: str) -> Optional[Dict[str, Any]]:
+        image_doc = await db.images.find_one(
+            {"uri": uri},
+            {"hash": 1, "files": 1, "content_type": 1, "file_path": 1, "size": 1}
+        )
+        meta = None
+        if image_doc:
+            storage = await get_storage()
+            files = {}
+            for variant, candidates in image_files(image_doc).items():
+                present = await asyncio.gather(*(storage.exists(candidate["key"]) for candidate in candidates))
+                available = [
+                    {**candidate, "etag": etag_for(image_doc.get("hash", uri), variant, candidate["content_type"])}
+                    for candidate, is_present in zip(candidates, present)
+                    if is_present
+                ]
+                if available:
+                    files[variant] = available
+            meta = {"files": files} if files else None
+        self.local.set(uri, meta, self.ttl if meta else NOT_FOUND_TTL)
+        return meta
+
+
+def parse_accept(accept: Optional[str]) -> Dict[str, float]:
+    """Media range -> q-value."""
+    ranges = {}
+    for part in (accept or "").split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        ranges[media_range.lower()] = quality
+    return ranges
+
+def is_acceptable(content_type: str, ranges: Dict[str, float]) -> bool:
+    if not ranges:
+        return True
+    if content_type in ranges:
+        return ranges[content_type] > 0
+    if content_type in EXPLICIT_ONLY_TYPES:
+        return False
+    wildcard = ranges.get(f"{content_type.split('/')[0]}/*", ranges.get("*/*", 0.0))
+    return wildcard > 0
+
+def negotiate(meta: Dict[str, Any], variant: str, accept: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Best file for variant under the Accept header: stored encodings in
+    preference order, then the original upload. Falls back to the last
+    candidate rather than answering 406.
+    """
+    files = meta["files"]
+    candidates = list(files.get(variant, []))
+    if variant != ORIGINAL_VARIANT:
+        candidates += files.get(ORIGINAL_VARIANT, [])
+    if not candidates:
+        # Nothing stored for this variant or the original: serve what is left
+        candidates = [candidate for group in files.values() for candidate in group]
+    if not candidates:
+        return None
+
+    ranges = parse_accept(accept)
+    for candidate in candidates:
+        if is_acceptable(candidate["content_type"], ranges):
+            return candidate
+    return candidates[-1]
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single "bytes=" range, or None to send the
+    whole file (no header, or several ranges, which we do not combine).
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            suffix = int(end_text)
+            if suffix == 0:
+                raise RangeNotSatisfiableError(spec)
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise RangeNotSatisfiableError(spec)
+    return start, min(end, size - 1)
+
+async def image_response(
+    image_file: Dict[str, Any],
+    if_none_match: Optional[str] = None,
+    range_header: Optional[str] = None,
+    if_range: Optional[str] = None,
+) -> Response:
+    """
+    Response for one stored image file: 304 on a matching ETag, otherwise
+    a redirect to the object store when it serves clients directly, or the
+    bytes (200, 206 or 416) with immutable caching headers.
+    """
+    headers = {
+        "ETag": image_file["etag"],
+        "Cache-Control": immutable_cache_control(),
+        "Vary": "Accept",
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(if_none_match, image_file["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    storage = await get_storage()
+    direct_url = await storage.presigned_url(image_file["key"])
+    if direct_url:
+        # The store handles ranges itself; the redirect must not outlive the presigned URL
+        return RedirectResponse(
+            direct_url,
+            status_code=307,
+            headers={"Cache-Control": f"private, max-age={settings.S3_PRESIGN_TTL // 2}", "Vary": "Accept"},
+        )
+
+    size = image_file["size"]
+    # A stale If-Range validator means the client must refetch everything
+    if range_header and (not if_range or if_range == image_file["etag"]):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiableError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                storage.stream(image_file["key"], start, end),
+                status_code=206,
+                media_type=image_file["content_type"],
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1),
+                },
+            )
+
+    local_path = storage.local_path(image_file["key"])
+    if local_path:
+        return FileResponse(path=local_path, media_type=image_file["content_type"], headers=headers)
+    return StreamingResponse(
+        storage.stream(image_file["key"], 0, size - 1),
+        media_type=image_file["content_type"],
+        headers={**headers, "Content-Length": str(size)},
+    )
+
+
+# Global metadata cache
+image_metadata = ImageMetadataCache(
+    max_entries=settings.IMAGE_META_CACHE_SIZE,
+    ttl=settings.IMAGE_META_CACHE_TTL,
+)
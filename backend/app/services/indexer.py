@@ -0,0 +1,352 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.models import TransactionType
+from app.services.solana_rpc import SolanaRPCClient
+from app.services import analytics, candles, events, graduation, ranking, token_stats
+from app.services.cache import invalidate_tokens
+
+LAMPORTS_PER_SOL = 1_000_000_000
+TOKEN_DECIMALS = 9
+SIGNATURES_PAGE_LIMIT = 1000
+DUPLICATE_KEY_ERROR = 11000
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+B58_INDEX = {char: index for index, char in enumerate(B58_ALPHABET)}
+
+def b58decode(value: str) -> bytes:
+    """Decode a base58 string (instruction data in json-encoded transactions)."""
+    number = 0
+    for char in value:
+        number = number * 58 + B58_INDEX[char]
+    body = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    padding = len(value) - len(value.lstrip("1"))
+    return b"\x00" * padding + body
+
+def anchor_discriminator(instruction_name: str) -> bytes:
+    """First 8 bytes of sha256("global:<name>"), as Anchor prefixes instruction data."""
+    return hashlib.sha256(f"global:{instruction_name}".encode()).digest()[:8]
+
+# Instructions that move tokens between a wallet and the bonding curve
+TRADE_INSTRUCTIONS = {
+    anchor_discriminator("create_token"): TransactionType.CREATE,
+    anchor_discriminator("buy"): TransactionType.BUY,
+    anchor_discriminator("sell"): TransactionType.SELL,
+}
+
+def _account_keys(tx: Dict[str, Any]) -> List[str]:
+    """Static account keys followed by any address-lookup-table keys."""
+    keys = list(tx["transaction"]["message"]["accountKeys"])
+    loaded = (tx.get("meta") or {}).get("loadedAddresses") or {}
+    return keys + loaded.get("writable", []) + loaded.get("readonly", [])
+
+def _program_instructions(tx: Dict[str, Any], keys: List[str], program_id: str) -> List[Dict[str, Any]]:
+    """Top-level and inner (CPI) instructions addressed to program_id."""
+    instructions = list(tx["transaction"]["message"]["instructions"])
+    for inner in (tx.get("meta") or {}).get("innerInstructions") or []:
+        instructions.extend(inner["instructions"])
+    return [ix for ix in instructions if keys[ix["programIdIndex"]] == program_id]
+
+def _token_balance_deltas(meta: Dict[str, Any], owner: str) -> Dict[str, int]:
+    """Raw token balance change per mint for accounts owned by owner."""
+    deltas: Dict[str, int] = {}
+    for sign, balances in ((-1, meta.get("preTokenBalances") or []), (1, meta.get("postTokenBalances") or [])):
+        for balance in balances:
+            if balance.get("owner") != owner:
+                continue
+            amount = int(balance["uiTokenAmount"]["amount"])
+            deltas[balance["mint"]] = deltas.get(balance["mint"], 0) + sign * amount
+    return deltas
+
+def decode_trade(signature: str, tx: Dict[str, Any], program_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode the first token-factory trade in a transaction into a
+    TransactionResponse-shaped document, or None if it holds no trade.
+
+    Instructions are matched by Anchor discriminator; amounts come from the
+    signer's SOL and token balance changes so they reflect what settled.
+    """
+    meta = tx.get("meta") or {}
+    if meta.get("err") is not None:
+        return None
+
+    keys = _account_keys(tx)
+    user_wallet = keys[0]  # fee payer signs every trade
+
+    for ix in _program_instructions(tx, keys, program_id):
+        data = b58decode(ix["data"])
+        transaction_type = TRADE_INSTRUCTIONS.get(data[:8])
+        if transaction_type is None:
+            continue
+
+        deltas = _token_balance_deltas(meta, user_wallet)
+        if transaction_type == TransactionType.CREATE:
+            # create_token: accounts[0] is the new mint
+            mint_address = keys[ix["accounts"][0]]
+        else:
+            changed = [mint for mint, delta in deltas.items() if delta != 0]
+            if not changed:
+                continue
+            mint_address = changed[0]
+
+        token_amount = abs(deltas.get(mint_address, 0))
+        # Exclude the network fee so sol_amount is what was traded
+        lamports_delta = meta["postBalances"][0] - meta["preBalances"][0] + meta.get("fee", 0)
+        sol_amount = abs(lamports_delta) / LAMPORTS_PER_SOL
+        whole_tokens = token_amount / 10 ** TOKEN_DECIMALS
+        block_time = tx.get("blockTime")
+
+        return {
+            "mint_address": mint_address,
+            "transaction_signature": signature,
+            "user_wallet": user_wallet,
+            "transaction_type": transaction_type,
+            "sol_amount": sol_amount,
+            "token_amount": token_amount,
+            "price_per_token": sol_amount / whole_tokens if whole_tokens else 0.0,
+            "market_cap_before": None,
+            "market_cap_after": None,
+            "timestamp": datetime.utcfromtimestamp(block_time) if block_time else datetime.utcnow(),
+            "block_height": None,
+            "slot": tx.get("slot"),
+        }
+
+    return None
+
+
+def price_event(token_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Price channel payload for an updated token."""
+    return {
+        "mint_address": token_doc["mint_address"],
+        "current_price": token_doc.get("current_price"),
+        "market_cap": token_doc.get("market_cap"),
+        "total_volume": token_doc.get("total_volume"),
+        "graduation_status": token_doc.get("graduation_status"),
+    }
+
+async def handle_ingested_trades(db, trades: List[Dict[str, Any]]):
+    """Derived state updated for every newly stored trade."""
+    if not trades:
+        return
+    token_docs, _, _ = await asyncio.gather(
+        token_stats.apply_trades(db, trades),
+        candles.apply_trades(db, trades),
+        analytics.record_trades(db, trades),
+    )
+    graduation.observe_tokens(token_docs)
+    ranking.observe_trades(trades)
+    ranking.observe_tokens(token_docs)
+
+    await invalidate_tokens(token_doc["mint_address"] for token_doc in token_docs)
+
+    for trade in trades:
+        await events.publish(events.trades_channel(trade["mint_address"]), "trade", trade)
+    for token_doc in token_docs:
+        await events.publish(events.price_channel(token_doc["mint_address"]), "price", price_event(token_doc))
+
+
+class ChainIndexer:
+    """
+    Tails the token-factory program's signatures and ingests trades into
+    db.transactions.
+
+    The newest processed signature is checkpointed in db.indexer_state after
+    every batch, so a restart resumes where the last run stopped. Replays
+    are harmless: the unique transaction_signature index drops duplicates.
+
+    Trades are stored marked derive_pending, and the mark is removed only
+    once their derived updates (stats, candles, holdings, analytics) have
+    run. A batch that fails part-way is retried before the checkpoint
+    moves, and the retry re-derives stored rows still marked pending
+    instead of skipping them as duplicates. Derived writes are guarded by
+    trade signature (see replay_guard), so whatever the failed attempt
+    already applied is skipped rather than counted twice.
+    """
+
+    def __init__(
+        self,
+        db,
+        rpc: SolanaRPCClient,
+        program_id: str,
+        batch_size: int = 50,
+        poll_interval: float = 2.0,
+        backfill_limit: int = 1000,
+    ):
+        self.db = db
+        self.rpc = rpc
+        self.program_id = program_id
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.backfill_limit = backfill_limit
+        self.state_id = f"token_factory:{program_id}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def get_checkpoint(self) -> Optional[str]:
+        """Newest signature already ingested."""
+        state = await self.db.indexer_state.find_one({"_id": self.state_id})
+        return state.get("last_signature") if state else None
+
+    async def save_checkpoint(self, signature: str, slot: Optional[int]):
+        await self.db.indexer_state.update_one(
+            {"_id": self.state_id},
+            {"$set": {"last_signature": signature, "last_slot": slot, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    async def fetch_new_signatures(self, until: Optional[str]) -> List[Dict[str, Any]]:
+        """Signatures newer than until, oldest first."""
+        signatures: List[Dict[str, Any]] = []
+        before = None
+        while True:
+            options: Dict[str, Any] = {"limit": SIGNATURES_PAGE_LIMIT}
+            if until:
+                options["until"] = until
+            if before:
+                options["before"] = before
+
+            page = await self.rpc.call("getSignaturesForAddress", [self.program_id, options])
+            signatures.extend(page)
+            if len(page) < SIGNATURES_PAGE_LIMIT:
+                break
+            # First run has no checkpoint: only backfill recent history
+            if not until and len(signatures) >= self.backfill_limit:
+                signatures = signatures[:self.backfill_limit]
+                break
+            before = page[-1]["signature"]
+
+        signatures.reverse()
+        return signatures
+
+    async def ingest_batch(self, signatures: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetch, decode and store one batch; returns the newly inserted documents."""
+        successful = [item for item in signatures if item.get("err") is None]
+        transactions = await self.rpc.batch(
+            [
+                ("getTransaction", [item["signature"], {"encoding": "json", "maxSupportedTransactionVersion": 0}])
+                for item in successful
+            ]
+        )
+
+        documents = []
+        for item, tx in zip(successful, transactions):
+            if tx is None:
+                continue
+            document = decode_trade(item["signature"], tx, self.program_id)
+            if document:
+                documents.append(document)
+
+        pending = await self.insert_documents(documents)
+        await handle_ingested_trades(self.db, pending)
+        if pending:
+            await self.db.transactions.update_many(
+                {"transaction_signature": {"$in": [document["transaction_signature"] for document in pending]}},
+                {"$unset": {"derive_pending": ""}},
+            )
+        return pending
+
+    async def insert_documents(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Unordered insert that skips signatures already stored. Returns the
+        trades whose derived updates are still due: the ones inserted now,
+        plus stored ones left pending by an earlier failed attempt.
+        """
+        if not documents:
+            return []
+
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        try:
+            await self.db.transactions.insert_many(
+                [{**document, "derive_pending": True} for document in documents], ordered=False
+            )
+            return documents
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            duplicates = {error["index"] for error in errors}
+
+        inserted = [document for index, document in enumerate(documents) if index not in duplicates]
+        stored_pending = await self.db.transactions.find(
+            {
+                "transaction_signature": {"$in": [documents[index]["transaction_signature"] for index in duplicates]},
+                "derive_pending": True,
+            },
+            {"derive_pending": 0},
+        ).to_list(None)
+        return inserted + stored_pending
+
+    async def run_once(self) -> int:
+        """Ingest everything since the checkpoint; returns the number of new trades."""
+        signatures = await self.fetch_new_signatures(await self.get_checkpoint())
+        inserted = 0
+        for start in range(0, len(signatures), self.batch_size):
+            batch = signatures[start:start + self.batch_size]
+            inserted += len(await self.ingest_batch(batch))
+            await self.save_checkpoint(batch[-1]["signature"], batch[-1].get("slot"))
+        return inserted
+
+    async def run_forever(self):
+        """Poll loop; errors are logged and retried on the next tick."""
+        logging.info(f"Chain indexer started for program {self.program_id}")
+        while True:
+            try:
+                inserted = await self.run_once()
+                if inserted:
+                    logging.info(f"Chain indexer ingested {inserted} transactions")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Chain indexer cycle failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global indexer instance
+indexer: Optional[ChainIndexer] = None
+
+async def start_indexer(db, rpc: SolanaRPCClient):
+    """Start the background indexer when enabled in settings."""
+    global indexer
+
+    if not settings.INDEXER_ENABLED:
+        return
+    if not settings.TOKEN_FACTORY_PROGRAM_ID:
+        logging.warning("INDEXER_ENABLED is set but TOKEN_FACTORY_PROGRAM_ID is empty; indexer not started")
+        return
+
+    indexer = ChainIndexer(
+        db,
+        rpc,
+        settings.TOKEN_FACTORY_PROGRAM_ID,
+        batch_size=settings.INDEXER_BATCH_SIZE,
+        poll_interval=settings.INDEXER_POLL_INTERVAL,
+        backfill_limit=settings.INDEXER_BACKFILL_LIMIT,
+    )
+    indexer.start()
+
+async def stop_indexer():
+    """Stop the background indexer."""
+    global indexer
+
+    if indexer:
+        await indexer.stop()
+        indexer = None
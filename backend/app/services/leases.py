@@ -0,0 +1,41 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+
+class Lease:
+    """
+    Named lease in db.leases, held by at most one process at a time.
+
+    Background jobs started in every worker take the lease before each
+    pass, so only one worker runs them. The holder renews it by acquiring
+    again; when it stops renewing, another worker takes over once ttl
+    seconds have passed.
+    """
+
+    def __init__(self, db, name: str, ttl: float):
+        self.db = db
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self) -> bool:
+        """Take or renew the lease; False while another process holds it."""
+        now = datetime.utcnow()
+        try:
+            # An upsert only inserts when no lease exists; a held one fails on _id
+            await self.db.leases.update_one(
+                {"_id": self.name, "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl), "renewed_at": now}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def release(self):
+        """Give the lease up early so another worker can take over without waiting."""
+        await self.db.leases.delete_one({"_id": self.name, "owner": self.owner})
@@ -0,0 +1,128 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.config import settings
+from app.services.cache import cache
+
+COUNT_NAMESPACE = "counts"
+
+
+class InvalidCursorError(ValueError):
+    """Raised for cursors that are malformed or belong to another sort."""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"d": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"o": str(value)}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "d" in value:
+            return datetime.fromisoformat(value["d"])
+        if "o" in value:
+            return ObjectId(value["o"])
+    return value
+
+def encode_cursor(sort_field: str, direction: int, doc: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just past doc in (sort_field, _id) order."""
+    payload = [sort_field, direction, _encode_value(doc.get(sort_field)), _encode_value(doc["_id"])]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_field: str, direction: int) -> Tuple[Any, Any]:
+    """Sort value and _id stored in a cursor issued for this sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        field, cursor_direction, value, doc_id = json.loads(raw)
+        value, doc_id = _decode_value(value), _decode_value(doc_id)
+    except (ValueError, TypeError, InvalidId):
+        raise InvalidCursorError("Malformed cursor")
+    if field != sort_field or cursor_direction != direction:
+        raise InvalidCursorError("Cursor does not match the requested sort")
+    return value, doc_id
+
+def encode_offset_cursor(offset: int) -> str:
+    """Opaque cursor for lists ranked in memory, such as search results."""
+    return encode_cursor("offset", 1, {"_id": offset})
+
+def decode_offset_cursor(cursor: str) -> int:
+    _, offset = decode_cursor(cursor, "offset", 1)
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursorError("Malformed cursor")
+    return offset
+
+def keyset_filter(sort_field: str, direction: int, value: Any, doc_id: Any) -> Dict[str, Any]:
+    """
+    Documents strictly after (value, doc_id) in (sort_field, _id) order.
+    Nulls sort lowest in MongoDB, so they come last in descending order.
+    """
+    after = "$lt" if direction == -1 else "$gt"
+    if value is None:
+        same_value = {sort_field: None, "_id": {after: doc_id}}
+        if direction == -1:
+            return same_value
+        return {"$or": [same_value, {sort_field: {"$ne": None}}]}
+
+    clauses = [
+        {sort_field: {after: value}},
+        {sort_field: value, "_id": {after: doc_id}},
+    ]
+    if direction == -1:
+        clauses.append({sort_field: None})
+    return {"$or": clauses}
+
+async def fetch_page(
+    collection,
+    filter_query: Dict[str, Any],
+    sort_field: str,
+    direction: int,
+    page_size: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page in (sort_field, _id) order plus the cursor for the next page.
+
+    With a cursor the query seeks past it on the sort index (skip is
+    ignored), so cost stays O(page_size) at any depth. Without one it falls
+    back to offset paging.
+    """
+    query = filter_query
+    if cursor:
+        value, doc_id = decode_cursor(cursor, sort_field, direction)
+        query = {"$and": [filter_query, keyset_filter(sort_field, direction, value, doc_id)]}
+        skip = 0
+
+    find_cursor = collection.find(query, projection).sort([(sort_field, direction), ("_id", direction)])
+    if skip:
+        find_cursor = find_cursor.skip(skip)
+    # One extra document tells us whether another page exists
+    docs = await find_cursor.limit(page_size + 1).to_list(page_size + 1)
+
+    next_cursor = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        next_cursor = encode_cursor(sort_field, direction, docs[-1])
+    return docs, next_cursor
+
+async def cached_count(collection, filter_query: Dict[str, Any]) -> int:
+    """
+    count_documents cached for CACHE_COUNT_TTL seconds. Totals may lag
+    writes by up to that long.
+    """
+    key = f"{collection.name}:{json.dumps(filter_query, sort_keys=True, default=str)}"
+    return await cache.get_or_load(
+        COUNT_NAMESPACE,
+        key,
+        settings.CACHE_COUNT_TTL,
+        lambda: collection.count_documents(filter_query),
+    )
@@ -0,0 +1,316 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.models import GraduationStatus, RankingBoard, RankingWindow
+
+# Half-life of the decayed scores for each window
+WINDOW_SECONDS = {
+    RankingWindow.FIVE_MINUTES: 300,
+    RankingWindow.ONE_HOUR: 3600,
+    RankingWindow.ONE_DAY: 86400,
+}
+REBASE_HALF_LIVES = 256  # rebase decayed scores well before 2 ** exponent overflows
+UNIX_EPOCH = datetime(1970, 1, 1)
+TRADE_PROJECTION = {
+    "_id": 0, "mint_address": 1, "transaction_signature": 1,
+    "sol_amount": 1, "price_per_token": 1, "timestamp": 1,
+}
+
+def unix_time(timestamp: datetime) -> float:
+    return (timestamp - UNIX_EPOCH).total_seconds()
+
+
+class Board:
+    """
+    Scores per mint with O(log n) updates, eviction and top-N reads.
+
+    Entries live in a min-heap (eviction) and a max-heap (top N) that are
+    never searched: a new score pushes fresh heap items and stale ones are
+    skipped, by sequence number, when they surface. Past max_entries the
+    lowest entry is evicted. Both heaps are rebuilt once stale items
+    outnumber live ones.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # mint -> (score, sequence of its live heap items)
+        self._entries: Dict[str, Tuple[float, int]] = {}
+        self._lowest: List[Tuple[float, str, int]] = []
+        self._highest: List[Tuple[float, str, int]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, mint_address: str, default: float = 0.0) -> float:
+        entry = self._entries.get(mint_address)
+        return entry[0] if entry else default
+
+    def set(self, mint_address: str, score: float) -> Optional[str]:
+        """Set a score; returns the mint evicted to stay within max_entries, if any."""
+        sequence = next(self._sequence)
+        self._entries[mint_address] = (score, sequence)
+        heapq.heappush(self._lowest, (score, mint_address, sequence))
+        heapq.heappush(self._highest, (-score, mint_address, sequence))
+
+        evicted = None
+        if len(self._entries) > self.max_entries:
+            while evicted is None:
+                _, candidate, sequence = heapq.heappop(self._lowest)
+                if self._is_live(candidate, sequence):
+                    del self._entries[candidate]
+                    evicted = candidate
+        if max(len(self._lowest), len(self._highest)) > 2 * len(self._entries) + 64:
+            self._rebuild()
+        return evicted
+
+    def remove(self, mint_address: str):
+        self._entries.pop(mint_address, None)
+
+    def top(self, limit: int) -> List[Tuple[str, float]]:
+        """Highest scores first: pops the live head items, then pushes them back."""
+        head = []
+        while self._highest and len(head) < limit:
+            item = heapq.heappop(self._highest)
+            if self._is_live(item[1], item[2]):
+                head.append(item)
+        for item in head:
+            heapq.heappush(self._highest, item)
+        return [(mint_address, -negated) for negated, mint_address, _ in head]
+
+    def scale(self, factor: float):
+        """Multiply every score by a positive factor, which keeps the order."""
+        self._entries = {mint_address: (score * factor, sequence) for mint_address, (score, sequence) in self._entries.items()}
+        self._rebuild()
+
+    def _is_live(self, mint_address: str, sequence: int) -> bool:
+        entry = self._entries.get(mint_address)
+        return entry is not None and entry[1] == sequence
+
+    def _rebuild(self):
+        self._lowest = [(score, mint_address, sequence) for mint_address, (score, sequence) in self._entries.items()]
+        self._highest = [(-score, mint_address, sequence) for score, mint_address, sequence in self._lowest]
+        heapq.heapify(self._lowest)
+        heapq.heapify(self._highest)
+
+
+class DecayedBoard(Board):
+    """
+    A Board whose scores halve every half_life seconds, using forward
+    decay: a contribution made at time t is stored multiplied by
+    2 ** ((t - epoch) / half_life), so stored scores never need updating
+    as time passes and their order is the decayed order. The epoch is
+    moved forward (rescaling every score once) before exponents get large.
+    """
+
+    def __init__(self, half_life: float, max_entries: int, epoch: float):
+        super().__init__(max_entries)
+        self.half_life = half_life
+        self.epoch = epoch
+
+    def weight(self, at: float) -> float:
+        if (at - self.epoch) / self.half_life > REBASE_HALF_LIVES:
+            self.scale(2.0 ** (-(at - self.epoch) / self.half_life))
+            self.epoch = at
+        return 2.0 ** ((at - self.epoch) / self.half_life)
+
+    def top_at(self, limit: int, now: float) -> List[Tuple[str, float]]:
+        """Top entries with their scores decayed to now."""
+        decay = 2.0 ** (-(now - self.epoch) / self.half_life)
+        return [(mint_address, score * decay) for mint_address, score in self.top(limit)]
+
+
+class RankingEngine:
+    """
+    Incrementally maintained leaderboards:
+
+    - trending: SOL volume plus RANKING_TRADE_WEIGHT per trade, decayed
+      with each window as half-life, so both volume velocity and trade
+      count lift a token and quiet tokens sink.
+    - gainers: price change against a moving-average baseline over the
+      window, decayed from the last trade so a stalled pump drops out.
+    - graduating: market cap as a fraction of GRADUATION_THRESHOLD for
+      tokens not yet graduated.
+    """
+
+    def __init__(self, max_entries: int, trade_weight: float, threshold: float, now: float):
+        self.trade_weight = trade_weight
+        self.threshold = threshold
+        self.trending = {window: DecayedBoard(seconds, max_entries, now) for window, seconds in WINDOW_SECONDS.items()}
+        self.gainers = {window: DecayedBoard(seconds, max_entries, now) for window, seconds in WINDOW_SECONDS.items()}
+        self.graduating = Board(max_entries)
+        # Per window and mint: (average price, unix time of its last update)
+        self._baselines: Dict[RankingWindow, Dict[str, Tuple[float, float]]] = {window: {} for window in WINDOW_SECONDS}
+
+    def observe_trade(self, trade: Dict[str, Any]):
+        mint_address = trade["mint_address"]
+        at = unix_time(trade["timestamp"])
+        price = trade.get("price_per_token")
+
+        for board in self.trending.values():
+            amount = (trade.get("sol_amount") or 0.0) + self.trade_weight
+            # weight() may rebase and rescale every score, so read the old score after it
+            weight = board.weight(at)
+            board.set(mint_address, board.get(mint_address) + amount * weight)
+
+        if not price:
+            return
+        for window, board in self.gainers.items():
+            baselines = self._baselines[window]
+            average, updated_at = baselines.get(mint_address, (price, at))
+            change = price / average - 1 if average else 0.0
+            # Exponential moving average with the window as time constant
+            alpha = 1 - math.exp(-max(at - updated_at, 0.0) / WINDOW_SECONDS[window])
+            baselines[mint_address] = (average + alpha * (price - average), max(at, updated_at))
+            evicted = board.set(mint_address, change * board.weight(at))
+            if evicted:
+                baselines.pop(evicted, None)
+
+    def observe_token(self, token_doc: Dict[str, Any]):
+        mint_address = token_doc["mint_address"]
+        market_cap = token_doc.get("market_cap") or 0.0
+        if token_doc.get("graduation_status") == GraduationStatus.GRADUATED or market_cap <= 0:
+            self.graduating.remove(mint_address)
+        else:
+            self.graduating.set(mint_address, market_cap / self.threshold)
+
+    def top(self, board: RankingBoard, window: RankingWindow, limit: int, now: float) -> List[Tuple[str, float]]:
+        if board == RankingBoard.GRADUATING:
+            return self.graduating.top(limit)
+        boards = self.trending if board == RankingBoard.TRENDING else self.gainers
+        return boards[window].top_at(limit, now)
+
+
+class RankingService:
+    """
+    Owns the live RankingEngine: trades and token updates are folded in as
+    they are ingested, and the engine is rebuilt from the database every
+    RANKING_REBUILD_INTERVAL so each worker converges on trades ingested
+    elsewhere. Updates arriving during a rebuild are replayed onto the new
+    engine before it is swapped in.
+    """
+
+    def __init__(self, db, rebuild_interval: float, seed_limit: int):
+        self.db = db
+        self.rebuild_interval = rebuild_interval
+        self.seed_limit = seed_limit
+        self.engine = self.new_engine()
+        self._backlog: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def new_engine(self) -> RankingEngine:
+        return RankingEngine(
+            max_entries=settings.RANKING_MAX_ENTRIES,
+            trade_weight=settings.RANKING_TRADE_WEIGHT,
+            threshold=settings.GRADUATION_THRESHOLD,
+            now=unix_time(datetime.utcnow()),
+        )
+
+    def observe_trade(self, trade: Dict[str, Any]):
+        self.engine.observe_trade(trade)
+        if self._backlog is not None:
+            self._backlog.append(("trade", trade))
+
+    def observe_token(self, token_doc: Dict[str, Any]):
+        self.engine.observe_token(token_doc)
+        if self._backlog is not None:
+            self._backlog.append(("token", token_doc))
+
+    async def rebuild(self):
+        """Replay recent trades and the pending tokens nearest graduation into a fresh engine."""
+        self._backlog = []
+        try:
+            engine = self.new_engine()
+            since = datetime.utcnow() - timedelta(seconds=max(WINDOW_SECONDS.values()))
+            trades = await self.db.transactions.find(
+                {"timestamp": {"$gte": since}}, TRADE_PROJECTION
+            ).sort("timestamp", -1).limit(self.seed_limit).to_list(self.seed_limit)
+            for trade in reversed(trades):
+                engine.observe_trade(trade)
+
+            cursor = self.db.tokens.find(
+                {"graduation_status": {"$in": [GraduationStatus.PENDING, GraduationStatus.ELIGIBLE]}},
+                {"_id": 0, "mint_address": 1, "market_cap": 1, "graduation_status": 1}
+            ).sort("market_cap", -1).limit(settings.RANKING_MAX_ENTRIES)
+            async for token_doc in cursor:
+                engine.observe_token(token_doc)
+
+            replayed = {trade.get("transaction_signature") for trade in trades}
+            for kind, doc in self._backlog:
+                if kind == "token":
+                    engine.observe_token(doc)
+                elif doc.get("transaction_signature") not in replayed:
+                    engine.observe_trade(doc)
+            self.engine = engine
+        finally:
+            self._backlog = None
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Ranking rebuild failed: {e}")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global ranking service
+rankings: Optional[RankingService] = None
+
+def observe_trades(trades: List[Dict[str, Any]]):
+    """Fold newly ingested trades into the leaderboards, if ranking is running."""
+    if rankings is None:
+        return
+    for trade in trades:
+        rankings.observe_trade(trade)
+
+def observe_tokens(token_docs: List[Dict[str, Any]]):
+    if rankings is None:
+        return
+    for token_doc in token_docs:
+        rankings.observe_token(token_doc)
+
+def top(board: RankingBoard, window: RankingWindow, limit: int) -> Optional[List[Tuple[str, float]]]:
+    """Top (mint, score) pairs, highest first, or None when ranking is disabled."""
+    if rankings is None:
+        return None
+    return rankings.engine.top(board, window, limit, unix_time(datetime.utcnow()))
+
+async def start_rankings(db):
+    global rankings
+
+    if not settings.RANKING_ENABLED:
+        return
+    rankings = RankingService(
+        db,
+        rebuild_interval=settings.RANKING_REBUILD_INTERVAL,
+        seed_limit=settings.RANKING_SEED_LIMIT,
+    )
+    rankings.start()
+
+async def stop_rankings():
+    global rankings
+
+    if rankings:
+        await rankings.stop()
+        rankings = None
@@ -0,0 +1,41 @@
+"""
+Replay guards for state derived from indexed trades.
+
+Every derived write filters on the trade signatures it folds in not being
+recorded on the target document yet, and records them in the same atomic
+update. When the indexer retries a batch that failed part-way, updates
+that already landed no longer match and are skipped. An upsert that
+skips this way fails with a duplicate key error instead, which callers
+treat as already applied.
+
+Only the newest signatures are kept per document: a retry replays the
+failed batch before the checkpoint moves, so a batch's worth suffices.
+"""
+from typing import Any, Dict, List
+
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+
+DUPLICATE_KEY_ERROR = 11000
+FIELD = "applied_signatures"
+
+def window() -> int:
+    return settings.INDEXER_BATCH_SIZE
+
+def unapplied(signatures: List[str]) -> Dict[str, Any]:
+    """Filter clause matching documents that recorded none of signatures."""
+    return {FIELD: {"$nin": signatures}}
+
+def record(signatures: List[str]) -> Dict[str, Any]:
+    """Update clause recording signatures as applied."""
+    return {"$push": {FIELD: {"$each": signatures, "$slice": -window()}}}
+
+def record_expression(signatures: List[str]) -> Dict[str, Any]:
+    """record() for update pipelines."""
+    return {"$slice": [{"$concatArrays": [{"$ifNull": [f"${FIELD}", []]}, {"$literal": signatures}]}, -window()]}
+
+def raise_unless_replayed(error: BulkWriteError):
+    """Re-raise a bulk upsert error unless every failure is a skipped replay."""
+    if any(write_error["code"] != DUPLICATE_KEY_ERROR for write_error in error.details.get("writeErrors", [])):
+        raise error
@@ -0,0 +1,122 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services import concurrency
+
+MINT_ADDRESS_PATTERN = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
+BACKFILL_BATCH_SIZE = 1000
+
+# Relevance tiers, best first
+EXACT_SYMBOL, EXACT_NAME, SYMBOL_PREFIX, NAME_PREFIX, TEXT_MATCH = range(5)
+
+def normalize(text: str) -> str:
+    """Form used for the indexed name_lower/symbol_lower prefix fields."""
+    return text.strip().lower()
+
+def search_fields(name: str, symbol: str) -> Dict[str, str]:
+    """Normalized fields stored on every token document."""
+    return {"name_lower": normalize(name), "symbol_lower": normalize(symbol)}
+
+def text_search_terms(query: str) -> str:
+    """Plain terms for $text: drop phrase quotes and negation prefixes."""
+    terms = [term.lstrip("-") for term in query.replace('"', " ").split()]
+    return " ".join(term for term in terms if term)
+
+async def backfill_search_fields(db):
+    """Add normalized search fields to tokens created before they existed."""
+    updated = 0
+    while True:
+        docs = await db.tokens.find(
+            {"symbol_lower": {"$exists": False}},
+            {"name": 1, "symbol": 1}
+        ).limit(BACKFILL_BATCH_SIZE).to_list(BACKFILL_BATCH_SIZE)
+        if not docs:
+            break
+        await db.tokens.bulk_write(
+            [UpdateOne({"_id": doc["_id"]}, {"$set": search_fields(doc.get("name", ""), doc.get("symbol", ""))}) for doc in docs],
+            ordered=False,
+        )
+        updated += len(docs)
+    if updated:
+        logging.info(f"Backfilled search fields on {updated} tokens")
+
+async def search_tokens(db, query: str, projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Ranked active tokens matching query, at most SEARCH_MAX_RESULTS.
+
+    A full mint address is answered by a unique-index lookup. Otherwise
+    an equality match on symbol_lower/name_lower, anchored prefix ranges on
+    each, and a $text match on name/symbol/description run concurrently,
+    every one index-backed and bounded, so latency does not grow with the
+    collection. Exact and prefix matches are fetched largest market cap
+    first, so the limit keeps the tokens that rank highest.
+    """
+    if MINT_ADDRESS_PATTERN.match(query):
+        token_doc = await db.tokens.find_one({"mint_address": query, "is_active": True}, projection)
+        if token_doc:
+            return [token_doc]
+
+    if projection:
+        # Ranking needs these whatever the caller projects
+        projection = {**projection, "mint_address": 1, "symbol_lower": 1, "market_cap": 1}
+
+    normalized = normalize(query)
+    prefix = {"$regex": f"^{re.escape(normalized)}"}
+    limit = settings.SEARCH_MAX_RESULTS
+
+    async def exact_matches() -> List[Dict[str, Any]]:
+        cursor = db.tokens.find(
+            {"is_active": True, "$or": [{"symbol_lower": normalized}, {"name_lower": normalized}]},
+            projection
+        ).sort("market_cap", -1).limit(limit)
+        return await cursor.to_list(limit)
+
+    async def prefix_matches(field: str) -> List[Dict[str, Any]]:
+        cursor = db.tokens.find({"is_active": True, field: prefix}, projection).sort("market_cap", -1).limit(limit)
+        return await cursor.to_list(limit)
+
+    async def text_matches() -> List[Dict[str, Any]]:
+        terms = text_search_terms(query)
+        if not terms:
+            return []
+        text_projection = dict(projection or {})
+        text_projection["score"] = {"$meta": "textScore"}
+        cursor = db.tokens.find(
+            {"$text": {"$search": terms}, "is_active": True},
+            text_projection
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return await cursor.to_list(limit)
+
+    # Prefix matches rank first; a slow or failed text search only loses the lowest tier
+    results = await concurrency.fan_out(
+        {
+            "exact": exact_matches(),
+            "symbol": prefix_matches("symbol_lower"),
+            "name": prefix_matches("name_lower"),
+            "text": text_matches(),
+        },
+        optional={"text": []},
+    )
+    exact_docs, symbol_docs, name_docs, text_docs = results["exact"], results["symbol"], results["name"], results["text"]
+
+    ranked: Dict[str, Any] = {}
+    def add(token_doc: Dict[str, Any], tier: int, score: float = 0.0):
+        key = token_doc["mint_address"]
+        if key not in ranked or ranked[key][0] > tier:
+            ranked[key] = (tier, -score, -(token_doc.get("market_cap") or 0), token_doc)
+
+    for token_doc in exact_docs:
+        add(token_doc, EXACT_SYMBOL if token_doc.get("symbol_lower") == normalized else EXACT_NAME)
+    for token_doc in symbol_docs:
+        add(token_doc, SYMBOL_PREFIX)
+    for token_doc in name_docs:
+        add(token_doc, NAME_PREFIX)
+    for token_doc in text_docs:
+        add(token_doc, TEXT_MATCH, token_doc.pop("score", 0.0))
+
+    ordered = sorted(ranked.values(), key=lambda entry: entry[:3])
+    return [entry[3] for entry in ordered[:limit]]
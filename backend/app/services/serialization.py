@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Optional, Type, Union, get_args, get_origin
+
+from bson import ObjectId
+from pydantic import BaseModel
+
+def _number_type(annotation: Any) -> Optional[type]:
+    """int or float for (optional) numeric fields, which Pydantic coerces on validation."""
+    if get_origin(annotation) is Union:
+        annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), None)
+    return annotation if annotation in (int, float) else None
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Mongo projection of exactly the stored fields a response model reads."""
+    projection = {field.alias or name: 1 for name, field in model.model_fields.items()}
+    # Mongo returns _id unless it is excluded explicitly
+    projection.setdefault("_id", 0)
+    return projection
+
+
+class DocumentShaper:
+    """
+    Turns raw Mongo documents into the JSON-ready dicts a response model
+    would produce, without constructing the model.
+
+    Output matches response_model serialization: alias keys, defaults for
+    missing fields, extra fields dropped, ObjectId as str and numbers
+    coerced to the field's int or float. Datetimes are left for orjson, which
+    formats them as Pydantic does.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.fields = [
+            (field.alias or name, field.get_default(call_default_factory=True), _number_type(field.annotation))
+            for name, field in model.model_fields.items()
+        ]
+
+    def shape(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        shaped = {}
+        for key, default, number_type in self.fields:
+            value = doc.get(key, default)
+            if isinstance(value, ObjectId):
+                value = str(value)
+            elif number_type is float and type(value) is int:
+                value = float(value)
+            elif number_type is int and type(value) is float:
+                value = int(value)
+            shaped[key] = value
+        return shaped
+
+    def shape_many(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.shape(doc) for doc in docs]
+
@@ -0,0 +1,187 @@
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from app.config import settings
+
+RPCCall = Tuple[str, Optional[list]]
+
+
+class SolanaRPCError(Exception):
+    """Raised when the RPC node returns a JSON-RPC error object."""
+
+    def __init__(self, method: str, error: Dict[str, Any]):
+        self.method = method
+        self.code = error.get("code")
+        self.error = error
+        super().__init__(f"{method} failed: {error.get('message', error)}")
+
+
+class SolanaRPCClient:
+    """
+    App-lifetime JSON-RPC client for the Solana node.
+
+    A single pooled httpx client keeps connections alive between requests,
+    a semaphore caps the number of in-flight POSTs, identical concurrent
+    calls share one request, and `batch` sends several methods in one POST.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        max_concurrency: int = 16,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    async def call(self, method: str, params: Optional[list] = None) -> Any:
+        """Call one RPC method, joining an identical request already in flight."""
+        key = json.dumps([method, params], sort_keys=True, separators=(",", ":"))
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._call(method, params))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled waiter does not cancel the shared request
+        return await asyncio.shield(future)
+
+    async def batch(
+        self,
+        calls: Sequence[RPCCall],
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        Send several RPC calls in one POST and return results in call order.
+
+        With return_exceptions=True a failed call yields its SolanaRPCError in
+        place of a result instead of raising.
+        """
+        if not calls:
+            return []
+
+        payload = [self._payload(method, params) for method, params in calls]
+        responses = await self._post(payload)
+        if not isinstance(responses, list):
+            # Some nodes answer a rejected batch with a single error object
+            raise SolanaRPCError("batch", responses.get("error", responses))
+
+        by_id = {item.get("id"): item for item in responses}
+        results = []
+        for request, (method, _) in zip(payload, calls):
+            item = by_id.get(request["id"], {"error": {"message": "missing response"}})
+            if "error" in item:
+                error = SolanaRPCError(method, item["error"])
+                if not return_exceptions:
+                    raise error
+                results.append(error)
+            else:
+                results.append(item.get("result"))
+        return results
+
+    async def get_multiple_accounts(
+        self,
+        addresses: Sequence[str],
+        encoding: str = "jsonParsed",
+        chunk_size: int = 100,
+        max_concurrency: int = 4,
+        retries: int = 0,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """
+        Fetch many accounts with getMultipleAccounts, chunk_size per call.
+
+        Chunks run concurrently up to max_concurrency and account values are
+        returned in the same order as addresses (None for missing accounts).
+        A failed chunk is retried up to retries times. With
+        return_exceptions=True a chunk that still fails yields its error in
+        place of each of its accounts instead of raising.
+        """
+        chunks = [addresses[i:i + chunk_size] for i in range(0, len(addresses), chunk_size)]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(chunk: Sequence[str]) -> List[Any]:
+            for attempt in range(retries + 1):
+                try:
+                    async with semaphore:
+                        result = await self.call("getMultipleAccounts", [list(chunk), {"encoding": encoding}])
+                    return result["value"]
+                except (SolanaRPCError, httpx.HTTPError) as e:
+                    if attempt < retries:
+                        continue
+                    if not return_exceptions:
+                        raise
+                    return [e] * len(chunk)
+
+        values = await asyncio.gather(*(fetch(chunk) for chunk in chunks))
+        return [account for chunk_values in values for account in chunk_values]
+
+    async def close(self):
+        """Close pooled connections."""
+        await self._client.aclose()
+
+    async def _call(self, method: str, params: Optional[list]) -> Any:
+        response = await self._post(self._payload(method, params))
+        if "error" in response:
+            raise SolanaRPCError(method, response["error"])
+        return response.get("result")
+
+    async def _post(self, payload: Any) -> Any:
+        async with self._semaphore:
+            response = await self._client.post(self.url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def _payload(self, method: str, params: Optional[list]) -> Dict[str, Any]:
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method}
+        if params is not None:
+            payload["params"] = params
+        return payload
+
+
+# Global RPC client
+rpc_client: Optional[SolanaRPCClient] = None
+
+async def init_rpc_client():
+    """Create the shared RPC client."""
+    global rpc_client
+
+    rpc_client = SolanaRPCClient(
+        settings.SOLANA_RPC_URL,
+        timeout=settings.SOLANA_RPC_TIMEOUT,
+        max_connections=settings.SOLANA_RPC_MAX_CONNECTIONS,
+        max_keepalive=settings.SOLANA_RPC_MAX_KEEPALIVE,
+        max_concurrency=settings.SOLANA_RPC_MAX_CONCURRENCY,
+    )
+    logging.info(f"Solana RPC client ready: {settings.SOLANA_RPC_URL}")
+
+async def get_rpc_client() -> SolanaRPCClient:
+    """Get the shared RPC client, creating it on first use."""
+    if rpc_client is None:
+        await init_rpc_client()
+    return rpc_client
+
+async def close_rpc_client():
+    """Close the shared RPC client."""
+    global rpc_client
+
+    if rpc_client:
+        await rpc_client.close()
+        rpc_client = None
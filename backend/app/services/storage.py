@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import mimetypes
+import os
+import shutil
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+
+from app.config import settings
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Image types the mimetypes module may not know about
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+def guess_content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+def immutable_cache_control() -> str:
+    """Cache-Control for content-addressed objects, which never change."""
+    return f"public, max-age={settings.IMAGE_CACHE_MAX_AGE}, immutable"
+
+
+class StorageError(Exception):
+    """Raised when the storage backend cannot complete an operation."""
+
+
+class StorageBackend:
+    """
+    Object storage for image files, addressed by flat keys.
+
+    Every backend can store and stream objects. Backends whose objects are
+    fetched straight from the store (S3) also hand out presigned URLs, so API
+    nodes redirect instead of proxying bytes; the filesystem backend exposes
+    a local path for sendfile.
+    """
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def put(self, key: str, data: bytes, content_type: str):
+        raise NotImplementedError
+
+    async def put_file(self, key: str, path: str, content_type: str):
+        """Store the file at path. The source may be moved; callers must not reuse it."""
+        raise NotImplementedError
+
+    async def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, or None if it does not exist."""
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    def stream(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes start..end inclusive."""
+        raise NotImplementedError
+
+    async def presigned_url(self, key: str) -> Optional[str]:
+        """Time-limited direct URL, or None when objects are only served through the API."""
+        return None
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def public_url(self, key: str) -> str:
+        """Stable URL stored on image documents."""
+        return f"{settings.API_BASE_URL}/static/images/{key}"
+
+
+class FilesystemStorage(StorageBackend):
+    """Files under a local directory, served by the /static mount."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    async def connect(self):
+        os.makedirs(self.root, exist_ok=True)
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def put(self, key: str, data: bytes, content_type: str):
+        async with aiofiles.open(self.local_path(key), "wb") as f:
+            await f.write(data)
+
+    async def put_file(self, key: str, path: str, content_type: str):
+        try:
+            await aiofiles.os.replace(path, self.local_path(key))
+        except OSError:
+            # Temp dir on another filesystem
+            await asyncio.to_thread(shutil.copyfile, path, self.local_path(key))
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return (await aiofiles.os.stat(self.local_path(key))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def stream(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        async with aiofiles.open(self.local_path(key), "rb") as f:
+            await f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await f.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+class MemoryStorage(StorageBackend):
+    """In-process object store for tests and local development without a disk or bucket."""
+
+    def __init__(self):
+        self.objects: Dict[str, Tuple[bytes, str]] = {}
+
+    async def put(self, key: str, data: bytes, content_type: str):
+        self.objects[key] = (data, content_type)
+
+    async def put_file(self, key: str, path: str, content_type: str):
+        async with aiofiles.open(path, "rb") as f:
+            self.objects[key] = (await f.read(), content_type)
+
+    async def size(self, key: str) -> Optional[int]:
+        entry = self.objects.get(key)
+        return len(entry[0]) if entry else None
+
+    async def stream(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        data, _ = self.objects[key]
+        for offset in range(start, end + 1, STREAM_CHUNK_SIZE):
+            yield data[offset:min(offset + STREAM_CHUNK_SIZE, end + 1)]
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible bucket (AWS, MinIO, R2) through aiobotocore, imported on
+    connect so the other backends never load it.
+
+    Transfers share one semaphore so uploads and reads from every request
+    stay within max_concurrency connections. Files larger than part_size go
+    up as concurrent multipart uploads. Objects are read by clients via
+    presigned GETs, or via public_base_url when the bucket sits behind a CDN.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        public_base_url: Optional[str] = None,
+        presign_ttl: int = 3600,
+        max_concurrency: int = 16,
+        part_size: int = 8 * 1024 * 1024,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_ttl = presign_ttl
+        self.max_concurrency = max_concurrency
+        self.part_size = part_size
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client_context = None
+        self._client = None
+
+    async def connect(self):
+        try:
+            from aiobotocore.config import AioConfig
+            from aiobotocore.session import get_session
+        except ImportError:
+            raise StorageError("S3 storage requires the aiobotocore package")
+
+        self._client_context = get_session().create_client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            region_name=self.region,
+            aws_access_key_id=self.access_key_id,
+            aws_secret_access_key=self.secret_access_key,
+            config=AioConfig(max_pool_connections=self.max_concurrency),
+        )
+        self._client = await self._client_context.__aenter__()
+
+    async def close(self):
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+            self._client_context = None
+            self._client = None
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def put(self, key: str, data: bytes, content_type: str):
+        async with self._semaphore:
+            await self._client.put_object(
+                Bucket=self.bucket,
+                Key=self.object_key(key),
+                Body=data,
+                ContentType=content_type,
+                CacheControl=immutable_cache_control(),
+            )
+
+    async def put_file(self, key: str, path: str, content_type: str):
+        size = await aiofiles.os.path.getsize(path)
+        if size <= self.part_size:
+            async with aiofiles.open(path, "rb") as f:
+                await self.put(key, await f.read(), content_type)
+            return
+
+        object_key = self.object_key(key)
+        upload = await self._client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=object_key,
+            ContentType=content_type,
+            CacheControl=immutable_cache_control(),
+        )
+        upload_id = upload["UploadId"]
+
+        async def upload_part(part_number: int, offset: int) -> Dict[str, object]:
+            # Each part is read inside the semaphore, bounding memory to max_concurrency parts
+            async with self._semaphore:
+                async with aiofiles.open(path, "rb") as f:
+                    await f.seek(offset)
+                    body = await f.read(self.part_size)
+                result = await self._client.upload_part(
+                    Bucket=self.bucket,
+                    Key=object_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+            return {"PartNumber": part_number, "ETag": result["ETag"]}
+
+        try:
+            parts = await asyncio.gather(*(
+                upload_part(index + 1, offset)
+                for index, offset in enumerate(range(0, size, self.part_size))
+            ))
+            await self._client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": list(parts)},
+            )
+        except BaseException:
+            await self._client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            raise
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            async with self._semaphore:
+                head = await self._client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return head["ContentLength"]
+        except Exception as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def stream(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        async with self._semaphore:
+            response = await self._client.get_object(
+                Bucket=self.bucket,
+                Key=self.object_key(key),
+                Range=f"bytes={start}-{end}",
+            )
+            async with response["Body"] as body:
+                while True:
+                    chunk = await body.read(STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+    async def presigned_url(self, key: str) -> str:
+        if self.public_base_url:
+            return self.public_url(key)
+        return await self._client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.object_key(key)},
+            ExpiresIn=self.presign_ttl,
+        )
+
+    def public_url(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self.object_key(key)}"
+        # Resolved to a fresh presigned URL by the /static/images redirect
+        return super().public_url(key)
+
+
+def create_storage() -> StorageBackend:
+    backend = settings.STORAGE_BACKEND
+    if backend == "filesystem":
+        return FilesystemStorage(settings.UPLOAD_DIR)
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            public_base_url=settings.S3_PUBLIC_BASE_URL,
+            presign_ttl=settings.S3_PRESIGN_TTL,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+        )
+    raise StorageError(f"Unknown storage backend: {backend}")
+
+
+# Global storage backend
+storage: Optional[StorageBackend] = None
+# Serializes first use, so concurrent requests never connect two backends
+_storage_lock = asyncio.Lock()
+
+async def init_storage():
+    """Create and connect the configured storage backend, once."""
+    global storage
+
+    async with _storage_lock:
+        if storage is not None:
+            return
+        backend = create_storage()
+        await backend.connect()
+        storage = backend
+    logging.info(f"Image storage ready: {settings.STORAGE_BACKEND}")
+
+async def get_storage() -> StorageBackend:
+    """Get the storage backend, connecting it on first use."""
+    if storage is None:
+        await init_storage()
+    return storage
+
+async def close_storage():
+    global storage
+
+    if storage:
+        await storage.close()
+        storage = None
@@ -0,0 +1,178 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.models import BulkItemStatus, GraduationStatus, TokenCreateRequest
+from app.services import analytics, search, trading_pairs
+from app.services.cache import cache, TOKEN_LIST_NAMESPACE, ANALYTICS_NAMESPACE
+
+DUPLICATE_KEY_ERROR = 11000
+
+def build_token_doc(token_data: TokenCreateRequest, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Token document for a newly deployed token."""
+    token_doc = {
+        "mint_address": token_data.mint_address,
+        "creator_wallet": token_data.creator_wallet,
+        "name": token_data.name,
+        "symbol": token_data.symbol,
+        "description": token_data.description,
+        "image_uri": token_data.image_uri,
+        **search.search_fields(token_data.name, token_data.symbol),
+
+        # Token Configuration (from proposal)
+        "total_supply": 1_000_000_000_000_000_000,  # 1B with 9 decimals
+        "decimals": 9,
+        "bonding_curve_supply": 800_000_000_000_000_000,  # 80%
+        "burning_reserve": 200_000_000_000_000_000,  # 20%
+
+        # Trading Data (initial values)
+        "current_price": None,
+        "market_cap": None,
+        "total_volume": 0.0,
+        "holder_count": 1,  # Creator is initial holder
+        "transactions_count": 1,  # Creation transaction
+
+        # Graduation Status
+        "graduation_status": GraduationStatus.PENDING,
+        "graduation_threshold": float(settings.GRADUATION_THRESHOLD),
+        "graduation_date": None,
+        "raydium_pool_id": None,
+
+        # Explorer Integration
+        "solana_explorer_url": f"https://explorer.solana.com/address/{token_data.mint_address}",
+        "solscan_url": f"https://solscan.io/token/{token_data.mint_address}",
+
+        # Blockchain Verification
+        "contract_verified": False,
+        "last_verified": None,
+        "block_height_created": None,
+        "creation_signature": None,
+
+        # Metadata
+        "created_at": now or datetime.utcnow(),
+        "updated_at": None,
+        "is_active": True,
+        "tags": [],
+
+        # Initial purchase data
+        "initial_purchase_amount": token_data.initial_purchase_amount,
+    }
+    if trading_pairs.embedded():
+        token_doc["bonding_curve"] = trading_pairs.embedded_curve(build_trading_pair_doc(token_data.mint_address, now))
+    return token_doc
+
+def build_trading_pair_doc(mint_address: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Initial bonding curve trading pair for a new token."""
+    return {
+        "mint_address": mint_address,
+        "pair_type": "bonding_curve",
+        "base_price": 0.000004,  # Initial price from proposal
+        "current_sold": 0,
+        "available_supply": 800_000_000_000_000_000,  # 80% for bonding curve
+        "price_formula": "Price = Base_Price × (Total_Supply_Sold / Available_Supply)^2",
+        "pool_id": None,
+        "liquidity_sol": None,
+        "liquidity_token": None,
+        "created_at": now or datetime.utcnow(),
+        "updated_at": None,
+    }
+
+async def insert_token(db, token_data: TokenCreateRequest) -> Dict[str, Any]:
+    """
+    Insert a token and its bonding curve pair, raising DuplicateKeyError for
+    a known mint. With the curve embedded, the pair is left to the
+    change-stream projector or written in the same transaction.
+    """
+    now = datetime.utcnow()
+    token_doc = build_token_doc(token_data, now)
+
+    async def write(session):
+        await db.tokens.insert_one(token_doc, session=session)
+        if trading_pairs.writes_pairs():
+            await db.trading_pairs.insert_one(build_trading_pair_doc(token_data.mint_address, now), session=session)
+
+    await trading_pairs.in_transaction(db, write)
+    return token_doc
+
+async def insert_unordered(collection, docs: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """insert_many(ordered=False); returns the write error for each failed position."""
+    if not docs:
+        return {}
+    try:
+        await collection.insert_many(docs, ordered=False)
+        return {}
+    except BulkWriteError as e:
+        return {error["index"]: error for error in e.details.get("writeErrors", [])}
+
+async def register_batch(db, items: List[Any], offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Validate and insert one batch of token payloads, returning a result per
+    item (index counted from offset). The unique mint_address index detects
+    duplicates, both against stored tokens and within the batch.
+    """
+    now = datetime.utcnow()
+    results: List[Dict[str, Any]] = []
+    pending: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+
+    for position, item in enumerate(items):
+        result = {"index": offset + position, "mint_address": None, "status": BulkItemStatus.CREATED, "error": None}
+        results.append(result)
+        try:
+            token_data = item if isinstance(item, TokenCreateRequest) else TokenCreateRequest.model_validate(item)
+        except ValidationError as e:
+            if isinstance(item, dict):
+                result["mint_address"] = item.get("mint_address")
+            result["status"] = BulkItemStatus.INVALID
+            result["error"] = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+            continue
+        result["mint_address"] = token_data.mint_address
+        pending.append((result, build_token_doc(token_data, now)))
+
+    token_errors = await insert_unordered(db.tokens, [token_doc for _, token_doc in pending])
+    inserted = []
+    for position, (result, token_doc) in enumerate(pending):
+        error = token_errors.get(position)
+        if error is None:
+            inserted.append(result)
+        elif error.get("code") == DUPLICATE_KEY_ERROR:
+            result["status"] = BulkItemStatus.DUPLICATE
+            result["error"] = "Token already exists"
+        else:
+            result["status"] = BulkItemStatus.FAILED
+            result["error"] = error.get("errmsg")
+
+    # Unordered batches cannot be all-or-nothing, so pairs are written after
+    # the tokens unless the projector derives them from the embedded curve
+    pair_errors = {}
+    if trading_pairs.writes_pairs():
+        pair_errors = await insert_unordered(
+            db.trading_pairs,
+            [build_trading_pair_doc(result["mint_address"], now) for result in inserted]
+        )
+    for position, error in pair_errors.items():
+        # The token exists, so it still counts as created; the pair can be rebuilt
+        inserted[position]["error"] = f"Trading pair not created: {error.get('errmsg')}"
+
+    if inserted:
+        await analytics.increment_counters(db, total_tokens_created=len(inserted))
+    return results
+
+async def register_tokens(db, items: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Bulk registration for migrations and backfills: batches of
+    BULK_CREATE_BATCH_SIZE, each validated and written with two unordered
+    insert_many calls. Token list and analytics caches are invalidated once
+    at the end, and no per-token events are published.
+    """
+    results: List[Dict[str, Any]] = []
+    batch_size = settings.BULK_CREATE_BATCH_SIZE
+    for offset in range(0, len(items), batch_size):
+        results.extend(await register_batch(db, items[offset:offset + batch_size], offset))
+
+    if any(result["status"] == BulkItemStatus.CREATED for result in results):
+        await cache.invalidate_namespace(TOKEN_LIST_NAMESPACE)
+        await cache.invalidate_namespace(ANALYTICS_NAMESPACE)
+    return results
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.models import GraduationStatus, TransactionType
+from app.services import holdings, replay_guard, trading_pairs
+
+TOKEN_DECIMALS = 9
+TOTAL_SUPPLY_TOKENS = 1_000_000_000  # whole tokens
+
+def market_cap_usd(price_per_token: float) -> float:
+    """Fully diluted market cap in USD for a SOL-denominated token price."""
+    return price_per_token * TOTAL_SUPPLY_TOKENS * settings.SOL_PRICE_USD
+
+async def apply_trade(db, trade: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Fold one ingested trade into its token's stats with atomic deltas and
+    return the updated token document.
+
+    Volume, transaction and holder counts are $inc'd in a single
+    find_one_and_update, so concurrent writers never lose updates. Each
+    write is guarded by the trade's signature, so a retried batch skips
+    the parts that already landed.
+    """
+    mint_address = trade["mint_address"]
+    signatures = [trade["transaction_signature"]]
+    transaction_type = trade["transaction_type"]
+    token_delta = -trade["token_amount"] if transaction_type == TransactionType.SELL else trade["token_amount"]
+
+    holder_delta = await holdings.apply_trade(db, trade)
+
+    increments: Dict[str, Any] = {"total_volume": trade["sol_amount"]}
+    if trading_pairs.embedded():
+        increments["bonding_curve.current_sold"] = token_delta
+    if transaction_type == TransactionType.CREATE:
+        # create_token already counts the creator and the creation transaction
+        holder_delta = 0
+    else:
+        increments["transactions_count"] = 1
+    if holder_delta:
+        increments["holder_count"] = holder_delta
+
+    update: Dict[str, Any] = {
+        "$inc": increments,
+        "$max": {"last_trade_at": trade["timestamp"]},
+        "$set": {"updated_at": datetime.utcnow()},
+        **replay_guard.record(signatures),
+    }
+    price = trade["price_per_token"]
+    if price:
+        market_cap = market_cap_usd(price)
+        update["$set"].update({"current_price": price, "market_cap": market_cap})
+        update["$max"]["ath_market_cap"] = market_cap
+
+    async def write(session):
+        # Keep the bonding curve position in step with tokens bought and sold
+        if trading_pairs.writes_pairs():
+            await db.trading_pairs.update_one(
+                {"mint_address": mint_address, "pair_type": "bonding_curve", **replay_guard.unapplied(signatures)},
+                {
+                    "$inc": {"current_sold": token_delta},
+                    "$set": {"updated_at": datetime.utcnow()},
+                    **replay_guard.record(signatures),
+                },
+                session=session,
+            )
+        return await db.tokens.find_one_and_update(
+            {"mint_address": mint_address, **replay_guard.unapplied(signatures)},
+            update,
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+
+    token_doc = await trading_pairs.in_transaction(db, write)
+    if token_doc is None:
+        # Unknown mint, or the trade was already applied
+        token_doc = await db.tokens.find_one({"mint_address": mint_address})
+        if token_doc is None:
+            return None
+
+    if (
+        token_doc.get("graduation_status") == GraduationStatus.PENDING
+        and (token_doc.get("market_cap") or 0) >= settings.GRADUATION_THRESHOLD
+    ):
+        # Conditional on status so only the first crossing flips it
+        await db.tokens.update_one(
+            {"mint_address": mint_address, "graduation_status": GraduationStatus.PENDING},
+            {"$set": {"graduation_status": GraduationStatus.ELIGIBLE}},
+        )
+        token_doc["graduation_status"] = GraduationStatus.ELIGIBLE
+
+    return token_doc
+
+async def apply_trades(db, trades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Apply a batch of trades, in order per mint and concurrently across mints.
+    Returns the updated token documents.
+    """
+    by_mint: Dict[str, List[Dict[str, Any]]] = {}
+    for trade in trades:
+        by_mint.setdefault(trade["mint_address"], []).append(trade)
+
+    async def apply_mint(mint_trades: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        token_doc = None
+        for trade in mint_trades:
+            token_doc = await apply_trade(db, trade) or token_doc
+        return token_doc
+
+    results = await asyncio.gather(*(apply_mint(mint_trades) for mint_trades in by_mint.values()))
+    return [token_doc for token_doc in results if token_doc]
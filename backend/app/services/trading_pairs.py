@@ -0,0 +1,224 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services import bonding_curve
+
+# How trading_pairs follows the curve state embedded in token documents
+SYNC_CHANGE_STREAM = "change_stream"  # projector tails the tokens change stream
+SYNC_TRANSACTION = "transaction"  # both collections written in one transaction
+SYNC_DIRECT = "direct"  # both written back to back (standalone servers support neither)
+
+CURVE_FIELDS = ("base_price", "current_sold", "available_supply", "price_formula")
+PROJECTOR_STATE_ID = "trading_pairs_projector"
+BACKFILL_BATCH_SIZE = 1000
+RESUME_SAVE_INTERVAL = 1.0  # seconds between resume token checkpoints
+
+# Set by start_trading_pair_sync when EMBED_BONDING_CURVE is on
+sync_mode: Optional[str] = None
+
+def embedded() -> bool:
+    return settings.EMBED_BONDING_CURVE
+
+def writes_pairs() -> bool:
+    """Whether writers update trading_pairs themselves rather than leaving it to the projector."""
+    return not (embedded() and sync_mode == SYNC_CHANGE_STREAM)
+
+def embedded_curve(pair_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Curve state stored under token.bonding_curve."""
+    return {field: pair_doc.get(field) for field in CURVE_FIELDS}
+
+async def in_transaction(db, operation: Callable[[Any], Awaitable[Any]]) -> Any:
+    """
+    Run operation(session) inside a transaction in transaction sync mode,
+    otherwise directly with session=None.
+    """
+    if not embedded() or sync_mode != SYNC_TRANSACTION:
+        return await operation(None)
+    async with await db.client.start_session() as session:
+        return await session.with_transaction(operation)
+
+async def load_current_sold(db, mint_addresses: List[str]) -> Dict[str, int]:
+    """
+    Curve position per mint in one query: from token documents when the
+    curve is embedded, with trading_pairs covering any not yet backfilled.
+    """
+    current_sold: Dict[str, int] = {}
+    missing = mint_addresses
+    if embedded():
+        cursor = db.tokens.find(
+            {"mint_address": {"$in": mint_addresses}, "bonding_curve": {"$exists": True}},
+            {"mint_address": 1, "bonding_curve.current_sold": 1}
+        )
+        async for token_doc in cursor:
+            current_sold[token_doc["mint_address"]] = bonding_curve.current_sold_from_pair(token_doc["bonding_curve"])
+        missing = [mint_address for mint_address in mint_addresses if mint_address not in current_sold]
+        if not missing:
+            return current_sold
+
+    cursor = db.trading_pairs.find(
+        {"mint_address": {"$in": missing}, "pair_type": "bonding_curve"},
+        {"mint_address": 1, "current_sold": 1}
+    )
+    async for pair_doc in cursor:
+        current_sold[pair_doc["mint_address"]] = bonding_curve.current_sold_from_pair(pair_doc)
+    return current_sold
+
+def projection_update(mint_address: str, curve: Dict[str, Any]) -> UpdateOne:
+    """Upsert of the trading_pairs document mirroring a token's embedded curve."""
+    now = datetime.utcnow()
+    return UpdateOne(
+        {"mint_address": mint_address, "pair_type": "bonding_curve"},
+        {
+            "$set": {**curve, "updated_at": now},
+            "$setOnInsert": {"pool_id": None, "liquidity_sol": None, "liquidity_token": None, "created_at": now},
+        },
+        upsert=True,
+    )
+
+async def backfill_embedded_curves(db):
+    """Copy curve state from trading_pairs into tokens created before embedding was enabled."""
+    updated = 0
+    while True:
+        token_docs = await db.tokens.find(
+            {"bonding_curve": {"$exists": False}},
+            {"mint_address": 1}
+        ).limit(BACKFILL_BATCH_SIZE).to_list(BACKFILL_BATCH_SIZE)
+        if not token_docs:
+            break
+        mint_addresses = [token_doc["mint_address"] for token_doc in token_docs]
+        pairs = {
+            pair_doc["mint_address"]: pair_doc
+            async for pair_doc in db.trading_pairs.find({"mint_address": {"$in": mint_addresses}, "pair_type": "bonding_curve"})
+        }
+        await db.tokens.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": token_doc["_id"]},
+                    {"$set": {"bonding_curve": embedded_curve(pairs.get(token_doc["mint_address"], {"current_sold": 0}))}}
+                )
+                for token_doc in token_docs
+            ],
+            ordered=False,
+        )
+        updated += len(token_docs)
+    if updated:
+        logging.info(f"Embedded bonding curve state in {updated} tokens")
+
+
+class TradingPairProjector:
+    """
+    Keeps trading_pairs in step with token.bonding_curve by tailing the
+    tokens change stream.
+
+    Each event upserts the pair from the post-update document, so replays
+    after a restart are harmless. The resume token is checkpointed in
+    db.indexer_state so a restart continues where it stopped.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+
+    def pipeline(self) -> List[Dict[str, Any]]:
+        # Inserts, replacements, and updates that touch any bonding_curve field
+        touches_curve = {"$gt": [
+            {"$size": {"$filter": {
+                "input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}},
+                "cond": {"$eq": [{"$substrCP": ["$$this.k", 0, len("bonding_curve")]}, "bonding_curve"]},
+            }}},
+            0,
+        ]}
+        return [
+            {"$match": {"$or": [
+                {"operationType": {"$in": ["insert", "replace"]}},
+                {"operationType": "update", "$expr": touches_curve},
+            ]}},
+            {"$project": {"fullDocument.mint_address": 1, "fullDocument.bonding_curve": 1}},
+        ]
+
+    async def run_forever(self):
+        state = await self.db.indexer_state.find_one({"_id": PROJECTOR_STATE_ID})
+        resume_token = state.get("resume_token") if state else None
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                async with self.db.tokens.watch(
+                    self.pipeline(),
+                    full_document="updateLookup",
+                    resume_after=resume_token,
+                ) as stream:
+                    last_saved = loop.time()
+                    async for change in stream:
+                        token_doc = change.get("fullDocument")
+                        if token_doc and token_doc.get("bonding_curve"):
+                            await self.db.trading_pairs.bulk_write(
+                                [projection_update(token_doc["mint_address"], token_doc["bonding_curve"])]
+                            )
+                        resume_token = stream.resume_token
+                        if loop.time() - last_saved >= RESUME_SAVE_INTERVAL:
+                            await self.save(resume_token)
+                            last_saved = loop.time()
+            except asyncio.CancelledError:
+                if resume_token:
+                    await self.save(resume_token)
+                raise
+            except Exception as e:
+                logging.error(f"Trading pair projector failed, restarting: {e}")
+                await asyncio.sleep(1)
+
+    async def save(self, resume_token):
+        await self.db.indexer_state.update_one(
+            {"_id": PROJECTOR_STATE_ID},
+            {"$set": {"resume_token": resume_token, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global projector
+projector: Optional[TradingPairProjector] = None
+
+async def detect_sync_mode(db) -> str:
+    """Configured sync mode, downgraded to direct writes on a standalone server."""
+    hello = await db.client.admin.command("hello")
+    if "setName" not in hello and hello.get("msg") != "isdbgrid":
+        logging.warning("MongoDB is standalone: no change streams or transactions, trading_pairs written directly")
+        return SYNC_DIRECT
+    return settings.TRADING_PAIR_SYNC
+
+async def start_trading_pair_sync(db):
+    """Backfill embedded curves and start keeping trading_pairs in sync, when embedding is on."""
+    global projector, sync_mode
+
+    if not embedded():
+        return
+    await backfill_embedded_curves(db)
+    sync_mode = await detect_sync_mode(db)
+    if sync_mode == SYNC_CHANGE_STREAM:
+        projector = TradingPairProjector(db)
+        projector.start()
+    logging.info(f"Bonding curve embedded in tokens; trading_pairs sync: {sync_mode}")
+
+async def stop_trading_pair_sync():
+    global projector
+
+    if projector:
+        await projector.stop()
+        projector = None
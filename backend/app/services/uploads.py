@@ -0,0 +1,132 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+from app.config import settings
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# (offset, signature, content type); WebP also needs "WEBP" at offset 8
+MAGIC_NUMBERS = [
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+]
+
+
+class UploadTooLargeError(Exception):
+    """Raised as soon as an upload exceeds MAX_FILE_SIZE."""
+
+
+class UnsupportedImageTypeError(Exception):
+    """Raised when the leading bytes match no allowed image format."""
+
+
+def too_large_detail(max_size: int) -> str:
+    return f"File too large. Maximum size: {max_size / 1024 / 1024}MB"
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Content type from magic bytes, ignoring whatever the client claimed."""
+    for offset, signature, content_type in MAGIC_NUMBERS:
+        if head[offset:offset + len(signature)] == signature:
+            if content_type == "image/webp" and not head.startswith(b"RIFF"):
+                continue
+            return content_type
+    return None
+
+async def spool_upload(file: UploadFile, max_size: int) -> Tuple[str, str, str, int]:
+    """
+    Copy an upload to a temp file in fixed-size chunks, hashing as it goes.
+
+    Returns (temp path, sha256 hex, sniffed content type, size). At most one
+    chunk is held in memory, and the copy stops at the first chunk past
+    max_size. The caller owns the temp file and must remove it.
+    """
+    os.makedirs(settings.UPLOAD_TMP_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=settings.UPLOAD_TMP_DIR, suffix=".upload")
+    os.close(fd)
+
+    digest = hashlib.sha256()
+    size = 0
+    content_type = None
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if content_type is None:
+                    content_type = sniff_image_type(chunk)
+                    if content_type not in settings.ALLOWED_IMAGE_TYPES:
+                        raise UnsupportedImageTypeError(
+                            f"Invalid file type. Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
+                        )
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(too_large_detail(max_size))
+                digest.update(chunk)
+                await out.write(chunk)
+        if content_type is None:
+            raise UnsupportedImageTypeError("Empty file")
+    except BaseException:
+        await discard_upload(path)
+        raise
+    return path, digest.hexdigest(), content_type, size
+
+async def discard_upload(path: str):
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized request bodies on upload routes before they are parsed.
+
+    Form parsing runs before the handler, so without this a client could
+    stream any amount of data into the multipart spool. A declared
+    Content-Length over the limit is refused immediately; otherwise bytes
+    are counted as they arrive and parsing is aborted with a 413 at the limit.
+    """
+
+    def __init__(self, app, path_prefixes: Tuple[str, ...], max_body_size: int):
+        self.app = app
+        self.path_prefixes = path_prefixes
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        declared = Headers(scope=scope).get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_body_size:
+            response = JSONResponse(status_code=413, content={"detail": too_large_detail(settings.MAX_FILE_SIZE)})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # HTTPException passes through FastAPI's body parsing untouched
+                    raise HTTPException(status_code=413, detail=too_large_detail(settings.MAX_FILE_SIZE))
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services import graduation
+from app.services.cache import invalidate_tokens
+
+
+class TokenWriteBuffer:
+    """
+    Write-behind buffer for token metric updates.
+
+    Updates are coalesced per mint (later values win field by field) and
+    written every flush_interval as one unordered bulk_write, so a hot
+    token costs one update per flush instead of one per request. Buffered
+    and in-flight values are overlaid on reads, so callers see their own
+    writes; with several API workers that holds per worker.
+
+    If flushes keep failing, add() refuses new updates once the oldest
+    unflushed one is older than max_staleness, and callers write directly.
+    """
+
+    def __init__(self, db, flush_interval: float, max_staleness: float, max_pending: int):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_staleness = max_staleness
+        self.max_pending = max_pending
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flushing: Dict[str, Dict[str, Any]] = {}
+        self._oldest: Optional[float] = None  # loop time of the oldest unflushed update
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, mint_address: str, fields: Dict[str, Any]) -> bool:
+        """Buffer a $set for mint_address; False if the buffer is too far behind to accept it."""
+        now = asyncio.get_running_loop().time()
+        if self._oldest is not None and now - self._oldest > self.max_staleness:
+            return False
+        self._pending.setdefault(mint_address, {}).update(fields)
+        if self._oldest is None:
+            self._oldest = now
+        if len(self._pending) >= self.max_pending:
+            self._wake.set()
+        return True
+
+    def discard(self, mint_address: str, fields: Dict[str, Any]):
+        """Drop buffered values a direct write is about to supersede."""
+        pending = self._pending.get(mint_address)
+        if pending:
+            for field in fields:
+                pending.pop(field, None)
+            if not pending:
+                del self._pending[mint_address]
+
+    def overlay(self, token: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        token with unflushed values merged in. Only fields already present
+        are replaced, so sparse fieldsets stay sparse; token itself is never
+        modified.
+        """
+        mint_address = token.get("mint_address")
+        in_flight = self._flushing.get(mint_address)
+        pending = self._pending.get(mint_address)
+        if not in_flight and not pending:
+            return token
+        merged = dict(token)
+        for fields in (in_flight, pending):
+            for field, value in (fields or {}).items():
+                if field in merged:
+                    merged[field] = value
+        return merged
+
+    def overlay_many(self, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self._pending and not self._flushing:
+            return tokens
+        return [self.overlay(token) for token in tokens]
+
+    async def flush(self) -> int:
+        """Write everything buffered in one bulk_write; returns the number of mints written."""
+        if not self._pending:
+            return 0
+        batch, oldest = self._pending, self._oldest
+        self._pending, self._oldest = {}, None
+        self._flushing = batch
+        try:
+            await self.db.tokens.bulk_write(
+                [UpdateOne({"mint_address": mint_address}, graduation.guarded_set(fields)) for mint_address, fields in batch.items()],
+                ordered=False,
+            )
+        except BaseException:
+            # Failed or cancelled mid-write: requeue under anything buffered meanwhile, which is newer
+            for mint_address, fields in batch.items():
+                self._pending[mint_address] = {**fields, **self._pending.get(mint_address, {})}
+            self._oldest = oldest if self._oldest is None else min(oldest, self._oldest)
+            raise
+        finally:
+            self._flushing = {}
+
+        await invalidate_tokens(batch)
+        return len(batch)
+
+    async def run_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Token write-behind flush failed, {len(self._pending)} mints pending: {e}")
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Whatever is still buffered must reach the database before shutdown
+        try:
+            await self.flush()
+        except Exception as e:
+            logging.error(f"Dropping {len(self._pending)} buffered token updates on shutdown: {e}")
+
+
+# Global buffer
+buffer: Optional[TokenWriteBuffer] = None
+
+def overlay(token: Dict[str, Any]) -> Dict[str, Any]:
+    return buffer.overlay(token) if buffer else token
+
+def overlay_many(tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return buffer.overlay_many(tokens) if buffer else tokens
+
+async def start_write_buffer(db):
+    global buffer
+
+    if not settings.WRITE_BEHIND_ENABLED:
+        return
+    buffer = TokenWriteBuffer(
+        db,
+        flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+        max_staleness=settings.WRITE_BEHIND_MAX_STALENESS,
+        max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    )
+    buffer.start()
+
+async def stop_write_buffer():
+    global buffer
+
+    if buffer:
+        await buffer.stop()
+        buffer = None
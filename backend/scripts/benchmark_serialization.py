@@ -0,0 +1,121 @@
+"""
+Compare token list serialization: response model validation plus the
+stdlib JSONResponse (the default path) against DocumentShaper plus orjson
+(FAST_JSON_TOKEN_LIST / FAST_JSON_SEARCH).
+
+    python scripts/benchmark_serialization.py --page-size 100 --rounds 500
+    python scripts/benchmark_serialization.py --fields card
+
+Documents are synthetic, shaped like stored tokens including the fields the
+list projection drops. With --fields, a sparse fieldset is timed as well,
+and BSON sizes show what the projection saves on the Mongo side. No
+database is needed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+import bson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.models import TokenCreateRequest, TokenListResponse
+from app.services import fieldsets
+from app.services.token_registry import build_token_doc
+
+def make_docs(count: int):
+    now = datetime.utcnow()
+    docs = []
+    for i in range(count):
+        token_data = TokenCreateRequest(
+            mint_address=f"Mint{i:040d}",
+            creator_wallet=f"Creator{i:037d}",
+            name=f"Benchmark Token {i}",
+            symbol=f"BT{i}",
+            description="A token created for the serialization benchmark " * 3,
+            image_uri=f"http://localhost:3001/api/v1/images/img_{i:064x}",
+            initial_purchase_amount=1_000_000_000,
+        )
+        token_doc = build_token_doc(token_data, now - timedelta(seconds=i))
+        token_doc.update({
+            "_id": ObjectId(),
+            "current_price": 0.000004 * (i + 1),
+            "market_cap": 4000 * (i + 1),
+            "total_volume": 12.5 * i,
+            "holder_count": i + 1,
+            "transactions_count": 3 * i + 1,
+            "updated_at": now,
+        })
+        docs.append(token_doc)
+    return docs
+
+def page_fields(page_size: int):
+    return {"total_count": 10_000, "page": 1, "page_size": page_size, "total_pages": 10_000 // page_size, "next_cursor": None}
+
+def model_path(docs, page_size: int, adapter: TypeAdapter) -> bytes:
+    # What FastAPI does for response_model: validate, dump in JSON mode by alias, render with json.dumps
+    tokens = []
+    for token_doc in docs:
+        token_doc = dict(token_doc)
+        token_doc["_id"] = str(token_doc["_id"])
+        tokens.append(token_doc)
+    response = TokenListResponse(tokens=tokens, **page_fields(page_size))
+    content = adapter.dump_python(adapter.validate_python(response), mode="json", by_alias=True)
+    return JSONResponse(content).body
+
+def fast_path(docs, page_size: int, fieldset: fieldsets.TokenFieldset) -> bytes:
+    payload = {"tokens": fieldset.shaper.shape_many(docs), **page_fields(page_size)}
+    return ORJSONResponse(payload).body
+
+def project(docs, fieldset: fieldsets.TokenFieldset):
+    # The list query's projection, applied client side
+    return [{key: doc[key] for key in fieldset.keys if key in doc} for doc in docs]
+
+def bson_size(docs) -> int:
+    return sum(len(bson.encode(doc)) for doc in docs)
+
+def timed(label: str, rounds: int, run):
+    run()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        body = run()
+    elapsed = time.perf_counter() - started
+    per_page = elapsed / rounds * 1000
+    print(f"{label:<28} {per_page:8.3f} ms/page  {rounds / elapsed:9.0f} pages/s  {len(body):7d} bytes")
+    return per_page
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark token list serialization")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--fields", help="Also time this fields= value (preset or field list)")
+    args = parser.parse_args()
+
+    docs = make_docs(args.page_size)
+    full = fieldsets.resolve_fieldset("full")
+    projected = project(docs, full)
+    adapter = TypeAdapter(TokenListResponse)
+
+    assert json.loads(model_path(docs, args.page_size, adapter)) == orjson.loads(fast_path(projected, args.page_size, full)), \
+        "fast path output differs from the response model"
+
+    print(f"BSON per page: stored {bson_size(docs)} bytes, fields=full {bson_size(projected)} bytes")
+    baseline = timed("response_model + json", args.rounds, lambda: model_path(docs, args.page_size, adapter))
+    fast = timed("shaper + orjson", args.rounds, lambda: fast_path(projected, args.page_size, full))
+    print(f"speedup: {baseline / fast:.1f}x")
+
+    if args.fields:
+        fieldset = fieldsets.resolve_fieldset(args.fields)
+        sparse = project(docs, fieldset)
+        print(f"BSON per page: fields={fieldset.name} {bson_size(sparse)} bytes")
+        timed(f"shaper + orjson ({fieldset.name})", args.rounds, lambda: fast_path(sparse, args.page_size, fieldset))
+
+if __name__ == "__main__":
+    main()
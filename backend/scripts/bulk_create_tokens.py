@@ -0,0 +1,71 @@
+"""
+Bulk-register tokens from NDJSON (one TokenCreateRequest object per line).
+
+    python scripts/bulk_create_tokens.py tokens.ndjson > results.ndjson
+    cat tokens.ndjson | python scripts/bulk_create_tokens.py -
+
+Writes one result line per input line to stdout and a summary to stderr.
+Lines are processed in batches, so input of any size runs in bounded memory.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database import init_db, close_db, get_database
+from app.services.token_registry import register_tokens
+
+def read_batches(stream, batch_size: int):
+    """Parsed items in batches; unparseable lines pass through as strings and are reported invalid."""
+    batch = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            batch.append(json.loads(line))
+        except json.JSONDecodeError:
+            batch.append(line)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk-register tokens from NDJSON")
+    parser.add_argument("path", help="NDJSON file, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=settings.BULK_CREATE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    await init_db()
+    db = await get_database()
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+
+    counts = {}
+    processed = 0
+    started = time.perf_counter()
+    try:
+        for batch in read_batches(stream, args.batch_size):
+            results = await register_tokens(db, batch)
+            for result in results:
+                result["index"] += processed
+                counts[result["status"].value] = counts.get(result["status"].value, 0) + 1
+                sys.stdout.write(json.dumps({**result, "status": result["status"].value}) + "\n")
+            processed += len(batch)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        await close_db()
+
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed else 0
+    print(f"{processed} tokens in {elapsed:.2f}s ({rate:.0f}/s): {json.dumps(counts)}", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
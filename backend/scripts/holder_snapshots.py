@@ -0,0 +1,67 @@
+"""
+Take one pass of holder distribution snapshots.
+
+    python scripts/holder_snapshots.py
+    python scripts/holder_snapshots.py --mint <mint> --mint <mint> --dry-run
+    python scripts/holder_snapshots.py --rpc-url http://127.0.0.1:8899 --rate 100
+
+Without --mint every active token is snapshotted. --rpc-url points the job
+at another node, such as a local test validator or stub RPC; --dry-run
+prints snapshots as NDJSON instead of storing them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.database import init_db, close_db, get_database
+from app.services.holder_distribution import SOURCES, create_job
+from app.services.solana_rpc import SolanaRPCClient
+
+async def main():
+    parser = argparse.ArgumentParser(description="Take holder distribution snapshots")
+    parser.add_argument("--mint", action="append", dest="mints", help="Mint to snapshot (repeatable)")
+    parser.add_argument("--rpc-url", default=settings.SOLANA_RPC_URL)
+    parser.add_argument("--source", choices=SOURCES, default=settings.HOLDER_SNAPSHOT_SOURCE)
+    parser.add_argument("--concurrency", type=int, default=settings.HOLDER_SNAPSHOT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=settings.HOLDER_SNAPSHOT_RPC_RATE, help="RPC calls per second")
+    parser.add_argument("--dry-run", action="store_true", help="Print snapshots instead of storing them")
+    args = parser.parse_args()
+
+    rpc = SolanaRPCClient(
+        args.rpc_url,
+        timeout=settings.SOLANA_RPC_TIMEOUT,
+        max_concurrency=settings.SOLANA_RPC_MAX_CONCURRENCY,
+    )
+    db = None
+    if not args.dry_run or not args.mints:
+        await init_db()
+        db = await get_database()
+    job = create_job(db, rpc, source=args.source, concurrency=args.concurrency, rate=args.rate)
+
+    started = time.perf_counter()
+    try:
+        if args.dry_run:
+            mints = args.mints or [token_doc["mint_address"] async for token_doc in db.tokens.find(
+                {"is_active": True}, {"_id": 0, "mint_address": 1}
+            )]
+            snapshots = await job.snapshot_many(mints)
+            for snapshot in snapshots:
+                sys.stdout.write(json.dumps(snapshot, default=str) + "\n")
+            count = len(snapshots)
+        else:
+            count = await job.run_once(args.mints)
+    finally:
+        await rpc.close()
+        if db is not None:
+            await close_db()
+
+    print(f"{count} holder snapshots in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+"""
+Rebuild the holdings collection from recorded transactions.
+
+    python scripts/rebuild_holdings.py
+
+Recomputes each (mint, wallet) balance, bought/sold totals and trade
+timestamps in one server-side aggregation, backfilling cost basis for
+holdings that predate it. Stop the indexer first so trades are not
+applied twice.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import init_db, close_db, get_database
+from app.services.holdings import rebuild_holdings
+
+async def main():
+    await init_db()
+    db = await get_database()
+    started = time.perf_counter()
+    try:
+        await rebuild_holdings(db)
+        count = await db.holdings.count_documents({})
+    finally:
+        await close_db()
+    print(f"Rebuilt holdings ({count} documents) in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
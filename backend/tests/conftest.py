@@ -0,0 +1,32 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app import database
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def make_db():
+    """Factory for in-memory databases carrying the app's indexes."""
+    async def make(name: str = "pumpfun_test"):
+        previous = database.database
+        database.database = AsyncMongoMockClient()[name]
+        try:
+            await database.create_indexes()
+            return database.database
+        finally:
+            database.database = previous
+    return make
+
+@pytest.fixture
+async def db(make_db):
+    """An in-memory database installed as the app database."""
+    previous = database.database
+    database.database = await make_db()
+    try:
+        yield database.database
+    finally:
+        database.database = previous
@@ -0,0 +1,62 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from app.services.solana_rpc import SolanaRPCClient
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+def b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = B58_ALPHABET[remainder] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + encoded
+
+
+class StubRPC:
+    """
+    In-process Solana JSON-RPC node for tests.
+
+    Methods answer from handlers (method -> callable(params) -> result);
+    a handler that raises StubRPCError answers with a JSON-RPC error.
+    Every call is recorded in calls, batches included.
+    """
+
+    def __init__(self, handlers: Optional[Dict[str, Callable[[list], Any]]] = None):
+        self.handlers: Dict[str, Callable[[list], Any]] = dict(handlers or {})
+        self.calls: List[tuple] = []
+
+    def client(self, **options) -> SolanaRPCClient:
+        return SolanaRPCClient("http://stub-rpc", transport=httpx.MockTransport(self._handle), **options)
+
+    def count(self, method: str) -> int:
+        return sum(1 for called, _ in self.calls if called == method)
+
+    def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method, params = request["method"], request.get("params") or []
+        self.calls.append((method, params))
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": request["id"]}
+        handler = self.handlers.get(method)
+        if handler is None:
+            response["error"] = {"code": -32601, "message": f"Method not found: {method}"}
+            return response
+        try:
+            response["result"] = handler(params)
+        except StubRPCError as e:
+            response["error"] = {"code": e.code, "message": str(e)}
+        return response
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if isinstance(payload, list):
+            return httpx.Response(200, json=[self._answer(item) for item in payload])
+        return httpx.Response(200, json=self._answer(payload))
+
+
+class StubRPCError(Exception):
+    def __init__(self, message: str, code: int = -32000):
+        super().__init__(message)
+        self.code = code
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services import analytics, concurrency
+from app.services.analytics import AnalyticsMaterializer, PLATFORM_STATS_ID
+from app.services.leases import Lease
+
+pytestmark = pytest.mark.anyio
+
+async def seed(db):
+    await db.tokens.insert_many([
+        {"mint_address": "mint-a", "is_active": True, "graduation_status": "pending", "total_volume": 10.0},
+        {"mint_address": "mint-b", "is_active": True, "graduation_status": "graduated", "total_volume": 5.0},
+    ])
+    await db.graduations.insert_one({"mint_address": "mint-b", "graduation_fee_collected": 2.0})
+    await db.transactions.insert_one({"user_wallet": "wallet-a", "timestamp": datetime.utcnow()})
+    # Drifted counters
+    await db.platform_stats.insert_one({
+        "_id": PLATFORM_STATS_ID,
+        "total_tokens_created": 7,
+        "graduated_tokens": 0,
+        "total_trading_volume": 3.0,
+        "platform_revenue": 0.0,
+    })
+
+async def test_reconcile_corrects_drift(db):
+    await seed(db)
+
+    stats = await analytics.reconcile(db)
+
+    assert stats["total_tokens_created"] == 2
+    assert stats["graduated_tokens"] == 1
+    assert stats["total_trading_volume"] == pytest.approx(15.0)
+    assert stats["platform_revenue"] == pytest.approx(2.0)
+    assert stats["active_traders"] == 1
+    assert stats["daily_transactions"] == 1
+
+async def test_reconcile_keeps_increments_made_while_it_runs(db, monkeypatch):
+    await seed(db)
+    fan_out = concurrency.fan_out
+
+    async def fan_out_then_trade(*args, **kwargs):
+        figures = await fan_out(*args, **kwargs)
+        # A trade and a new token counted after the figures were read
+        await analytics.increment_counters(db, total_trading_volume=1.5, total_tokens_created=1)
+        return figures
+
+    monkeypatch.setattr(concurrency, "fan_out", fan_out_then_trade)
+
+    stats = await analytics.reconcile(db)
+
+    assert stats["total_trading_volume"] == pytest.approx(16.5)
+    assert stats["total_tokens_created"] == 3
+
+async def test_materializer_runs_in_the_lease_holder_only(db, monkeypatch):
+    await seed(db)
+    runs = []
+
+    async def count_reconcile(db):
+        runs.append(db)
+
+    monkeypatch.setattr(analytics, "reconcile", count_reconcile)
+    workers = [
+        AnalyticsMaterializer(db, refresh_interval=0.01, reconcile_interval=3600, lease=Lease(db, "analytics", ttl=60))
+        for _ in range(3)
+    ]
+
+    for worker in workers:
+        worker.start()
+    await asyncio.sleep(0.1)
+    for worker in workers:
+        await worker.stop()
+
+    assert len(runs) == 1
@@ -0,0 +1,69 @@
+import pytest
+
+from app.config import settings
+from app.models import BulkVerificationRequest
+from app.routers import blockchain
+from tests.stub_rpc import StubRPC, StubRPCError, b58encode
+
+pytestmark = pytest.mark.anyio
+
+MINTS = [b58encode(bytes([index]) * 32) for index in range(1, 7)]
+BROKEN = MINTS[2]
+FLAKY = MINTS[4]
+
+def mint_account(address: str):
+    return {"data": {"parsed": {"type": "mint", "info": {
+        "supply": "1000000000000000000",
+        "decimals": 9,
+        "mintAuthority": None,
+        "freezeAuthority": None,
+    }}}}
+
+@pytest.fixture
+def rpc(monkeypatch):
+    failures = {FLAKY: 1}
+
+    def get_multiple_accounts(params):
+        addresses = params[0]
+        if BROKEN in addresses:
+            raise StubRPCError("Node is behind")
+        for address in addresses:
+            if failures.get(address):
+                failures[address] -= 1
+                raise StubRPCError("Too many requests", code=429)
+        # The last mint does not exist on chain
+        return {"context": {"slot": 1}, "value": [None if address == MINTS[-1] else mint_account(address) for address in addresses]}
+
+    stub = StubRPC({"getMultipleAccounts": get_multiple_accounts})
+    client = stub.client()
+
+    async def get_rpc_client():
+        return client
+
+    monkeypatch.setattr(blockchain, "get_rpc_client", get_rpc_client)
+    monkeypatch.setattr(settings, "BULK_VERIFY_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "BULK_VERIFY_RETRIES", 1)
+    return stub
+
+async def test_failed_chunk_only_marks_its_addresses(rpc):
+    response = await blockchain.verify_tokens_on_chain(BulkVerificationRequest(mint_addresses=MINTS))
+
+    by_mint = {result.mint_address: result for result in response.results}
+    assert [result.mint_address for result in response.results] == MINTS
+    # BROKEN shares a chunk with MINTS[3]; both fail after one retry
+    assert by_mint[BROKEN].error and by_mint[MINTS[3]].error
+    assert by_mint[BROKEN].exists is None
+    # FLAKY's chunk succeeded on retry
+    assert by_mint[FLAKY].verified and by_mint[FLAKY].error is None
+    assert (response.verified_count, response.missing_count, response.failed_count) == (3, 1, 2)
+    assert rpc.count("getMultipleAccounts") == 3 + 2
+
+async def test_sync_skips_failed_addresses(rpc, db):
+    await db.tokens.insert_many([{"mint_address": mint_address} for mint_address in MINTS])
+
+    response = await blockchain.sync_tokens_from_blockchain(BulkVerificationRequest(mint_addresses=MINTS))
+
+    assert response.failed == [BROKEN, MINTS[3]]
+    assert response.not_on_chain == [MINTS[-1]]
+    assert response.modified_count == 3
+    assert await db.tokens.count_documents({"contract_verified": True}) == 3
@@ -0,0 +1,55 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.services import bonding_curve
+from app.services.bonding_curve import AVAILABLE_SUPPLY, QuoteError
+
+def test_initial_purchase_matches_the_program():
+    assert bonding_curve.calculate_initial_purchase_tokens(1) == 1_000_000 * bonding_curve.TOKEN_UNIT
+    # 800 lamports take the whole curve allocation
+    assert bonding_curve.calculate_initial_purchase_tokens(800) == AVAILABLE_SUPPLY
+    # The program's checked u64 multiply
+    assert bonding_curve.calculate_initial_purchase_tokens(18_446) <= bonding_curve.U64_MAX
+    with pytest.raises(QuoteError):
+        bonding_curve.calculate_initial_purchase_tokens(18_447)
+
+def test_buy_never_charges_more_than_offered():
+    for current_sold in (0, 1, AVAILABLE_SUPPLY // 2, AVAILABLE_SUPPLY - 10):
+        for lamports in (1, 1_000, 10 ** 9, 10 ** 12):
+            quote = bonding_curve.quote("buy", current_sold, lamports)
+            assert quote["amount_in"] <= lamports
+            assert quote["sold_after"] <= AVAILABLE_SUPPLY
+
+def test_buy_then_sell_does_not_pay_out_more():
+    bought = bonding_curve.quote("buy", 10 ** 17, 5 * 10 ** 9)
+    sold = bonding_curve.quote("sell", bought["sold_after"], bought["amount_out"])
+
+    assert sold["sold_after"] == 10 ** 17
+    assert sold["amount_out"] <= bought["amount_in"]
+
+def test_sell_more_than_sold_is_rejected():
+    with pytest.raises(QuoteError):
+        bonding_curve.quote("sell", 100, 101)
+
+def test_quote_many_matches_exact_quotes():
+    rng = random.Random(5)
+    rows = []
+    for _ in range(500):
+        current_sold = rng.randrange(AVAILABLE_SUPPLY)
+        if rng.random() < 0.5:
+            rows.append((True, current_sold, rng.randrange(1, 10 ** 11)))
+        else:
+            rows.append((False, current_sold, rng.randrange(0, current_sold + 1)))
+    sides, sold, amounts = (np.array(column) for column in zip(*rows))
+
+    batch = bonding_curve.quote_many(sides, sold, amounts)
+
+    assert batch["valid"].all()
+    for index, (is_buy, current_sold, amount) in enumerate(rows):
+        exact = bonding_curve.quote("buy" if is_buy else "sell", current_sold, amount)
+        assert batch["amount_in"][index] == pytest.approx(exact["amount_in"], rel=1e-9, abs=2)
+        assert batch["amount_out"][index] == pytest.approx(exact["amount_out"], rel=1e-9, abs=2)
+        if is_buy:
+            assert batch["amount_in"][index] <= amount
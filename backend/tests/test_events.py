@@ -0,0 +1,66 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.services import events
+from app.services.events import EventBus
+
+pytestmark = pytest.mark.anyio
+
+
+class DroppingPubSub:
+    """Pub/sub connection that yields its messages, then fails as if Redis went away."""
+
+    def __init__(self, messages, error):
+        self.messages = messages
+        self.error = error
+        self.closed = False
+
+    async def psubscribe(self, pattern):
+        self.pattern = pattern
+
+    async def listen(self):
+        for channel, data in self.messages:
+            yield {"type": "pmessage", "channel": f"{events.REDIS_CHANNEL_PREFIX}{channel}", "data": data}
+        raise self.error
+
+    async def close(self):
+        self.closed = True
+
+
+class FlakyRedis:
+    def __init__(self, connections):
+        self.connections = list(connections)
+        self.opened = []
+
+    def pubsub(self):
+        pubsub = self.connections.pop(0)
+        self.opened.append(pubsub)
+        return pubsub
+
+
+async def test_listener_resubscribes_after_subscription_drops(monkeypatch, caplog):
+    monkeypatch.setattr(events, "REDIS_RECONNECT_MIN_DELAY", 0.001)
+    bus = EventBus()
+    subscriber = bus.subscribe(["tokens:new"])
+    bus._redis = FlakyRedis([
+        DroppingPubSub([("tokens:new", "first")], ConnectionError("Connection reset by peer")),
+        DroppingPubSub([], ConnectionError("Connection refused")),
+        DroppingPubSub([("tokens:new", "second")], ConnectionError("Connection reset by peer")),
+        DroppingPubSub([], ConnectionError("Connection refused")),
+    ])
+
+    with caplog.at_level(logging.ERROR):
+        listener = asyncio.create_task(bus._listen(await bus._subscribe()))
+        assert await asyncio.wait_for(subscriber.get(), 1) == "first"
+        assert await asyncio.wait_for(subscriber.get(), 1) == "second"
+        while not listener.done() and len(bus._redis.opened) < 4:
+            await asyncio.sleep(0.001)
+        listener.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await listener
+
+    assert all(pubsub.closed for pubsub in bus._redis.opened[:3])
+    failures = [record for record in caplog.records if "subscription failed" in record.getMessage()]
+    assert len(failures) >= 3
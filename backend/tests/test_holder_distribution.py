@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import struct
+
+import numpy as np
+import pytest
+
+from app.services.holder_distribution import HolderSnapshotJob, distribution_stats, owner_balances
+from app.services.leases import Lease
+from tests.stub_rpc import StubRPC, b58encode
+
+pytestmark = pytest.mark.anyio
+
+MINT = b58encode(b"\x01" * 32)
+OTHER_MINT = b58encode(b"\x04" * 32)
+CURVE_WALLET = b58encode(b"\x09" * 32)
+
+def account_slice(owner: bytes, amount: int) -> bytes:
+    """The (owner, amount) dataSlice of one SPL token account."""
+    return owner + struct.pack("<Q", amount)
+
+def test_owner_balances_sums_accounts_per_owner():
+    raw = b"".join([
+        account_slice(b"\x02" * 32, 5),
+        account_slice(b"\x03" * 32, 7),
+        account_slice(b"\x02" * 32, 10),
+        account_slice(b"\x05" * 32, 0),
+        account_slice(b"\x09" * 32, 1_000),
+    ])
+
+    balances = owner_balances(raw, [b"\x09" * 32])
+
+    assert sorted(balances.tolist()) == [7, 15]
+    assert balances.dtype == np.uint64
+
+def test_owner_balances_handles_no_accounts():
+    assert owner_balances(b"").size == 0
+
+def test_distribution_stats_for_equal_holders():
+    stats = distribution_stats(np.array([250, 250, 250, 250], dtype=np.uint64))
+
+    assert stats["holder_count"] == 4
+    assert stats["circulating"] == 1000
+    assert stats["gini"] == pytest.approx(0.0)
+    assert stats["top10_share"] == pytest.approx(1.0)
+    assert stats["percentiles"] == {"p50": 250.0, "p90": 250.0, "p99": 250.0}
+    # Each holds 25% of supply
+    assert stats["share_buckets"] == [0, 0, 0, 0, 4]
+
+def test_distribution_stats_concentration():
+    balances = np.array([1, 3] + [0] * 5, dtype=np.uint64)
+
+    stats = distribution_stats(balances)
+
+    assert stats["holder_count"] == 2
+    assert stats["gini"] == pytest.approx(0.25)
+
+    many = distribution_stats(np.arange(1, 101, dtype=np.uint64))
+    assert many["top10_share"] == pytest.approx(sum(range(91, 101)) / sum(range(1, 101)))
+    assert sum(many["share_buckets"]) == 100
+
+def test_distribution_stats_without_holders():
+    stats = distribution_stats(np.zeros(3, dtype=np.uint64))
+
+    assert stats["holder_count"] == 0
+    assert stats["gini"] is None
+    assert stats["share_buckets"] == [0, 0, 0, 0, 0]
+
+def stub_token_accounts(accounts_by_mint) -> StubRPC:
+    def get_program_accounts(params):
+        mint_address = params[1]["filters"][1]["memcmp"]["bytes"]
+        return [
+            {
+                "pubkey": b58encode(bytes([index + 1]) * 32),
+                "account": {"data": [base64.b64encode(account_slice(owner, amount)).decode(), "base64"]},
+            }
+            for index, (owner, amount) in enumerate(accounts_by_mint.get(mint_address, []))
+        ]
+
+    return StubRPC({"getProgramAccounts": get_program_accounts})
+
+ACCOUNTS = {
+    MINT: [(b"\x02" * 32, 600), (b"\x03" * 32, 300), (b"\x02" * 32, 100), (b"\x09" * 32, 9_000)],
+    OTHER_MINT: [(b"\x03" * 32, 50)],
+}
+
+async def test_snapshot_job_stores_snapshots_from_stub_rpc(db):
+    await db.tokens.insert_many([
+        {"mint_address": MINT, "is_active": True, "holder_count": 1},
+        {"mint_address": OTHER_MINT, "is_active": True, "holder_count": 9},
+    ])
+    rpc = stub_token_accounts(ACCOUNTS)
+    job = HolderSnapshotJob(db, rpc.client(), concurrency=2, rate=1000, burst=10, excluded_owners=[CURVE_WALLET])
+
+    assert await job.run_once() == 2
+
+    snapshot = await db.holder_snapshots.find_one({"mint_address": MINT})
+    assert snapshot["holder_count"] == 2
+    assert snapshot["circulating"] == 1000
+    assert snapshot["complete"] is True
+    assert (await db.tokens.find_one({"mint_address": OTHER_MINT}))["holder_count"] == 1
+    assert rpc.count("getProgramAccounts") == 2
+
+async def test_snapshot_job_runs_in_the_lease_holder_only(db):
+    await db.tokens.insert_one({"mint_address": MINT, "is_active": True, "holder_count": 1})
+    rpc = stub_token_accounts(ACCOUNTS)
+    workers = [
+        HolderSnapshotJob(db, rpc.client(), interval=3600, rate=1000, burst=10, lease=Lease(db, "holder_snapshots", ttl=60))
+        for _ in range(3)
+    ]
+
+    for worker in workers:
+        worker.start()
+    while await db.holder_snapshots.count_documents({}) == 0:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    for worker in workers:
+        await worker.stop()
+
+    assert rpc.count("getProgramAccounts") == 1
+    assert await db.holder_snapshots.count_documents({}) == 1
+    # The holder released the lease on stop
+    assert await db.leases.count_documents({}) == 0
@@ -0,0 +1,166 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models import GraduationStatus
+from app.services import candles, holdings
+from app.services.indexer import ChainIndexer, anchor_discriminator
+from tests.stub_rpc import StubRPC, b58encode
+
+pytestmark = pytest.mark.anyio
+
+PROGRAM_ID = b58encode(b"\x07" * 32)
+MINT = b58encode(b"\x01" * 32)
+ALICE = b58encode(b"\x02" * 32)
+BOB = b58encode(b"\x03" * 32)
+# Recent, so TTL indexes keep the derived minute buckets and 1s candles;
+# 20s into a minute, so trades at +0/+1s and +65/+70s fall in two minutes
+BLOCK_TIME = (int(time.time()) // 60 - 10) * 60 + 20
+
+def trade_tx(instruction: str, wallet: str, lamports: int, tokens_before: int, tokens_after: int, second: int):
+    """A getTransaction result for one token-factory instruction signed by wallet."""
+    def token_balances(amount: int):
+        return [{"accountIndex": 1, "mint": MINT, "owner": wallet, "uiTokenAmount": {"amount": str(amount)}}]
+
+    return {
+        "slot": 1000 + second,
+        "blockTime": BLOCK_TIME + second,
+        "transaction": {"message": {
+            "accountKeys": [wallet, MINT, PROGRAM_ID],
+            "instructions": [{
+                "programIdIndex": 2,
+                "accounts": [1, 0],
+                "data": b58encode(anchor_discriminator(instruction)),
+            }],
+        }},
+        "meta": {
+            "err": None,
+            "fee": 5000,
+            "preBalances": [10_000_000_000, 0, 1],
+            "postBalances": [10_000_000_000 + lamports - 5000, 0, 1],
+            "preTokenBalances": token_balances(tokens_before),
+            "postTokenBalances": token_balances(tokens_after),
+        },
+    }
+
+TRANSACTIONS = {
+    "sig-1": trade_tx("buy", ALICE, -1_000_000_000, 0, 30_000_000_000_000, 0),
+    "sig-2": trade_tx("buy", BOB, -500_000_000, 0, 14_000_000_000_000, 1),
+    "sig-3": trade_tx("sell", ALICE, 400_000_000, 30_000_000_000_000, 18_000_000_000_000, 65),
+    "sig-4": trade_tx("sell", BOB, 480_000_000, 14_000_000_000_000, 0, 70),
+}
+
+def stub_chain() -> StubRPC:
+    signatures = [{"signature": signature, "slot": tx["slot"], "err": None} for signature, tx in TRANSACTIONS.items()]
+
+    def get_signatures(params):
+        options = params[1]
+        newest_first = signatures[::-1]
+        if options.get("until"):
+            newest_first = newest_first[:[item["signature"] for item in newest_first].index(options["until"])]
+        return newest_first
+
+    return StubRPC({
+        "getSignaturesForAddress": get_signatures,
+        "getTransaction": lambda params: TRANSACTIONS.get(params[0]),
+    })
+
+async def seed(db):
+    await db.tokens.insert_one({
+        "mint_address": MINT,
+        "name": "Test",
+        "symbol": "TST",
+        "is_active": True,
+        "graduation_status": GraduationStatus.PENDING,
+        "total_volume": 0.0,
+        "transactions_count": 1,
+        "holder_count": 1,
+        "created_at": datetime(2025, 1, 1),
+    })
+
+async def derived_state(db):
+    token = await db.tokens.find_one({"mint_address": MINT})
+    holding_docs = await db.holdings.find({}).to_list(None)
+    candle_docs = await db.candles.find({}).to_list(None)
+    minute_docs = await db.analytics_minutes.find({}).to_list(None)
+    return {
+        "token": {field: token.get(field) for field in ("total_volume", "transactions_count", "holder_count", "current_price")},
+        "holdings": sorted(
+            (holding["wallet"], holding["balance"], holding["trade_count"], holding["bought_sol"], holding["sold_sol"])
+            for holding in holding_docs
+        ),
+        "candles": sorted(
+            (candle["resolution"], candle["bucket"], candle["trades"], round(candle["volume"], 9))
+            for candle in candle_docs
+        ),
+        "minutes": sorted((minute["_id"], minute["transactions"]) for minute in minute_docs),
+        "volume": round((await db.platform_stats.find_one({"_id": "platform"}))["total_trading_volume"], 9),
+        "pending": await db.transactions.count_documents({"derive_pending": True}),
+    }
+
+async def index_all(db, rpc: StubRPC) -> ChainIndexer:
+    indexer = ChainIndexer(db, rpc.client(), PROGRAM_ID, batch_size=10)
+    await indexer.run_once()
+    return indexer
+
+async def test_ingests_trades_from_stub_rpc(db):
+    await seed(db)
+    rpc = stub_chain()
+
+    await index_all(db, rpc)
+    state = await derived_state(db)
+
+    assert await db.transactions.count_documents({}) == 4
+    assert state["pending"] == 0
+    assert state["token"]["transactions_count"] == 5
+    # Alice still holds, Bob sold out
+    assert state["token"]["holder_count"] == 2
+    assert sorted((holding[0], holding[1]) for holding in state["holdings"]) == sorted(
+        [(ALICE, 18_000_000_000_000), (BOB, 0)]
+    )
+    assert [transactions for _, transactions in state["minutes"]] == [2, 2]
+    assert rpc.count("getTransaction") == 4
+
+async def test_retried_batch_is_not_derived_twice(db, make_db, monkeypatch):
+    await seed(db)
+    rpc = stub_chain()
+
+    # Fail part-way through the first attempt: Bob's sell lands in holdings
+    # but not in the token, and candles are written before the batch aborts
+    apply_holding = holdings.apply_trade
+    apply_candles = candles.apply_trades
+    failures = {"holdings": 1, "candles": 1}
+
+    async def flaky_holding(db, trade):
+        delta = await apply_holding(db, trade)
+        if trade["transaction_signature"] == "sig-4" and failures["holdings"]:
+            failures["holdings"] -= 1
+            raise RuntimeError("token update lost")
+        return delta
+
+    async def flaky_candles(db, trades):
+        written = await apply_candles(db, trades)
+        if failures["candles"]:
+            failures["candles"] -= 1
+            raise RuntimeError("connection reset")
+        return written
+
+    monkeypatch.setattr(holdings, "apply_trade", flaky_holding)
+    monkeypatch.setattr(candles, "apply_trades", flaky_candles)
+
+    indexer = ChainIndexer(db, rpc.client(), PROGRAM_ID, batch_size=10)
+    with pytest.raises(RuntimeError):
+        await indexer.run_once()
+    assert await indexer.get_checkpoint() is None
+    assert await db.transactions.count_documents({"derive_pending": True}) == 4
+
+    await indexer.run_once()
+    assert await indexer.get_checkpoint() == "sig-4"
+
+    # Same derived state as a clean run
+    monkeypatch.undo()
+    clean_db = await make_db("pumpfun_clean")
+    await seed(clean_db)
+    await index_all(clean_db, stub_chain())
+    assert await derived_state(db) == await derived_state(clean_db)
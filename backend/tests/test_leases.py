@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.leases import Lease
+
+pytestmark = pytest.mark.anyio
+
+async def test_one_holder_at_a_time(db):
+    first = Lease(db, "job", ttl=60)
+    second = Lease(db, "job", ttl=60)
+
+    assert await first.acquire()
+    assert not await second.acquire()
+    # The holder renews
+    assert await first.acquire()
+    assert not await second.acquire()
+
+async def test_expired_lease_is_taken_over(db):
+    first = Lease(db, "job", ttl=60)
+    second = Lease(db, "job", ttl=60)
+    assert await first.acquire()
+
+    await db.leases.update_one({"_id": "job"}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+    assert await second.acquire()
+    assert not await first.acquire()
+
+async def test_release_hands_the_lease_over(db):
+    first = Lease(db, "job", ttl=60)
+    second = Lease(db, "job", ttl=60)
+    assert await first.acquire()
+
+    # Releasing a lease held by someone else does nothing
+    await second.release()
+    assert not await second.acquire()
+
+    await first.release()
+    assert await second.acquire()
+
+async def test_leases_are_independent(db):
+    assert await Lease(db, "snapshots", ttl=60).acquire()
+    assert await Lease(db, "reconcile", ttl=60).acquire()
@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+from app.models import RankingWindow
+from app.services.ranking import Board, DecayedBoard, RankingEngine, unix_time
+
+def reference_top(scores, limit):
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+def test_board_matches_a_sorted_reference():
+    rng = random.Random(7)
+    board = Board(max_entries=50)
+    scores = {}
+
+    for _ in range(20_000):
+        mint_address = f"mint-{rng.randrange(120)}"
+        if rng.random() < 0.1:
+            board.remove(mint_address)
+            scores.pop(mint_address, None)
+            continue
+        score = float(rng.randrange(1000))
+        evicted = board.set(mint_address, score)
+        scores[mint_address] = score
+        if len(scores) > 50:
+            expected = min(scores.items(), key=lambda item: (item[1], item[0]))[0]
+            assert evicted == expected
+            del scores[expected]
+        else:
+            assert evicted is None
+        if rng.random() < 0.05:
+            board.scale(0.5)
+            scores = {key: value * 0.5 for key, value in scores.items()}
+
+        assert len(board) == len(scores)
+        assert board.get(mint_address, -1.0) == scores.get(mint_address, -1.0)
+        if rng.random() < 0.2:
+            assert board.top(10) == reference_top(scores, 10)
+
+    assert board.top(100) == reference_top(scores, 100)
+    assert board.top(0) == []
+
+def test_board_heaps_stay_bounded():
+    board = Board(max_entries=10)
+    for step in range(10_000):
+        board.set(f"mint-{step % 5}", float(step))
+
+    assert len(board) == 5
+    assert len(board._lowest) <= 2 * len(board) + 65
+    assert len(board._highest) <= 2 * len(board) + 65
+    assert board.top(1) == [("mint-4", 9999.0)]
+
+def test_decayed_board_rebase_keeps_order():
+    board = DecayedBoard(half_life=1.0, max_entries=10, epoch=0.0)
+    board.set("early", 8.0 * board.weight(0.0))
+    board.set("late", 1.0 * board.weight(300.0))
+
+    # 300 half-lives on, the early score has decayed below the late one
+    assert [mint_address for mint_address, _ in board.top_at(2, 300.0)] == ["late", "early"]
+    assert board.top_at(1, 300.0)[0][1] == 1.0
+
+def test_trending_ranks_recent_volume():
+    engine = RankingEngine(max_entries=100, trade_weight=0.0, threshold=100.0, now=0.0)
+    start = datetime(2025, 1, 1)
+    for minute, (mint_address, sol_amount) in enumerate([("quiet", 5.0), ("busy", 1.0), ("busy", 1.0), ("busy", 1.0)]):
+        engine.observe_trade({
+            "mint_address": mint_address,
+            "timestamp": start + timedelta(minutes=60 * minute),
+            "sol_amount": sol_amount,
+            "price_per_token": None,
+        })
+
+    now = unix_time(start + timedelta(hours=3))
+    ranked = [mint_address for mint_address, _ in engine.trending[RankingWindow.ONE_HOUR].top_at(2, now)]
+    assert ranked == ["busy", "quiet"]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.services import image_serving, storage
+from app.services.storage import MemoryStorage
+
+pytestmark = pytest.mark.anyio
+
+IMAGE = bytes(range(256)) * 1024
+
+@pytest.fixture
+async def memory_storage(monkeypatch):
+    """A MemoryStorage installed as the app's storage backend."""
+    backend = MemoryStorage()
+    await backend.connect()
+    monkeypatch.setattr(storage, "storage", backend)
+    yield backend
+
+class SlowConnectStorage(MemoryStorage):
+    async def connect(self):
+        # Like a bucket check: other requests run while this one connects
+        await asyncio.sleep(0.01)
+
+async def test_concurrent_first_use_connects_one_backend(monkeypatch):
+    monkeypatch.setattr(storage, "storage", None)
+    created = []
+
+    def create_storage():
+        created.append(SlowConnectStorage())
+        return created[-1]
+
+    monkeypatch.setattr(storage, "create_storage", create_storage)
+
+    backends = await asyncio.gather(*(storage.get_storage() for _ in range(20)))
+
+    assert len(created) == 1
+    assert all(backend is created[0] for backend in backends)
+
+async def test_memory_storage_round_trip(memory_storage):
+    await memory_storage.put("abc.png", IMAGE, "image/png")
+
+    assert await memory_storage.exists("abc.png")
+    assert not await memory_storage.exists("missing.png")
+    assert await memory_storage.size("abc.png") == len(IMAGE)
+    chunks = [chunk async for chunk in memory_storage.stream("abc.png", 10, len(IMAGE) - 1)]
+    assert b"".join(chunks) == IMAGE[10:]
+    assert max(len(chunk) for chunk in chunks) <= storage.STREAM_CHUNK_SIZE
+
+async def test_put_file(memory_storage, tmp_path):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(IMAGE)
+
+    await memory_storage.put_file("upload.webp", str(path), "image/webp")
+
+    assert await memory_storage.size("upload.webp") == len(IMAGE)
+
+async def body_of(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+async def test_image_response_serves_ranges_from_storage(memory_storage):
+    await memory_storage.put("abc.png", IMAGE, "image/png")
+    image_file = {"key": "abc.png", "content_type": "image/png", "size": len(IMAGE), "etag": '"abc-original-png"'}
+
+    response = await image_serving.image_response(image_file, range_header="bytes=100-199")
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(IMAGE)}"
+    assert await body_of(response) == IMAGE[100:200]
+
+    response = await image_serving.image_response(image_file)
+    assert response.status_code == 200
+    assert await body_of(response) == IMAGE
+
+    response = await image_serving.image_response(image_file, if_none_match='W/"abc-original-png"')
+    assert response.status_code == 304
+
+    response = await image_serving.image_response(image_file, range_header=f"bytes={len(IMAGE)}-")
+    assert response.status_code == 416